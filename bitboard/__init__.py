@@ -1,3 +1,5 @@
+from .bitboard import BitBoard
 from .bitothello import OthelloGame
+from .position import Position
 
-__all__ = ["OthelloGame"]
+__all__ = ["BitBoard", "OthelloGame", "Position"]
@@ -0,0 +1,249 @@
+"""
+Vectorized boards of Reversi.
+
+BatchBitBoard holds N positions as uint64 arrays and runs the same bit
+operations as BitBoard on all of them at once.
+"""
+
+from logging import getLogger
+
+import numpy as np
+
+from .bitboard import BitBoard
+
+logger = getLogger(__name__)
+
+_U64 = np.uint64
+_HORIZ = _U64(0x7e7e7e7e7e7e7e7e)
+_VERT = _U64(0x00ffffffffffff00)
+_ALL_BORDER = _U64(0x007e7e7e7e7e7e00)
+# (shift, mask of opponent) of every direction.
+_DIRECTIONS = [
+    (_U64(1), _HORIZ), (_U64(8), _VERT),
+    (_U64(7), _ALL_BORDER), (_U64(9), _ALL_BORDER),
+]
+
+
+def bit_count(x):
+    """Count the number of bit awaking of every element.
+
+    Parameters
+    ----------
+    x : numpy.ndarray of uint64
+    """
+    x = x - ((x >> _U64(1)) & _U64(0x5555555555555555))
+    x = (x & _U64(0x3333333333333333)) \
+        + ((x >> _U64(2)) & _U64(0x3333333333333333))
+    x = (x + (x >> _U64(4))) & _U64(0x0f0f0f0f0f0f0f0f)
+    return ((x * _U64(0x0101010101010101)) >> _U64(56)).astype(np.int64)
+
+
+def reversible_area(player, opponent):
+    """Returns reversible area of every row.
+
+    Parameters
+    ----------
+    player, opponent : numpy.ndarray of uint64
+        Boards of the players on turn and their opponents.
+    """
+    blank_board = ~(player | opponent)
+    reversible = np.zeros_like(player)
+    for shift, mask in _DIRECTIONS:
+        border = opponent & mask
+        one_rv = border & (player << shift)
+        for _ in range(5):
+            one_rv |= border & (one_rv << shift)
+        reversible |= blank_board & (one_rv << shift)
+        one_rv = border & (player >> shift)
+        for _ in range(5):
+            one_rv |= border & (one_rv >> shift)
+        reversible |= blank_board & (one_rv >> shift)
+    return reversible
+
+
+def reverse_area(player, opponent, put_loc):
+    """Returns disks reversed by putting a disk on put_loc of every row.
+
+    Parameters
+    ----------
+    player, opponent : numpy.ndarray of uint64
+        Boards of the players on turn and their opponents.
+    put_loc : numpy.ndarray of uint64
+        A bit per row. Rows of 0 reverse nothing.
+    """
+    reverse_bit = np.zeros_like(player)
+    zero = _U64(0)
+    for shift, mask in _DIRECTIONS:
+        border = opponent & mask
+        one_rv = border & (put_loc << shift)
+        for _ in range(5):
+            one_rv |= border & (one_rv << shift)
+        reverse_bit |= np.where(
+            (player & (one_rv << shift)) != zero, one_rv, zero)
+        one_rv = border & (put_loc >> shift)
+        for _ in range(5):
+            one_rv |= border & (one_rv >> shift)
+        reverse_bit |= np.where(
+            (player & (one_rv >> shift)) != zero, one_rv, zero)
+    return reverse_bit
+
+
+class BatchBitBoard:
+    """Boards of N games.
+
+    Parameters
+    ----------
+    size : int
+        Number of games which start from the initial position.
+    black_boards, white_boards : array-like of int (optional)
+        Start from given boards instead.
+    turns : array-like of int (optional)
+        BLACK or WHITE of every row. Default is BLACK.
+    """
+
+    __all__ = [
+        "player_boards", "reversible_area", "simulate_play", "pass_turn",
+        "count_disks", "is_terminal", "choice_moves", "step",
+        "return_board", "load_board",
+        ]
+
+    BLACK = BitBoard.BLACK
+    WHITE = BitBoard.WHITE
+
+    def __init__(
+            self, size: int = 1, black_boards=None, white_boards=None,
+            turns=None,
+            ):
+        if black_boards is None:
+            black_boards = np.full(size, BitBoard.INIT_BLACK, dtype=_U64)
+            white_boards = np.full(size, BitBoard.INIT_WHITE, dtype=_U64)
+        self.load_board(black_boards, white_boards, turns)
+
+    def __len__(self):
+        return len(self._black_boards)
+
+    def load_board(self, black_boards, white_boards, turns=None):
+        self._black_boards = np.array(black_boards, dtype=_U64)
+        self._white_boards = np.array(white_boards, dtype=_U64)
+        if turns is None:
+            self.turns = np.full(len(self._black_boards), self.BLACK, np.int8)
+        else:
+            self.turns = np.array(turns, dtype=np.int8)
+        logger.info("%d boards were set." % len(self._black_boards))
+
+    def return_board(self):
+        return self._black_boards, self._white_boards
+
+    def player_boards(self):
+        """Returns boards of the players on turn and of their opponents."""
+        is_white = self.turns == self.WHITE
+        player = np.where(is_white, self._white_boards, self._black_boards)
+        opponent = np.where(is_white, self._black_boards, self._white_boards)
+        return player, opponent
+
+    def reversible_area(self):
+        """Returns legal moves of the players on turn."""
+        return reversible_area(*self.player_boards())
+
+    def simulate_play(self, put_locs):
+        """Put a disk on every row and change turns.
+
+        Parameters
+        ----------
+        put_locs : array-like of uint64
+            A bit per row. Rows of 0 are left unchanged and keep the turn.
+
+        Returns
+        -------
+        reverse_bit : numpy.ndarray of uint64
+            Disks reversed on every row.
+        """
+        put_locs = np.asarray(put_locs, dtype=_U64)
+        player, opponent = self.player_boards()
+        reverse_bit = reverse_area(player, opponent, put_locs)
+        player ^= put_locs | reverse_bit
+        opponent ^= reverse_bit
+
+        is_white = self.turns == self.WHITE
+        self._black_boards = np.where(is_white, opponent, player)
+        self._white_boards = np.where(is_white, player, opponent)
+        self.turns ^= (put_locs != _U64(0)).astype(np.int8)
+        return reverse_bit
+
+    def pass_turn(self, rows):
+        """Change turns of rows given by a boolean array."""
+        self.turns ^= np.asarray(rows, dtype=np.int8)
+
+    def count_disks(self):
+        """Returns black and white's disk numbers of every row."""
+        return bit_count(self._black_boards), bit_count(self._white_boards)
+
+    def is_terminal(self, reversible=None):
+        """Returns whether each game is over.
+
+        Parameters
+        ----------
+        reversible : numpy.ndarray of uint64 (optional)
+            Legal moves of the players on turn, if already calculated.
+        """
+        player, opponent = self.player_boards()
+        if reversible is None:
+            reversible = reversible_area(player, opponent)
+        zero = _U64(0)
+        return (
+            (reversible == zero)
+            & (reversible_area(opponent, player) == zero)
+            )
+
+    @staticmethod
+    def choice_moves(reversible, rng=None):
+        """Select a random legal move from every row.
+
+        Parameters
+        ----------
+        reversible : numpy.ndarray of uint64
+            Legal moves of every row. Rows of 0 select 0.
+        rng : numpy.random.Generator or RandomState (optional)
+
+        Returns
+        -------
+        put_locs : numpy.ndarray of uint64
+        """
+        if rng is None:
+            rng = np.random
+        counts = bit_count(reversible)
+        index = (rng.random(len(reversible)) * counts).astype(np.int64)
+        moves = reversible.copy()
+        # Drop the lowest bits until the selected one is the lowest.
+        while True:
+            rows = index > 0
+            if not rows.any():
+                break
+            moves[rows] &= moves[rows] - _U64(1)
+            index[rows] -= 1
+        return moves & (~moves + _U64(1))
+
+    def step(self, put_locs=None, rng=None):
+        """Advance every game by a ply.
+
+        Players who can not move pass, and finished games are left as
+        they are.
+
+        Parameters
+        ----------
+        put_locs : array-like of uint64 (optional)
+            Moves of every row. Default is random legal moves.
+
+        Returns
+        -------
+        terminal : numpy.ndarray of bool
+            Rows whose game is over.
+        """
+        reversible = self.reversible_area()
+        terminal = self.is_terminal(reversible)
+        if put_locs is None:
+            put_locs = self.choice_moves(reversible, rng)
+        is_pass = reversible == _U64(0)
+        self.simulate_play(np.where(is_pass, _U64(0), put_locs))
+        self.pass_turn(is_pass & ~terminal)
+        return terminal
@@ -0,0 +1,79 @@
+"""
+Compare the speed of flip modes of BitBoard.
+
+    python -m bitboard.benchmark [--games 200] [--repeat 5] [--seed 0]
+
+Legal moves are collected from random games, and every flip mode has to
+return the same disks before it is timed on them.
+"""
+
+import argparse
+import random
+import timeit
+
+from .bitboard import BitBoard
+
+FLIP_MODES = ["loop", "shift", "table"]
+
+
+def collect_moves(games: int, seed: int = 0):
+    """Play random games and return (turn, put_loc, black, white) of moves."""
+    rng = random.Random(seed)
+    board = BitBoard()
+    moves = []
+    for _ in range(games):
+        black_board, white_board = BitBoard.INIT_BLACK, BitBoard.INIT_WHITE
+        turn = BitBoard.BLACK
+        while True:
+            reversible = board.reversible_area(turn, black_board, white_board)
+            if not reversible:
+                if not board.reversible_area(
+                        turn ^ 1, black_board, white_board):
+                    break
+                turn ^= 1
+                continue
+            candidates = []
+            for num in range(64):
+                if reversible & (1 << num):
+                    candidates.append(1 << num)
+                    moves.append((turn, 1 << num, black_board, white_board))
+            black_board, white_board = board.simulate_play(
+                turn, rng.choice(candidates), black_board, white_board)
+            turn ^= 1
+    return moves
+
+
+def run(games: int = 200, repeat: int = 5, seed: int = 0):
+    moves = collect_moves(games, seed)
+    board = BitBoard()
+
+    expected = None
+    for flip_mode in FLIP_MODES:
+        board.set_flip_mode(flip_mode)
+        result = [board.simulate_play(*move) for move in moves]
+        if expected is None:
+            expected = result
+        elif result != expected:
+            raise AssertionError("%s differs from loop." % flip_mode)
+
+    print("%d moves from %d random games" % (len(moves), games))
+    base = None
+    for flip_mode in FLIP_MODES:
+        board.set_flip_mode(flip_mode)
+        simulate_play = board.simulate_play
+        elapsed = min(timeit.repeat(
+            lambda: [simulate_play(*move) for move in moves],
+            number=1, repeat=repeat))
+        speed = len(moves) / elapsed
+        if base is None:
+            base = speed
+        print("%-6s %10.0f moves/s  x%.2f" % (flip_mode, speed, speed / base))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.games, args.repeat, args.seed)
@@ -6,25 +6,37 @@ Black disk make the first move, and white disk make the second move.
 # from functools import lru_cache
 from logging import getLogger
 
+from .flip_table import (
+    ANTI_DIAGONAL_MASK, COLUMN_DEPOSIT, COLUMN_MAGIC, DIAGONAL_MAGIC,
+    DIAGONAL_MASK, FLIPPED, MASK64, OUTFLANK, SQUARE_INDEX,
+)
+from .stability import stable_disks
+from .zobrist import TURN_KEY, hash_board, update_hash
+
 logger = getLogger(__name__)
 
 
 class BitBoard:
 
     __all__ = [
-        "simulate_play", "update_board",
+        "set_flip_mode", "simulate_play", "update_board",
         "count_disks", "reversible_area", "is_reversible", "turn_playable",
-        "return_board", "return_player_board", "load_board",
+        "expand", "iter_moves", "move_list", "stable_disks", "board_features",
+        "return_board", "return_player_board", "return_hash", "load_board",
         ]
 
     BLACK = 0
     WHITE = 1
     INIT_BLACK = 0x0000000810000000
     INIT_WHITE = 0x0000001008000000
+    CORNERS = 0x8100000000000081
+    X_SQUARES = 0x4200000000004200
 
-    def __init__(self):
+    def __init__(self, flip_mode: str = "table"):
         self._black_board = BitBoard.INIT_BLACK
         self._white_board = BitBoard.INIT_WHITE
+        self._hash = hash_board(self._black_board, self._white_board)
+        self.set_flip_mode(flip_mode)
         logger.info("Board was set.")
 
     @staticmethod
@@ -80,6 +92,215 @@ class BitBoard:
         else:
             raise ValueError
 
+    @classmethod
+    def _reverse_by_loop(cls, player: int, opponent: int, put_loc: int):
+        """Return disks reversed by putting a disk, square by square.
+
+        This is the reference implementation which walks every direction
+        with _check_surround.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent.
+        put_loc : int
+            64-bit intager which represents the location of disk.
+        """
+        reverse_bit = 0
+        for direction in range(8):
+            reverse_bit_ = 0
+            border_bit = cls._check_surround(put_loc, direction)
+            while border_bit & opponent:
+                reverse_bit_ |= border_bit
+                border_bit = cls._check_surround(border_bit, direction)
+            # If player's disk is opposite side.
+            if border_bit & player:
+                reverse_bit |= reverse_bit_
+        return reverse_bit
+
+    @staticmethod
+    def _reverse_by_shift(player: int, opponent: int, put_loc: int):
+        """Return disks reversed by putting a disk, with shifts and masks.
+
+        Each direction is filled through opponent's disks by a fixed number
+        of shifts as in reversible_area, and the filled line is kept only if
+        player's disk is next to it. A direction without adjacent opponent's
+        disk is skipped, which is cheaper than filling it in Python.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent.
+        put_loc : int
+            64-bit intager which represents the location of disk.
+        """
+        horiz_brd = opponent & 0x7e7e7e7e7e7e7e7e
+        vert_brd = opponent & 0x00ffffffffffff00
+        all_border = opponent & 0x007e7e7e7e7e7e00
+        reverse_bit = 0
+
+        # Upper
+        one_rv = vert_brd & (put_loc << 8)
+        if one_rv:
+            one_rv |= vert_brd & (one_rv << 8)
+            one_rv |= vert_brd & (one_rv << 8)
+            one_rv |= vert_brd & (one_rv << 8)
+            one_rv |= vert_brd & (one_rv << 8)
+            one_rv |= vert_brd & (one_rv << 8)
+            if player & (one_rv << 8):
+                reverse_bit |= one_rv
+
+        # Upper right
+        one_rv = all_border & (put_loc << 7)
+        if one_rv:
+            one_rv |= all_border & (one_rv << 7)
+            one_rv |= all_border & (one_rv << 7)
+            one_rv |= all_border & (one_rv << 7)
+            one_rv |= all_border & (one_rv << 7)
+            one_rv |= all_border & (one_rv << 7)
+            if player & (one_rv << 7):
+                reverse_bit |= one_rv
+
+        # Right
+        one_rv = horiz_brd & (put_loc >> 1)
+        if one_rv:
+            one_rv |= horiz_brd & (one_rv >> 1)
+            one_rv |= horiz_brd & (one_rv >> 1)
+            one_rv |= horiz_brd & (one_rv >> 1)
+            one_rv |= horiz_brd & (one_rv >> 1)
+            one_rv |= horiz_brd & (one_rv >> 1)
+            if player & (one_rv >> 1):
+                reverse_bit |= one_rv
+
+        # Lower right
+        one_rv = all_border & (put_loc >> 9)
+        if one_rv:
+            one_rv |= all_border & (one_rv >> 9)
+            one_rv |= all_border & (one_rv >> 9)
+            one_rv |= all_border & (one_rv >> 9)
+            one_rv |= all_border & (one_rv >> 9)
+            one_rv |= all_border & (one_rv >> 9)
+            if player & (one_rv >> 9):
+                reverse_bit |= one_rv
+
+        # Lower
+        one_rv = vert_brd & (put_loc >> 8)
+        if one_rv:
+            one_rv |= vert_brd & (one_rv >> 8)
+            one_rv |= vert_brd & (one_rv >> 8)
+            one_rv |= vert_brd & (one_rv >> 8)
+            one_rv |= vert_brd & (one_rv >> 8)
+            one_rv |= vert_brd & (one_rv >> 8)
+            if player & (one_rv >> 8):
+                reverse_bit |= one_rv
+
+        # Lower left
+        one_rv = all_border & (put_loc >> 7)
+        if one_rv:
+            one_rv |= all_border & (one_rv >> 7)
+            one_rv |= all_border & (one_rv >> 7)
+            one_rv |= all_border & (one_rv >> 7)
+            one_rv |= all_border & (one_rv >> 7)
+            one_rv |= all_border & (one_rv >> 7)
+            if player & (one_rv >> 7):
+                reverse_bit |= one_rv
+
+        # Left
+        one_rv = horiz_brd & (put_loc << 1)
+        if one_rv:
+            one_rv |= horiz_brd & (one_rv << 1)
+            one_rv |= horiz_brd & (one_rv << 1)
+            one_rv |= horiz_brd & (one_rv << 1)
+            one_rv |= horiz_brd & (one_rv << 1)
+            one_rv |= horiz_brd & (one_rv << 1)
+            if player & (one_rv << 1):
+                reverse_bit |= one_rv
+
+        # Upper left
+        one_rv = all_border & (put_loc << 9)
+        if one_rv:
+            one_rv |= all_border & (one_rv << 9)
+            one_rv |= all_border & (one_rv << 9)
+            one_rv |= all_border & (one_rv << 9)
+            one_rv |= all_border & (one_rv << 9)
+            one_rv |= all_border & (one_rv << 9)
+            if player & (one_rv << 9):
+                reverse_bit |= one_rv
+        return reverse_bit
+
+    @staticmethod
+    def _reverse_by_table(player: int, opponent: int, put_loc: int):
+        """Return disks reversed by putting a disk, with lookup tables.
+
+        The row, column, diagonal and anti-diagonal through put_loc are
+        gathered into 8 bits, and reversed disks on each line are looked up
+        from the tables in flip_table.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent.
+        put_loc : int
+            64-bit intager which represents the location of disk.
+        """
+        square = SQUARE_INDEX[put_loc]
+        row = square >> 3
+        column = square & 7
+
+        # Row
+        shift = square & 56
+        line = FLIPPED[column][
+            OUTFLANK[column][(opponent >> shift) & 0xff] & (player >> shift)]
+        reverse_bit = line << shift
+
+        # Column
+        line_opp = (
+            ((opponent >> column) & 0x0101010101010101) * COLUMN_MAGIC
+            & MASK64) >> 56
+        line_ply = (
+            ((player >> column) & 0x0101010101010101) * COLUMN_MAGIC
+            & MASK64) >> 56
+        line = FLIPPED[row][OUTFLANK[row][line_opp] & line_ply]
+        if line:
+            reverse_bit |= COLUMN_DEPOSIT[line] << column
+
+        # Diagonal
+        mask = DIAGONAL_MASK[square]
+        line_opp = ((opponent & mask) * DIAGONAL_MAGIC & MASK64) >> 56
+        line_ply = ((player & mask) * DIAGONAL_MAGIC & MASK64) >> 56
+        line = FLIPPED[column][OUTFLANK[column][line_opp] & line_ply]
+        if line:
+            reverse_bit |= (line * DIAGONAL_MAGIC) & mask
+
+        # Anti-diagonal
+        mask = ANTI_DIAGONAL_MASK[square]
+        line_opp = ((opponent & mask) * DIAGONAL_MAGIC & MASK64) >> 56
+        line_ply = ((player & mask) * DIAGONAL_MAGIC & MASK64) >> 56
+        line = FLIPPED[column][OUTFLANK[column][line_opp] & line_ply]
+        if line:
+            reverse_bit |= (line * DIAGONAL_MAGIC) & mask
+        return reverse_bit
+
+    def set_flip_mode(self, flip_mode: str):
+        """Select the kernel used to find reversed disks.
+
+        Parameters
+        ----------
+        flip_mode : str
+            table : Look up every line through the square (default).
+            shift : Fill all directions with fixed shifts.
+            loop : Walk every direction square by square.
+        """
+        if flip_mode == "table":
+            self._reverse = self._reverse_by_table
+        elif flip_mode == "shift":
+            self._reverse = self._reverse_by_shift
+        elif flip_mode == "loop":
+            self._reverse = self._reverse_by_loop
+        else:
+            raise KeyError
+        self._flip_mode = flip_mode
+
     def simulate_play(
             self, turn: int, put_loc: int,
             black_board: int = None, white_board: int = None,
@@ -105,16 +326,7 @@ class BitBoard:
         board = [black_board, white_board]
 
         # Player is board[turn].
-        reverse_bit = 0
-        for direction in range(8):
-            reverse_bit_ = 0
-            border_bit = self._check_surround(put_loc, direction)
-            while border_bit & board[turn ^ 1]:
-                reverse_bit_ |= border_bit
-                border_bit = self._check_surround(border_bit, direction)
-            # If player's disk is opposite side.
-            if border_bit & board[turn]:
-                reverse_bit |= reverse_bit_
+        reverse_bit = self._reverse(board[turn], board[turn ^ 1], put_loc)
         board[turn] ^= (put_loc | reverse_bit)
         board[turn ^ 1] ^= reverse_bit
 
@@ -123,11 +335,29 @@ class BitBoard:
     def update_board(self, black_board, white_board):
         """Put a disk and reverse opponent disks.
 
+        The hash is updated from the put square and the reversed disks. If
+        the boards are not one move after the current boards, such as boards
+        of another game, it is computed again.
+
         Parameters
         ----------
         black_board, white_board : int
             64-bit intager.
         """
+        board = self._black_board | self._white_board
+        put_loc = (black_board | white_board) & ~board
+        if put_loc & (put_loc - 1) or board & ~(black_board | white_board):
+            self._hash = hash_board(black_board, white_board)
+        elif put_loc & black_board and not self._black_board & white_board:
+            self._hash = update_hash(
+                self._hash, BitBoard.BLACK, put_loc,
+                self._white_board & black_board)
+        elif put_loc & white_board and not self._white_board & black_board:
+            self._hash = update_hash(
+                self._hash, BitBoard.WHITE, put_loc,
+                self._black_board & white_board)
+        else:
+            self._hash = hash_board(black_board, white_board)
         self._black_board = black_board
         self._white_board = white_board
 
@@ -145,6 +375,64 @@ class BitBoard:
         board = [black_board, white_board]
         return list(map(self._bit_count, board))
 
+    @staticmethod
+    def _neighbor_area(board: int):
+        """Returns squares of board and squares next to them."""
+        board |= ((board << 1) & 0xfefefefefefefefe) \
+            | ((board >> 1) & 0x7f7f7f7f7f7f7f7f)
+        return (board | (board << 8) | (board >> 8)) & MASK64
+
+    @classmethod
+    def board_features(cls, player: int, opponent: int):
+        """Returns features of the board in one call.
+
+        Every feature is given by shifted masks of empty squares or of
+        disks, without generating moves.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent.
+
+        Returns
+        -------
+        frontier_player, frontier_opponent : int
+            Disks next to an empty square.
+        potential_player, potential_opponent : int
+            Number of empty squares next to the other side's disks.
+        corner_player, corner_opponent : int
+            Disks on corners.
+        x_player, x_opponent : int
+            Disks on X-squares, diagonally next to corners.
+        """
+        blank_board = ~(player | opponent) & MASK64
+        next_blank = cls._neighbor_area(blank_board)
+        return (
+            player & next_blank,
+            opponent & next_blank,
+            cls._bit_count(blank_board & cls._neighbor_area(opponent)),
+            cls._bit_count(blank_board & cls._neighbor_area(player)),
+            player & BitBoard.CORNERS,
+            opponent & BitBoard.CORNERS,
+            player & BitBoard.X_SQUARES,
+            opponent & BitBoard.X_SQUARES,
+        )
+
+    def stable_disks(self, black_board=None, white_board=None):
+        """Returns black and white's stable disks.
+
+        Stable disks are never reversed until the end of the game.
+
+        Parameters
+        ----------
+        black_board, white_board : int (optional)
+            64-bit intager.
+        """
+        if black_board is None:
+            black_board = self._black_board
+            white_board = self._white_board
+        return list(stable_disks(black_board, white_board))
+
     def reversible_area(
             self, turn: int, black_board: int = None, white_board: int = None):
         """Returns reversible area.
@@ -164,15 +452,27 @@ class BitBoard:
         if black_board is None:
             black_board = self._black_board
             white_board = self._white_board
-        board = [black_board, white_board]
-        blank_board = ~(board[0] | board[1])
+        if turn == BitBoard.BLACK:
+            return self._reversible_area(black_board, white_board)
+        return self._reversible_area(white_board, black_board)
+
+    @staticmethod
+    def _reversible_area(player: int, opponent: int):
+        """Returns reversible area of the player on turn.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent.
+        """
+        blank_board = ~(player | opponent)
 
-        horiz_brd = board[turn ^ 1] & 0x7e7e7e7e7e7e7e7e
-        vert_brd = board[turn ^ 1] & 0x00ffffffffffff00
-        all_border = board[turn ^ 1] & 0x007e7e7e7e7e7e00
+        horiz_brd = opponent & 0x7e7e7e7e7e7e7e7e
+        vert_brd = opponent & 0x00ffffffffffff00
+        all_border = opponent & 0x007e7e7e7e7e7e00
 
         # Upper
-        one_rv = horiz_brd & (board[turn] << 1)
+        one_rv = horiz_brd & (player << 1)
         one_rv |= horiz_brd & (one_rv << 1)
         one_rv |= horiz_brd & (one_rv << 1)
         one_rv |= horiz_brd & (one_rv << 1)
@@ -181,7 +481,7 @@ class BitBoard:
         reversible = blank_board & (one_rv << 1)
 
         # Lower
-        one_rv = horiz_brd & (board[turn] >> 1)
+        one_rv = horiz_brd & (player >> 1)
         one_rv |= horiz_brd & (one_rv >> 1)
         one_rv |= horiz_brd & (one_rv >> 1)
         one_rv |= horiz_brd & (one_rv >> 1)
@@ -190,7 +490,7 @@ class BitBoard:
         reversible |= blank_board & (one_rv >> 1)
 
         # Left
-        one_rv = vert_brd & (board[turn] << 8)
+        one_rv = vert_brd & (player << 8)
         one_rv |= vert_brd & (one_rv << 8)
         one_rv |= vert_brd & (one_rv << 8)
         one_rv |= vert_brd & (one_rv << 8)
@@ -199,7 +499,7 @@ class BitBoard:
         reversible |= blank_board & (one_rv << 8)
 
         # Right
-        one_rv = vert_brd & (board[turn] >> 8)
+        one_rv = vert_brd & (player >> 8)
         one_rv |= vert_brd & (one_rv >> 8)
         one_rv |= vert_brd & (one_rv >> 8)
         one_rv |= vert_brd & (one_rv >> 8)
@@ -208,7 +508,7 @@ class BitBoard:
         reversible |= blank_board & (one_rv >> 8)
 
         # Upper right
-        one_rv = all_border & (board[turn] << 7)
+        one_rv = all_border & (player << 7)
         one_rv |= all_border & (one_rv << 7)
         one_rv |= all_border & (one_rv << 7)
         one_rv |= all_border & (one_rv << 7)
@@ -217,7 +517,7 @@ class BitBoard:
         reversible |= blank_board & (one_rv << 7)
 
         # Upper left
-        one_rv = all_border & (board[turn] << 9)
+        one_rv = all_border & (player << 9)
         one_rv |= all_border & (one_rv << 9)
         one_rv |= all_border & (one_rv << 9)
         one_rv |= all_border & (one_rv << 9)
@@ -226,7 +526,7 @@ class BitBoard:
         reversible |= blank_board & (one_rv << 9)
 
         # Lower right
-        one_rv = all_border & (board[turn] >> 9)
+        one_rv = all_border & (player >> 9)
         one_rv |= all_border & (one_rv >> 9)
         one_rv |= all_border & (one_rv >> 9)
         one_rv |= all_border & (one_rv >> 9)
@@ -235,7 +535,7 @@ class BitBoard:
         reversible |= blank_board & (one_rv >> 9)
 
         # Lower left
-        one_rv = all_border & (board[turn] >> 7)
+        one_rv = all_border & (player >> 7)
         one_rv |= all_border & (one_rv >> 7)
         one_rv |= all_border & (one_rv >> 7)
         one_rv |= all_border & (one_rv >> 7)
@@ -244,6 +544,68 @@ class BitBoard:
         reversible |= blank_board & (one_rv >> 7)
         return reversible
 
+    @classmethod
+    def expand(cls, player: int, opponent: int):
+        """Returns what a search needs to expand a node, each found once.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent.
+
+        Returns
+        -------
+        reversible : int
+            Legal moves of the player on turn.
+        must_pass : bool
+            True if the player can not move but the opponent can.
+        game_over : bool
+            True if neither can move.
+        disk_difference : int
+            Disks of the player minus disks of the opponent.
+        """
+        reversible = cls._reversible_area(player, opponent)
+        if reversible:
+            must_pass = game_over = False
+        else:
+            game_over = not cls._reversible_area(opponent, player)
+            must_pass = not game_over
+        return (
+            reversible, must_pass, game_over,
+            cls._bit_count(player) - cls._bit_count(opponent),
+        )
+
+    @staticmethod
+    def iter_moves(reversible: int):
+        """Yield every move of reversible area, from the lowest bit.
+
+        Only set bits are visited, by taking the lowest bit one by one.
+
+        Parameters
+        ----------
+        reversible : int
+            64-bit intager of moves.
+
+        Yields
+        ------
+        square, put_loc : int
+            Integer from 0 to 63, and the 64-bit intager of the square.
+        """
+        while reversible:
+            put_loc = reversible & -reversible
+            yield SQUARE_INDEX[put_loc], put_loc
+            reversible ^= put_loc
+
+    @staticmethod
+    def move_list(reversible: int):
+        """Returns squares of reversible area as a list of 0 to 63."""
+        squares = []
+        while reversible:
+            put_loc = reversible & -reversible
+            squares.append(SQUARE_INDEX[put_loc])
+            reversible ^= put_loc
+        return squares
+
     def is_reversible(
             self, turn: int, put_loc: int,
             black_board: int = None, white_board: int = None,
@@ -296,6 +658,19 @@ class BitBoard:
         board = [self._black_board, self._white_board]
         return board[turn], board[turn ^ 1]
 
+    def return_hash(self, turn: int = None):
+        """Returns Zobrist hash of the board.
+
+        Parameters
+        ----------
+        turn : int (optional)
+            If WHITE is given, the hash of white's turn is returned.
+        """
+        if turn == BitBoard.WHITE:
+            return self._hash ^ TURN_KEY
+        return self._hash
+
     def load_board(self, black_board, white_board):
         self._black_board = black_board
         self._white_board = white_board
+        self._hash = hash_board(black_board, white_board)
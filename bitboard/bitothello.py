@@ -6,6 +6,7 @@ from logging import getLogger
 import random
 
 from .bitboard import BitBoard
+from .position import Position
 
 logger = getLogger(__name__)
 
@@ -85,15 +86,25 @@ class OthelloGame:
         self._disk_count = player_cpu
         return player_cpu
 
-    def judge_game(self, disk_count: list = None):
-        """Judgement of game."""
+    def judge_game(self, disk_count: list = None, game_over: bool = None):
+        """Judgement of game.
+
+        Parameters
+        ----------
+        disk_count : list of int (optional)
+            Disks of the player and the CPU.
+        game_over : bool (optional)
+            If it is already known by BitBoard.expand, moves are not
+            generated again.
+        """
         if disk_count is None:
             disk_count = self._disk_count
 
-        # if self._pass_cnt >= 2 or sum(disk_count) == 64:
-        black = self.board.reversible_area(0)
-        white = self.board.reversible_area(1)
-        if (black == 0 and white == 0) or sum(disk_count) == 64:
+        if game_over is None:
+            black = self.board.reversible_area(0)
+            white = self.board.reversible_area(1)
+            game_over = (black == 0 and white == 0)
+        if game_over or sum(disk_count) == 64:
             if disk_count[0] == disk_count[1]:
                 self.result = "DRAW"
             if disk_count[0] > disk_count[1]:
@@ -136,14 +147,15 @@ class OthelloGame:
         finished, updated : bool
         """
         self.update_count()
+        self.reversible, must_pass, game_over, _ = self.board.expand(
+            *self.board.return_player_board(self.turn))
 
-        if self.judge_game():
+        if self.judge_game(game_over=game_over):
             logger.debug("Game was judged as the end.")
             return True, True
 
         if self.turn == self._player_clr:
-            self.reversible = self.board.reversible_area(self.turn)
-            if self.board.turn_playable(self.turn):
+            if not must_pass:
                 if self._player_auto:
                     logger.debug("Player's turn was processed automatically.")
                     self.play_turn(self._strategy_player.selecter(self))
@@ -155,8 +167,7 @@ class OthelloGame:
                 self.turn ^= 1
                 self._pass_cnt[self.turn] += 1
         else:
-            self.reversible = self.board.reversible_area(self.turn)
-            if self.board.turn_playable(self.turn):
+            if not must_pass:
                 logger.debug("CPU's turn was processed automatically.")
                 self.play_turn(self._strategy_opponent.selecter(self))
                 return False, True
@@ -225,6 +236,11 @@ class OthelloGame:
     def return_turn(self):
         return self._player_clr
 
+    def return_position(self):
+        """Returns the current board seen from the player on turn."""
+        black_board, white_board = self.board.return_board()
+        return Position.from_board(black_board, white_board, self.turn)
+
     def return_state(self):
         black_board, white_board = self.board.return_board()
         return black_board, white_board, self._board_log, self._board_back
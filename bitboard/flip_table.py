@@ -0,0 +1,85 @@
+"""
+Lookup tables to find reversed disks line by line.
+
+Every line through a square (row, column, diagonal and anti-diagonal) is
+gathered into 8 bits, so that reversed disks on the line are given by two
+lookups indexed by the square's position on the line and the occupancy of
+the line. The tables are built once at import and shared by every BitBoard.
+"""
+
+MASK64 = 0xffffffffffffffff
+# Gather a column shifted to the file A into the upper byte, row r -> bit r.
+COLUMN_MAGIC = 0x0102040810204080
+# Gather a diagonal into the upper byte, column c -> bit c.
+DIAGONAL_MAGIC = 0x0101010101010101
+
+
+def _build_outflank():
+    """OUTFLANK[x][opponent] is the squares next to the opponent's run."""
+    outflank = [[0] * 256 for _ in range(8)]
+    for x in range(8):
+        for opponent in range(256):
+            bits = 0
+            y = x - 1
+            while y >= 0 and opponent >> y & 1:
+                y -= 1
+            if 0 <= y < x - 1:
+                bits |= 1 << y
+            y = x + 1
+            while y < 8 and opponent >> y & 1:
+                y += 1
+            if x + 1 < y < 8:
+                bits |= 1 << y
+            outflank[x][opponent] = bits
+    return outflank
+
+
+def _build_flipped():
+    """FLIPPED[x][outflank] is the squares between x and outflank."""
+    flipped = [[0] * 256 for _ in range(8)]
+    for x in range(8):
+        for outflank in range(256):
+            bits = 0
+            for y in range(8):
+                if outflank >> y & 1:
+                    for z in range(min(x, y) + 1, max(x, y)):
+                        bits |= 1 << z
+            flipped[x][outflank] = bits
+    return flipped
+
+
+def _build_column_deposit():
+    """COLUMN_DEPOSIT[line] puts 8 bits back to the file A."""
+    deposit = [0] * 256
+    for line in range(256):
+        bits = 0
+        for row in range(8):
+            if line >> row & 1:
+                bits |= 1 << (row * 8)
+        deposit[line] = bits
+        # The gathering must be carry-free for every column.
+        if ((bits * COLUMN_MAGIC) & MASK64) >> 56 != line:
+            raise AssertionError
+    return deposit
+
+
+def _build_diagonals():
+    """Masks of the diagonal and anti-diagonal through every square."""
+    diagonal = [0] * 64
+    anti_diagonal = [0] * 64
+    for square in range(64):
+        row, column = square >> 3, square & 7
+        for other in range(64):
+            other_row, other_column = other >> 3, other & 7
+            if other_row - row == other_column - column:
+                diagonal[square] |= 1 << other
+            if other_row - row == column - other_column:
+                anti_diagonal[square] |= 1 << other
+    return diagonal, anti_diagonal
+
+
+OUTFLANK = _build_outflank()
+FLIPPED = _build_flipped()
+COLUMN_DEPOSIT = _build_column_deposit()
+DIAGONAL_MASK, ANTI_DIAGONAL_MASK = _build_diagonals()
+SQUARE_INDEX = {1 << square: square for square in range(64)}
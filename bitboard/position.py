@@ -0,0 +1,160 @@
+"""
+A board of Reversi seen from the player on turn.
+
+Position keeps (player, opponent, turn) instead of (black, white), so that
+search code does not need to build [black_board, white_board] lists and
+index them by turn. Moves are made and unmade in place, and the history
+is kept in lists allocated once per position.
+"""
+
+from .bitboard import BitBoard
+from .stability import stable_disks
+from .zobrist import TURN_KEY, hash_board, update_hash
+
+
+class Position:
+    """Boards of the player on turn and the opponent.
+
+    Parameters
+    ----------
+    player, opponent : int
+        64-bit intager of the player on turn and the opponent.
+    turn : int
+        BLACK or WHITE, the color of the player on turn.
+
+    Attributes
+    ----------
+    hash : int
+        Zobrist hash of the boards and the turn, updated by every move.
+    """
+
+    __all__ = [
+        "from_board", "return_board", "count_disks", "reversible_area",
+        "expand", "stable_disks", "board_features",
+        "play", "pass_", "undo", "copy",
+        ]
+    __slots__ = [
+        "player", "opponent", "turn", "hash",
+        "_ply", "_moves", "_reversed", "_hashes",
+        ]
+
+    # Moves and passes which can be undone.
+    MAX_PLY = 128
+
+    def __init__(
+            self, player: int = BitBoard.INIT_BLACK,
+            opponent: int = BitBoard.INIT_WHITE, turn: int = BitBoard.BLACK,
+            ):
+        self.player = player
+        self.opponent = opponent
+        self.turn = turn
+        if turn == BitBoard.BLACK:
+            self.hash = hash_board(player, opponent, turn)
+        else:
+            self.hash = hash_board(opponent, player, turn)
+        self._ply = 0
+        self._moves = [0] * Position.MAX_PLY
+        self._reversed = [0] * Position.MAX_PLY
+        self._hashes = [0] * Position.MAX_PLY
+
+    @classmethod
+    def from_board(cls, black_board: int, white_board: int, turn: int):
+        """Make a position from black and white boards."""
+        if turn == BitBoard.BLACK:
+            return cls(black_board, white_board, turn)
+        return cls(white_board, black_board, turn)
+
+    def __repr__(self):
+        return "Position(player=%#018x, opponent=%#018x, turn=%d)" % (
+            self.player, self.opponent, self.turn)
+
+    @property
+    def ply(self):
+        """Number of moves and passes which can be undone."""
+        return self._ply
+
+    def return_board(self):
+        """Returns black and white boards."""
+        if self.turn == BitBoard.BLACK:
+            return self.player, self.opponent
+        return self.opponent, self.player
+
+    def count_disks(self):
+        """Returns disk numbers of the player on turn and the opponent."""
+        return (
+            BitBoard._bit_count(self.player),
+            BitBoard._bit_count(self.opponent),
+            )
+
+    def reversible_area(self):
+        """Returns legal moves of the player on turn."""
+        return BitBoard._reversible_area(self.player, self.opponent)
+
+    def expand(self):
+        """Returns legal moves, must_pass, game_over and disk difference.
+
+        See BitBoard.expand.
+        """
+        return BitBoard.expand(self.player, self.opponent)
+
+    def stable_disks(self):
+        """Returns stable disks of the player on turn and the opponent."""
+        return stable_disks(self.player, self.opponent)
+
+    def board_features(self):
+        """Returns frontier, potential mobility, corner and X-square
+        features of the player on turn and the opponent.
+
+        See BitBoard.board_features.
+        """
+        return BitBoard.board_features(self.player, self.opponent)
+
+    def play(self, put_loc: int):
+        """Put a disk of the player on turn and pass the turn.
+
+        Parameters
+        ----------
+        put_loc : int
+            64-bit intager which represents the location of disk.
+
+        Returns
+        -------
+        reverse_bit : int
+            Reversed disks.
+        """
+        reverse_bit = BitBoard._reverse_by_table(
+            self.player, self.opponent, put_loc)
+        self._moves[self._ply] = put_loc
+        self._reversed[self._ply] = reverse_bit
+        self._hashes[self._ply] = self.hash
+        self._ply += 1
+        self.hash = update_hash(
+            self.hash, self.turn, put_loc, reverse_bit) ^ TURN_KEY
+        self.player, self.opponent = \
+            self.opponent ^ reverse_bit, self.player ^ (put_loc | reverse_bit)
+        self.turn ^= 1
+        return reverse_bit
+
+    def pass_(self):
+        """Pass the turn without putting a disk."""
+        self._moves[self._ply] = 0
+        self._reversed[self._ply] = 0
+        self._hashes[self._ply] = self.hash
+        self._ply += 1
+        self.hash ^= TURN_KEY
+        self.player, self.opponent = self.opponent, self.player
+        self.turn ^= 1
+
+    def undo(self):
+        """Take back the last move or pass."""
+        self._ply -= 1
+        reverse_bit = self._reversed[self._ply]
+        self.hash = self._hashes[self._ply]
+        self.player, self.opponent = \
+            self.opponent ^ (self._moves[self._ply] | reverse_bit), \
+            self.player ^ reverse_bit
+        self.turn ^= 1
+
+    def copy(self):
+        """Returns a position of the same boards without history."""
+        return Position(self.player, self.opponent, self.turn)
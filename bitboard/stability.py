@@ -0,0 +1,162 @@
+"""
+Stable disks, which can never be reversed until the end of the game.
+
+Disks on edges are looked up from tables of every pattern of an edge. A
+disk inside the board is stable if each of its four lines is full, or has a
+stable disk of the same color next to it. Stable disks are propagated from
+edges until nothing changes.
+"""
+
+from .flip_table import (
+    COLUMN_DEPOSIT, COLUMN_MAGIC, FLIPPED, MASK64, OUTFLANK,
+)
+
+
+def _find_edge_stable(player: int, opponent: int, memo: dict):
+    """Returns disks of player on an edge which are kept in every future.
+
+    Both players may put a disk on any empty square of the edge, with or
+    without reversing, so the result does not depend on the rest of the
+    board.
+    """
+    key = (player << 8) | opponent
+    if key in memo:
+        return memo[key]
+    stable = player
+    empty = ~(player | opponent) & 0xff
+    while empty and stable:
+        put_loc = empty & -empty
+        empty ^= put_loc
+        square = put_loc.bit_length() - 1
+        # Player puts a disk.
+        reverse_bit = FLIPPED[square][OUTFLANK[square][opponent] & player]
+        stable &= _find_edge_stable(
+            player | put_loc | reverse_bit, opponent & ~reverse_bit, memo)
+        # Opponent puts a disk.
+        reverse_bit = FLIPPED[square][OUTFLANK[square][player] & opponent]
+        stable &= _find_edge_stable(
+            player & ~reverse_bit, opponent | put_loc | reverse_bit, memo)
+    memo[key] = stable
+    return stable
+
+
+def _build_edge_stable():
+    """EDGE_STABLE[player << 8 | opponent] is stable disks of player."""
+    edge_stable = [0] * 65536
+    memo = {}
+    for player in range(256):
+        for opponent in range(256):
+            if not player & opponent:
+                edge_stable[(player << 8) | opponent] = _find_edge_stable(
+                    player, opponent, memo)
+    return edge_stable
+
+
+def _build_stops(row_step: int, column_step: int):
+    """Squares from which 1, 2 and 4 steps go out of the board."""
+    stops = []
+    for steps in (1, 2, 4):
+        stop = 0
+        for square in range(64):
+            row = (square >> 3) + row_step * steps
+            column = (square & 7) + column_step * steps
+            if not (0 <= row < 8 and 0 <= column < 8):
+                stop |= 1 << square
+        stops.append(stop)
+    return stops
+
+
+EDGE_STABLE = _build_edge_stable()
+# Stops of the diagonal (shift 9) and the anti-diagonal (shift 7).
+_STOP_9_UP = _build_stops(1, 1)
+_STOP_9_DOWN = _build_stops(-1, -1)
+_STOP_7_UP = _build_stops(1, -1)
+_STOP_7_DOWN = _build_stops(-1, 1)
+
+
+def _full_diagonal(occupied: int, shift: int, stop_up: list, stop_down: list):
+    """Returns squares whose diagonal line of the shift is full."""
+    up = occupied & ((occupied >> shift) | stop_up[0])
+    up &= (up >> (shift * 2)) | stop_up[1]
+    up &= (up >> (shift * 4)) | stop_up[2]
+    down = occupied & ((occupied << shift) | stop_down[0])
+    down &= (down << (shift * 2)) | stop_down[1]
+    down &= (down << (shift * 4)) | stop_down[2]
+    return up & down
+
+
+def full_lines(occupied: int):
+    """Returns squares on full lines of four directions.
+
+    Parameters
+    ----------
+    occupied : int
+        64-bit intager of all disks.
+
+    Returns
+    -------
+    full_h, full_v, full_d9, full_d7 : int
+        Full rows, columns, diagonals and anti-diagonals.
+    """
+    full_h = occupied & (occupied >> 4)
+    full_h &= full_h >> 2
+    full_h &= full_h >> 1
+    full_h = (full_h & 0x0101010101010101) * 0xff
+
+    full_v = occupied & (occupied >> 32)
+    full_v &= full_v >> 16
+    full_v &= full_v >> 8
+    full_v = (full_v & 0xff) * 0x0101010101010101
+
+    full_d9 = _full_diagonal(occupied, 9, _STOP_9_UP, _STOP_9_DOWN)
+    full_d7 = _full_diagonal(occupied, 7, _STOP_7_UP, _STOP_7_DOWN)
+    return full_h, full_v, full_d9, full_d7
+
+
+def _edge_stable(player: int, opponent: int):
+    """Returns stable disks of player on four edges."""
+    stable = EDGE_STABLE[((player & 0xff) << 8) | (opponent & 0xff)]
+    stable |= EDGE_STABLE[((player >> 56) << 8) | (opponent >> 56)] << 56
+    line_ply = ((player & 0x0101010101010101) * COLUMN_MAGIC & MASK64) >> 56
+    line_opp = ((opponent & 0x0101010101010101) * COLUMN_MAGIC & MASK64) >> 56
+    stable |= COLUMN_DEPOSIT[EDGE_STABLE[(line_ply << 8) | line_opp]]
+    line_ply = (
+        ((player >> 7) & 0x0101010101010101) * COLUMN_MAGIC & MASK64) >> 56
+    line_opp = (
+        ((opponent >> 7) & 0x0101010101010101) * COLUMN_MAGIC & MASK64) >> 56
+    stable |= COLUMN_DEPOSIT[EDGE_STABLE[(line_ply << 8) | line_opp]] << 7
+    return stable
+
+
+def _propagate(disks: int, stable: int, full_h, full_v, full_d9, full_d7):
+    """Add inner disks next to stable disks in all four lines."""
+    disks &= 0x007e7e7e7e7e7e00
+    stable |= disks & full_h & full_v & full_d9 & full_d7
+    while True:
+        previous = stable
+        stable |= disks \
+            & ((stable >> 1) | (stable << 1) | full_h) \
+            & ((stable >> 8) | (stable << 8) | full_v) \
+            & ((stable >> 9) | (stable << 9) | full_d9) \
+            & ((stable >> 7) | (stable << 7) | full_d7)
+        if stable == previous:
+            return stable
+
+
+def stable_disks(player: int, opponent: int):
+    """Returns stable disks of both sides.
+
+    Parameters
+    ----------
+    player, opponent : int
+        64-bit intager of the player on turn and the opponent.
+
+    Returns
+    -------
+    player_stable, opponent_stable : int
+    """
+    full = full_lines(player | opponent)
+    return (
+        _propagate(player, _edge_stable(player, opponent), *full),
+        _propagate(opponent, _edge_stable(opponent, player), *full),
+    )
@@ -0,0 +1,150 @@
+"""
+Symmetry of boards.
+
+A board has 8 symmetric boards made by reflections and rotations. Bit
+0-7 is the first row and bit 0, 8, ..., 56 is the first column. Transforms
+are numbered as TRANSFORMS, and square tables map a square to the same
+square after a transform and back.
+"""
+
+from .flip_table import SQUARE_INDEX
+
+
+def flip_vertical(board: int):
+    """Reverse the order of rows."""
+    return int.from_bytes(board.to_bytes(8, "little"), "big")
+
+
+def flip_horizontal(board: int):
+    """Reverse the order of columns."""
+    board = ((board >> 1) & 0x5555555555555555) \
+        | ((board & 0x5555555555555555) << 1)
+    board = ((board >> 2) & 0x3333333333333333) \
+        | ((board & 0x3333333333333333) << 2)
+    board = ((board >> 4) & 0x0f0f0f0f0f0f0f0f) \
+        | ((board & 0x0f0f0f0f0f0f0f0f) << 4)
+    return board
+
+
+def flip_diagonal(board: int):
+    """Swap rows and columns, a reflection about the diagonal of bit 0."""
+    temp = 0x0f0f0f0f00000000 & (board ^ (board << 28))
+    board ^= temp ^ (temp >> 28)
+    temp = 0x3333000033330000 & (board ^ (board << 14))
+    board ^= temp ^ (temp >> 14)
+    temp = 0x5500550055005500 & (board ^ (board << 7))
+    board ^= temp ^ (temp >> 7)
+    return board
+
+
+def flip_anti_diagonal(board: int):
+    """A reflection about the diagonal of bit 7."""
+    return flip_vertical(flip_horizontal(flip_diagonal(board)))
+
+
+def rotate_90(board: int):
+    return flip_vertical(flip_diagonal(board))
+
+
+def rotate_180(board: int):
+    return flip_vertical(flip_horizontal(board))
+
+
+def rotate_270(board: int):
+    return flip_diagonal(flip_vertical(board))
+
+
+def identity(board: int):
+    return board
+
+
+TRANSFORMS = [
+    identity, flip_vertical, flip_horizontal, rotate_180,
+    flip_diagonal, flip_anti_diagonal, rotate_90, rotate_270,
+]
+
+
+def _build_square_tables():
+    """SQUARE_MAP[t][square] and INVERSE_MAP[t][square] of every transform."""
+    square_map = [[0] * 64 for _ in TRANSFORMS]
+    inverse_map = [[0] * 64 for _ in TRANSFORMS]
+    for number, transform in enumerate(TRANSFORMS):
+        for square in range(64):
+            mapped = SQUARE_INDEX[transform(1 << square)]
+            square_map[number][square] = mapped
+            inverse_map[number][mapped] = square
+    return square_map, inverse_map
+
+
+SQUARE_MAP, INVERSE_MAP = _build_square_tables()
+
+
+def transform_square(square: int, transform: int):
+    """Returns the square after the transform of the given number."""
+    return SQUARE_MAP[transform][square]
+
+
+def inverse_square(square: int, transform: int):
+    """Returns the square before the transform of the given number."""
+    return INVERSE_MAP[transform][square]
+
+
+def canonical(black_board: int, white_board: int):
+    """Returns the smallest of 8 symmetric boards.
+
+    Symmetric boards give the same result, so it can be used as a key of
+    hash tables and opening books. A move found on the canonical board is
+    mapped back by inverse_square.
+
+    Returns
+    -------
+    black_board, white_board : int
+        Canonical boards.
+    transform : int
+        Number of the transform which made the canonical boards.
+    """
+    best = (black_board, white_board, 0)
+    for number in range(1, 8):
+        transform = TRANSFORMS[number]
+        black = transform(black_board)
+        if black > best[0]:
+            continue
+        white = transform(white_board)
+        if (black, white) < best[:2]:
+            best = (black, white, number)
+    return best
+
+
+def symmetries(player: int, opponent: int):
+    """Returns numbers of transforms which keep the boards unchanged."""
+    return [
+        number for number in range(1, 8)
+        if TRANSFORMS[number](player) == player
+        and TRANSFORMS[number](opponent) == opponent
+    ]
+
+
+def unique_moves(player: int, opponent: int, reversible: int):
+    """Remove moves which are symmetric to other moves.
+
+    If the boards are symmetric, moves mapped to each other by the symmetry
+    lead to symmetric boards, so only the lowest of them is kept.
+
+    Parameters
+    ----------
+    player, opponent : int
+        64-bit intager of the player on turn and the opponent.
+    reversible : int
+        Legal moves of the player on turn.
+    """
+    for number in symmetries(player, opponent):
+        square_map = SQUARE_MAP[number]
+        moves = reversible
+        while moves:
+            put_loc = moves & -moves
+            moves ^= put_loc
+            square = SQUARE_INDEX[put_loc]
+            mapped = square_map[square]
+            if mapped > square:
+                reversible &= ~(1 << mapped)
+    return reversible
@@ -0,0 +1,97 @@
+"""
+Zobrist hashing of boards.
+
+A hash is the XOR of a random 64-bit key for every disk, plus TURN_KEY if
+white is on turn. Putting a disk only changes the key of the put square and
+of the reversed disks, so the hash is updated incrementally. The keys are
+generated from a fixed seed, so a hash is the same in every process and
+can be stored in files.
+"""
+
+from .flip_table import SQUARE_INDEX
+
+_SEED = 0x5eed0fba
+
+
+def _build_keys():
+    """Returns random keys of squares for black and white, and turn key."""
+    # A small xorshift generator keeps the keys independent of the version
+    # of the random module.
+    state = _SEED
+
+    def next_key():
+        nonlocal state
+        state ^= (state << 13) & 0xffffffffffffffff
+        state ^= state >> 7
+        state ^= (state << 17) & 0xffffffffffffffff
+        return state
+
+    square_key = [[next_key() for _ in range(64)] for _ in range(2)]
+    return square_key, next_key()
+
+
+def _build_byte_keys(square_key):
+    """BYTE_KEY[color][k][byte] is the XOR of keys of squares in the byte."""
+    byte_key = [[[0] * 256 for _ in range(8)] for _ in range(2)]
+    for color in range(2):
+        for k in range(8):
+            for byte in range(1, 256):
+                low = byte & -byte
+                byte_key[color][k][byte] = (
+                    byte_key[color][k][byte ^ low]
+                    ^ square_key[color][k * 8 + low.bit_length() - 1])
+    return byte_key
+
+
+SQUARE_KEY, TURN_KEY = _build_keys()
+BYTE_KEY = _build_byte_keys(SQUARE_KEY)
+# A reversed disk changes from one color to the other.
+REVERSE_KEY = [
+    [BYTE_KEY[0][k][byte] ^ BYTE_KEY[1][k][byte] for byte in range(256)]
+    for k in range(8)
+]
+
+
+def hash_board(black_board: int, white_board: int, turn: int = 0):
+    """Returns the hash of boards.
+
+    Parameters
+    ----------
+    black_board, white_board : int
+        64-bit intager.
+    turn : int
+        The color on turn, 0 for black and 1 for white.
+    """
+    black_key, white_key = BYTE_KEY
+    hash_ = TURN_KEY if turn else 0
+    for k in range(8):
+        hash_ ^= black_key[k][(black_board >> (k * 8)) & 0xff]
+        hash_ ^= white_key[k][(white_board >> (k * 8)) & 0xff]
+    return hash_
+
+
+def update_hash(hash_: int, turn: int, put_loc: int, reverse_bit: int):
+    """Returns the hash after a disk was put.
+
+    The turn key is not changed, so XOR TURN_KEY to pass the turn.
+
+    Parameters
+    ----------
+    hash_ : int
+        Hash before the disk was put.
+    turn : int
+        The color of the put disk, 0 for black and 1 for white.
+    put_loc : int
+        64-bit intager which represents the location of disk.
+    reverse_bit : int
+        Reversed disks.
+    """
+    hash_ ^= SQUARE_KEY[turn][SQUARE_INDEX[put_loc]]
+    k = 0
+    while reverse_bit:
+        byte = reverse_bit & 0xff
+        if byte:
+            hash_ ^= REVERSE_KEY[k][byte]
+        reverse_bit >>= 8
+        k += 1
+    return hash_
@@ -42,6 +42,12 @@ class MenuBar(wx.MenuBar):
             wx.ID_ANY, "minimize").GetId()
         self._id_minmax = menu_cpu.AppendRadioItem(
             wx.ID_ANY, "min-max").GetId()
+        self._id_negamax = menu_cpu.AppendRadioItem(
+            wx.ID_ANY, "negamax").GetId()
+        self._id_negamax_parallel = menu_cpu.AppendRadioItem(
+            wx.ID_ANY, "negamax-parallel").GetId()
+        self._id_negamax_pattern = menu_cpu.AppendRadioItem(
+            wx.ID_ANY, "negamax-pattern").GetId()
 
         self.Bind(wx.EVT_MENU, self.event_manager)
 
@@ -108,6 +114,14 @@ class MenuBar(wx.MenuBar):
             return self._frame.othello.change_strategy("minimize", False)
         if event.GetId() == self._id_minmax:
             return self._frame.othello.change_strategy("min-max", False)
+        if event.GetId() == self._id_negamax:
+            return self._frame.othello.change_strategy("negamax", False)
+        if event.GetId() == self._id_negamax_parallel:
+            return self._frame.othello.change_strategy(
+                "negamax-parallel", False)
+        if event.GetId() == self._id_negamax_pattern:
+            return self._frame.othello.change_strategy(
+                "negamax-pattern", False)
 
     def event_manager(self, event):
         if event.GetId() == wx.ID_SAVE:
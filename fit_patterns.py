@@ -0,0 +1,232 @@
+"""Fit weights of patterns to the results of self-play games.
+
+    python fit_patterns.py [--games 1000] [--samples FILE] [--epochs 200]
+
+Games are played between the searching strategies of matching.py to fixed
+depths, after a few random moves so that they differ, and the last empty
+squares are solved exactly. Every position is labelled with the final disk
+difference of its game from the side of the player on turn. Positions are
+added with their 8 symmetric boards, so that fitted weights are symmetric.
+Weights of every phase are fitted to the labels by least squares and
+written to strategy/pattern_weights.gz, from which evaluators generate
+strategy/pattern_weights.bin.
+
+Errors of held-out positions are printed for the fitted weights and for
+the default weights before, scaled to the labels. Positions of played
+games are kept in the samples file if it is given, and games are played
+again only if it does not exist.
+"""
+
+import argparse
+from array import array
+from itertools import cycle
+import os
+import random
+import time
+
+import numpy as np
+
+from bitboard import BitBoard, OthelloGame, Position
+from bitboard.symmetry import TRANSFORMS
+from strategy import Strategy
+from strategy.endgame import final_score
+from strategy.pattern import (
+    FITTED_FILE, PATTERNS, SCALE, default_weights, instances, phase,
+    write_fitted)
+
+STRAT = [
+    ("min-max", "negamax"),
+    ("negamax", "negamax"),
+    ("negamax", "min-max"),
+]
+
+
+def play_game(strategy1, strategy2, random_moves):
+    """Returns (player, opponent, label) of positions before every move."""
+    game = OthelloGame("black")
+    game.load_strategy(Strategy)
+    game.change_strategy("random", is_player=True)
+    game.change_strategy("random", is_player=False)
+    game.auto_mode(True)
+    positions = []
+    while True:
+        position = game.return_position()
+        disks = BitBoard._bit_count(position.player | position.opponent)
+        if disks == 4 + random_moves:
+            game.change_strategy(strategy1, is_player=True)
+            game.change_strategy(strategy2, is_player=False)
+        if disks >= 4 + random_moves and position.reversible_area():
+            positions.append(
+                (position.player, position.opponent, position.turn))
+        fin, _ = game.process_game()
+        if fin:
+            break
+    black_board, white_board = game.board.return_board()
+    samples = []
+    for player, opponent, turn in positions:
+        final = Position.from_board(black_board, white_board, turn)
+        samples.append(
+            (player, opponent, final_score(final.player, final.opponent)))
+    return samples
+
+
+def play_games(games: int, random_moves: int):
+    """Returns a list of the samples of every game."""
+    start = time.perf_counter()
+    played = []
+    pairs = cycle(STRAT)
+    for count in range(1, games + 1):
+        played.append(play_game(*next(pairs), random_moves))
+        if not count % 10:
+            print("%d games played in %.1f s." % (
+                count, time.perf_counter() - start))
+    return played
+
+
+def save_samples(filename: str, games: list):
+    """Write samples of games, which load_samples reads."""
+    samples = [sample for game in games for sample in game]
+    np.savez(
+        filename,
+        player=np.array([sample[0] for sample in samples], dtype=np.uint64),
+        opponent=np.array([sample[1] for sample in samples], dtype=np.uint64),
+        label=np.array([sample[2] for sample in samples], dtype=np.int8),
+        length=np.array([len(game) for game in games], dtype=np.int32))
+
+
+def load_samples(filename: str):
+    """Returns a list of the samples of every game of the file."""
+    with np.load(filename) as data:
+        samples = list(zip(
+            data["player"].tolist(), data["opponent"].tolist(),
+            data["label"].tolist()))
+        lengths = data["length"].tolist()
+    games = []
+    for length in lengths:
+        games.append(samples[:length])
+        samples = samples[length:]
+    return games
+
+
+def symmetric(samples: list):
+    """Returns the samples with the 8 symmetric boards of each."""
+    return [
+        (transform(player), transform(opponent), label)
+        for player, opponent, label in samples
+        for transform in TRANSFORMS
+    ]
+
+
+def features(samples: list):
+    """Returns indices of the weights of the samples and their labels.
+
+    Indices have a row for every sample and a column for every instance of
+    every pattern, and point to the weights of the phase of the board, in
+    the order of strategy.pattern.
+    """
+    player = np.array([sample[0] for sample in samples], dtype=np.uint64)
+    opponent = np.array([sample[1] for sample in samples], dtype=np.uint64)
+    labels = np.array([sample[2] for sample in samples], dtype=np.float64)
+    # States of squares are 0 if empty, 1 for the player and 2 for the
+    # opponent, as the digits of indices.
+    states = np.zeros((len(samples), 64), dtype=np.uint8)
+    for square in range(64):
+        bit = np.uint64(1 << square)
+        states[:, square] = ((player & bit) != 0) \
+            + 2 * ((opponent & bit) != 0)
+    size = sum(3 ** len(squares) for _, squares in PATTERNS)
+    bases = np.array(
+        [phase(disks) * size for disks in range(65)],
+        dtype=np.intp)[np.count_nonzero(states, axis=1)]
+
+    columns = []
+    offset = 0
+    for pattern, (_, squares) in zip(instances(), PATTERNS):
+        for instance in pattern:
+            index = bases + offset
+            for digit, square in enumerate(instance):
+                index += 3 ** digit * states[:, square].astype(np.intp)
+            columns.append(index)
+        offset += 3 ** len(squares)
+    return np.stack(columns, axis=1), labels
+
+
+def fit(indices, labels, size: int, epochs: int, regularization: float):
+    """Returns weights which predict the labels by their sums.
+
+    Every step moves a weight by the mean error of the samples using it,
+    divided by the number of instances. A weight of few samples moves less,
+    as if regularization more samples had no error.
+    """
+    flat = indices.ravel()
+    counts = np.bincount(flat, minlength=size) + regularization
+    rate = 1.0 / indices.shape[1]
+    weights = np.zeros(size)
+    for _ in range(epochs):
+        errors = labels - weights[indices].sum(axis=1)
+        weights += rate * np.bincount(
+            flat, weights=np.repeat(errors, indices.shape[1]),
+            minlength=size) / counts
+    return weights
+
+
+def error(indices, labels, weights):
+    """Returns the mean absolute error of the weights."""
+    return np.abs(labels - weights[indices].sum(axis=1)).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--random-moves", type=int, default=10)
+    parser.add_argument("--samples", default=None)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--regularization", type=float, default=4.0)
+    parser.add_argument("--test", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=FITTED_FILE)
+    args = parser.parse_args()
+
+    # Games are played to fixed depths, and the last squares are solved.
+    Strategy.MOVE_TIME = None
+    Strategy.WLD_EMPTIES = 0
+    random.seed(args.seed)
+    start = time.perf_counter()
+    if args.samples is not None and os.path.exists(args.samples):
+        games = load_samples(args.samples)
+    else:
+        games = play_games(args.games, args.random_moves)
+        if args.samples is not None:
+            save_samples(args.samples, games)
+    # Games are split, since positions of a game are alike.
+    random.shuffle(games)
+    tests = max(int(len(games) * args.test), 1)
+    train = symmetric([sample for game in games[tests:] for sample in game])
+    test = [sample for game in games[:tests] for sample in game]
+    print("%d positions to fit and %d to test." % (len(train), len(test)))
+
+    before = np.array(default_weights(), dtype=np.float64) / SCALE
+    train_indices, train_labels = features(train)
+    test_indices, test_labels = features(test)
+
+    predictions = before[train_indices].sum(axis=1)
+    scale = predictions @ train_labels / max(predictions @ predictions, 1.0)
+    weights = fit(
+        train_indices, train_labels, len(before), args.epochs,
+        args.regularization)
+    print("Mean absolute error of held-out positions: %.2f disks by the "
+          "weights before (times %.3f), %.2f by fitted weights." % (
+              error(test_indices, test_labels, scale * before),
+              scale, error(test_indices, test_labels, weights)))
+
+    limit = np.iinfo(np.int16).max
+    write_fitted(
+        array("h", np.clip(np.round(SCALE * weights), -limit, limit)
+              .astype(np.int16).tolist()),
+        args.output)
+    print("Weights were written to %s in %.1f s." % (
+        args.output, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
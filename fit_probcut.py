@@ -0,0 +1,127 @@
+"""Fit parameters of Multi-ProbCut from positions of self-play games.
+
+    python fit_probcut.py [--games 40] [--positions 100] [--depth 8]
+
+Games are played between the strategies of matching.py as set_match plays
+them, and the same number of positions of every stage is sampled from the
+games, since games have fewer positions of the first and the last stages.
+Positions are searched to every depth by full-width negamax. Values of deep
+searches are regressed on values of shallow searches for every depth and
+stage, and the parameters are written to strategy/probcut.json.
+"""
+
+import argparse
+from itertools import combinations, cycle
+import random
+import time
+
+from bitboard import OthelloGame, Position
+from strategy import Strategy
+from strategy.negamax import Negamax
+from strategy.probcut import (
+    MIN_DEPTH, PARAMETER_FILE, STAGES, ProbCut, fit, shallow_depth, stage)
+from strategy.transposition import TranspositionTable
+
+STRAT = [
+    "random",
+    "maximize",
+    "minimize",
+    "min-max",
+    "negamax",
+]
+
+
+def play_game(strategy1, strategy2):
+    """Returns (player, opponent, turn) of positions before every move."""
+    game = OthelloGame("black")
+    game.load_strategy(Strategy)
+    game.change_strategy(strategy1, is_player=True)
+    game.change_strategy(strategy2, is_player=False)
+    game.auto_mode(True)
+    positions = []
+    while True:
+        position = game.return_position()
+        if position.reversible_area():
+            positions.append(
+                (position.player, position.opponent, position.turn))
+        fin, _ = game.process_game()
+        if fin:
+            break
+    return positions
+
+
+def search_values(player, opponent, turn, depth):
+    """Returns values of full-width searches of depth 1 to depth."""
+    engine = Negamax(TranspositionTable(4))
+    position = Position(player, opponent, turn)
+    return [engine.search(position, d)[0] for d in range(1, depth + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=40)
+    # Positions of every stage.
+    parser.add_argument("--positions", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--move-time", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=PARAMETER_FILE)
+    args = parser.parse_args()
+
+    # Games are played fast, and to the end without the endgame solver.
+    Strategy.MOVE_TIME = args.move_time
+    Strategy.ENDGAME_EMPTIES = Strategy.WLD_EMPTIES = 0
+    random.seed(args.seed)
+    start = time.perf_counter()
+    positions = set()
+    pairs = cycle(combinations(STRAT, 2))
+    for _ in range(args.games):
+        positions.update(play_game(*next(pairs)))
+    positions = sorted(positions)
+    random.shuffle(positions)
+    stages = [[] for _ in range(STAGES)]
+    for player, opponent, turn in positions:
+        stages[stage(player, opponent)].append((player, opponent, turn))
+    positions = [
+        position for positions_ in stages
+        for position in positions_[:args.positions]]
+    print("%d positions from %d games in %.1f s." % (
+        len(positions), args.games, time.perf_counter() - start))
+
+    # samples[stage][(depth, shallow)] is a list of (shallow, deep) values.
+    samples = [{} for _ in range(STAGES)]
+    for count, (player, opponent, turn) in enumerate(positions, 1):
+        values = search_values(player, opponent, turn, args.depth)
+        for depth in range(MIN_DEPTH, args.depth + 1):
+            shallow = shallow_depth(depth)
+            if max(abs(values[depth-1]), abs(values[shallow-1])) \
+                    >= Negamax.WIN_VALUE:
+                continue
+            samples[stage(player, opponent)].setdefault(
+                (depth, shallow), []).append(
+                    (values[shallow-1], values[depth-1]))
+        if not count % 10:
+            print("%d positions searched in %.1f s." % (
+                count, time.perf_counter() - start))
+
+    parameters = []
+    for stage_, pairs_ in enumerate(samples):
+        for (depth, shallow), pair_samples in sorted(pairs_.items()):
+            if len(pair_samples) < 10:
+                continue
+            slope, intercept, sigma = fit(pair_samples)
+            parameters.append({
+                "stage": stage_, "depth": depth, "shallow": shallow,
+                "slope": round(slope, 4), "intercept": round(intercept, 2),
+                "sigma": round(sigma, 2), "samples": len(pair_samples),
+            })
+            print(
+                "stage %d depth %d from %d: slope %.3f intercept %.1f "
+                "sigma %.1f (%d samples)" % (
+                    stage_, depth, shallow, slope, intercept, sigma,
+                    len(pair_samples)))
+    ProbCut(parameters=parameters).save(args.output)
+
+
+if __name__ == "__main__":
+    main()
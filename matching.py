@@ -11,12 +11,18 @@ from bitboard import OthelloGame
 from matching import EloRating
 from strategy import Strategy
 
+# Strategies search to fixed depths, so that ratings do not depend on the
+# speed and the load of the machine.
+Strategy.MOVE_TIME = None
+
 repeat = 10
 STRAT = [
     "random",
     "maximize",
     "minimize",
     "min-max",
+    "negamax",
+    "negamax-pattern",
 ]
 
 # [win, lose, draw]
@@ -0,0 +1,169 @@
+"""Count leaf nodes of the move generator.
+
+    python perft.py [--depth 6] [--position all] [--hash] [--workers 1]
+
+A pass counts as a ply, and a finished game counts as a leaf even if the
+depth is not reached. Counts are checked against reference values.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+from bitboard import BitBoard
+
+# (name, black_board, white_board, turn, {depth: leaf nodes})
+POSITIONS = [
+    # The number of Reversi games after n plies (OEIS A124004).
+    (
+        "initial", BitBoard.INIT_BLACK, BitBoard.INIT_WHITE, BitBoard.BLACK,
+        {
+            1: 4, 2: 12, 3: 56, 4: 244, 5: 1396, 6: 8200, 7: 55092,
+            8: 390216, 9: 3005288, 10: 24571284, 11: 212258800,
+            12: 1939886636,
+        },
+    ),
+    # Positions of random games after n plies. Counts were given by the
+    # loop flip mode, and agree with the table flip mode with hashing.
+    (
+        "ply20", 0x00200a0e0c080808, 0x111b141010100402, BitBoard.BLACK,
+        {1: 11, 2: 133, 3: 1464, 4: 16834, 5: 186331, 6: 2131394},
+    ),
+    (
+        "ply36", 0x791f3640c8004080, 0x0000083f377f0400, BitBoard.BLACK,
+        {1: 7, 2: 84, 3: 765, 4: 9251, 5: 81987, 6: 959801},
+    ),
+    (
+        "ply50", 0xe17e68002c5dfa3f, 0x000197ff52a20400, BitBoard.BLACK,
+        {
+            1: 3, 2: 24, 3: 83, 4: 491, 5: 1714, 6: 7211, 7: 19806,
+            8: 49731, 9: 81364, 10: 87075,
+        },
+    ),
+    # Games end and passes occur within 10 plies.
+    (
+        "ply52", 0x040c0084d4acc281, 0xf8733e7b2b533d5c, BitBoard.BLACK,
+        {
+            1: 7, 2: 18, 3: 86, 4: 206, 5: 680, 6: 1214, 7: 2311,
+            8: 2374, 9: 2500, 10: 2508,
+        },
+    ),
+]
+
+
+def perft(board, turn, black_board, white_board, depth, passed=False,
+          table=None):
+    """Returns the number of leaf nodes after depth plies.
+
+    Parameters
+    ----------
+    board : BitBoard
+    turn : int
+        BLACK or WHITE, the color on turn.
+    black_board, white_board : int
+        64-bit intager.
+    depth : int
+        Number of plies, which must be 1 or more.
+    passed : bool
+        True if the last ply was a pass.
+    table : dict (optional)
+        If given, counts of known positions are looked up from it.
+    """
+    if table is not None:
+        key = (black_board, white_board, turn, passed, depth)
+        if key in table:
+            return table[key]
+
+    reversible = board.reversible_area(turn, black_board, white_board)
+    if not reversible:
+        if passed or depth == 1:
+            # Game is over, or the pass is the last ply.
+            return 1
+        nodes = perft(
+            board, turn ^ 1, black_board, white_board, depth - 1, True, table)
+    elif depth == 1:
+        return board._bit_count(reversible)
+    else:
+        nodes = 0
+        while reversible:
+            put_loc = reversible & -reversible
+            reversible ^= put_loc
+            next_black, next_white = board.simulate_play(
+                turn, put_loc, black_board, white_board)
+            nodes += perft(
+                board, turn ^ 1, next_black, next_white, depth - 1,
+                False, table)
+
+    if table is not None:
+        table[key] = nodes
+    return nodes
+
+
+def _perft_worker(parameter):
+    turn, black_board, white_board, depth, use_hash, flip_mode = parameter
+    table = {} if use_hash else None
+    return perft(
+        BitBoard(flip_mode), turn, black_board, white_board, depth,
+        table=table)
+
+
+def run_perft(
+        turn, black_board, white_board, depth,
+        use_hash=False, workers=1, flip_mode="table",
+        ):
+    """Returns leaf nodes, splitting root moves over workers if required."""
+    board = BitBoard(flip_mode)
+    reversible = board.reversible_area(turn, black_board, white_board)
+    if workers <= 1 or depth < 2 or not reversible:
+        table = {} if use_hash else None
+        return perft(board, turn, black_board, white_board, depth, table=table)
+
+    parameters = []
+    for _, put_loc in board.iter_moves(reversible):
+        next_black, next_white = board.simulate_play(
+            turn, put_loc, black_board, white_board)
+        parameters.append(
+            (turn ^ 1, next_black, next_white, depth - 1, use_hash, flip_mode))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_perft_worker, parameters))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument(
+        "--position", default="all",
+        help="name of a position, or all")
+    parser.add_argument(
+        "--hash", action="store_true",
+        help="look up counts of transposed positions")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--flip-mode", default="table", choices=["table", "shift", "loop"])
+    args = parser.parse_args()
+
+    failed = False
+    for name, black_board, white_board, turn, expected in POSITIONS:
+        if args.position not in ("all", name):
+            continue
+        for depth in range(1, args.depth + 1):
+            start = time.perf_counter()
+            nodes = run_perft(
+                turn, black_board, white_board, depth,
+                args.hash, args.workers, args.flip_mode)
+            elapsed = time.perf_counter() - start
+            if depth not in expected:
+                status = "--"
+            elif nodes == expected[depth]:
+                status = "OK"
+            else:
+                status = "NG (expected %d)" % expected[depth]
+                failed = True
+            print("%-10s depth %2d %14d nodes %9.2f s %12.0f nodes/s  %s" % (
+                name, depth, nodes, elapsed, nodes / max(elapsed, 1e-9),
+                status))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
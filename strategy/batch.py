@@ -0,0 +1,167 @@
+"""
+Vectorized evaluation of the children of frontier nodes.
+
+A node of depth 1 evaluates all of its children, so the searches collect
+them into uint64 arrays and evaluate them by one call, instead of a call
+of the search and the evaluation for every child. The bounds of the node
+are applied to the values afterwards. Values are equal to the ones of
+Minmax.evaluate_value and PatternEvaluator.evaluate.
+"""
+import numpy as np
+
+from bitboard import BitBoard
+from bitboard.batch import bit_count
+
+from .pattern import SCALE, instances
+
+_U64 = np.uint64
+_FULL_BOARD = _U64(0xffffffffffffffff)
+_BORDER = _U64(0xff818181818181ff)
+
+
+def children(player: int, opponent: int, put_locs: list):
+    """Returns the boards after every move.
+
+    Parameters
+    ----------
+    player, opponent : int
+        64-bit intager of the player on turn and the opponent.
+    put_locs : list of int
+        A bit of every move.
+
+    Returns
+    -------
+    mover, other : numpy.ndarray of uint64
+        Boards of the player who moved and of the other player.
+    """
+    movers = []
+    others = []
+    for put_loc in put_locs:
+        reverse_bit = BitBoard._reverse_by_table(player, opponent, put_loc)
+        movers.append(player ^ (put_loc | reverse_bit))
+        others.append(opponent ^ reverse_bit)
+    return np.array(movers, dtype=_U64), np.array(others, dtype=_U64)
+
+
+def leaf_values(batch, player, opponent, win_value: int):
+    """Returns values of boards from the side of the player.
+
+    Parameters
+    ----------
+    batch : TableBatch or PatternBatch
+    player, opponent : numpy.ndarray of uint64
+    win_value : int
+        Value of a won game. Filled boards are valued by the winner.
+
+    Returns
+    -------
+    values : list of int
+    """
+    values = batch.evaluate(player, opponent)
+    filled = (player | opponent) == _FULL_BOARD
+    if filled.any():
+        values = np.where(
+            filled,
+            np.sign(bit_count(player) - bit_count(opponent)) * win_value,
+            values)
+    return values.tolist()
+
+
+def _bytes(*boards):
+    """Returns bytes of boards, a row for every board and a column for
+    every byte of the boards, the lowest first."""
+    boards = np.stack(boards, axis=1).astype("<u8", copy=False)
+    return boards.view(np.uint8).reshape(len(boards), -1)
+
+
+def _bit_rows(squares):
+    """Returns rows of squares in the order of np.unpackbits of boards."""
+    rows = [0] * 64
+    for square, value in enumerate(squares):
+        rows[square // 8 * 8 + 7 - square % 8] = value
+    return rows
+
+
+class TableBatch:
+    """Evaluate boards by the square tables of Minmax.
+
+    The bits of both players are multiplied by a matrix whose columns are
+    the tables, positive for the player and negative for the opponent, and
+    the squares of the border, which select the table.
+
+    Parameters
+    ----------
+    tables : list of list of int
+        Tables before and after a disk touches the border.
+    """
+
+    __all__ = ["evaluate"]
+
+    def __init__(self, tables: list):
+        border = [int(_BORDER) >> square & 1 for square in range(64)]
+        columns = [
+            _bit_rows(table) + _bit_rows([-weight for weight in table])
+            for table in tables
+        ]
+        columns.append(_bit_rows(border) * 2)
+        self._matrix = np.array(columns, dtype=np.float64).T
+
+    def evaluate(self, player, opponent):
+        """Evaluate every board from the side of the player.
+
+        Parameters
+        ----------
+        player, opponent : numpy.ndarray of uint64
+        """
+        bits = np.unpackbits(_bytes(player, opponent), axis=1)
+        first, middle, border = (bits @ self._matrix).T
+        return np.where(border > 0, middle, first).astype(np.int64)
+
+
+class PatternBatch:
+    """Evaluate boards by the weights of a PatternEvaluator.
+
+    The bits of both players are multiplied by a matrix whose column has
+    the powers of 3 of the squares of an instance, times 2 for the
+    opponent, which gives the indices of all instances by one product. Its
+    last column counts disks.
+
+    Parameters
+    ----------
+    evaluator : PatternEvaluator
+        The weights are read from its memory map without a copy.
+    """
+
+    __all__ = ["evaluate"]
+
+    def __init__(self, evaluator):
+        self._weights = np.frombuffer(evaluator._weights, dtype=np.int16)
+        columns = []
+        offsets = []
+        for pattern, offset in zip(instances(), evaluator._offsets[0]):
+            for instance in pattern:
+                powers = [0] * 64
+                for digit, square in enumerate(instance):
+                    powers[square] = 3 ** digit
+                column = _bit_rows(powers)
+                columns.append(column + [2 * power for power in column])
+                offsets.append(offset)
+        columns.append([1] * 128)
+        self._matrix = np.array(columns, dtype=np.float64).T
+        self._offsets = np.array(offsets, dtype=np.intp)
+        self._bases = np.array(
+            evaluator._bases, dtype=np.intp)[:, np.newaxis]
+
+    def evaluate(self, player, opponent):
+        """Evaluate every board from the side of the player.
+
+        Parameters
+        ----------
+        player, opponent : numpy.ndarray of uint64
+        """
+        bits = np.unpackbits(_bytes(player, opponent), axis=1)
+        indices = (bits @ self._matrix).astype(np.intp)
+        # The last column is the number of disks, which gives the phase.
+        indices = indices[:, :-1] + self._offsets \
+            + self._bases[indices[:, -1]]
+        return self._weights[indices].sum(axis=1, dtype=np.int64) // SCALE
@@ -0,0 +1,237 @@
+"""
+Search results cached in a file shared by processes.
+
+The file is a header followed by a fixed number of 16-byte entries, and is
+opened with mmap, so opening it takes the same time whatever its size and
+only the pages which are looked up are read. An entry is a pair of 64-bit
+words (key ^ data, data), where data packs the score, depth, bound and
+move. A reader checks the pair against the key, so an entry which is being
+written by another process is taken as a miss instead of a wrong result.
+
+Results are added in memory and written by merge. Only one process merges
+at a time, which is ensured by a lock file created exclusively. A lock
+file older than _STALE_LOCK seconds was left by a process which died while
+merging, and is removed. If two processes take such a lock at once, their
+entries may be mixed, which readers take as misses.
+
+A file of another _VERSION is not read, and is made again by the next
+merge, since its results may be wrong for the current search.
+"""
+
+import mmap
+import os
+import struct
+import time
+
+_MAGIC = b"OTHCACHE"
+_VERSION = 2
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<QQ")
+
+# Bound of a score. 0 is left for empty entries.
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# Seconds after which a lock file is stale. A merge takes milliseconds.
+_STALE_LOCK = 60.0
+
+_SCORE_BITS = 48
+_SCORE_MASK = (1 << _SCORE_BITS) - 1
+
+
+def _pack(depth: int, bound: int, score: int, move: int):
+    """Returns data of an entry. move is -1 if no move was selected."""
+    return (score & _SCORE_MASK) | (depth << 48) | (bound << 55) \
+        | ((move + 1) << 57)
+
+
+def _unpack(data: int):
+    """Returns depth, bound, score and move of data."""
+    score = data & _SCORE_MASK
+    if score >> (_SCORE_BITS - 1):
+        score -= 1 << _SCORE_BITS
+    return (data >> 48) & 0x7f, (data >> 55) & 0x3, score, (data >> 57) - 1
+
+
+class SearchCache:
+    """Search results keyed by Zobrist hash, kept in a file.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the cache file. It is made by the first merge.
+    entries : int
+        Number of entries of a new file, rounded up to a power of 2. An
+        existing file keeps its own size.
+
+    Notes
+    -----
+    Scores must fit in a signed 48-bit intager, and depths in 0 to 127.
+    """
+
+    __all__ = ["probe", "add", "merge", "close"]
+
+    def __init__(self, filename: str, entries: int = 1 << 20):
+        self._filename = filename
+        self._entries = 1 << max(entries - 1, 1).bit_length()
+        self._pending = {}
+        self._file = None
+        self._map = None
+        self._mask = 0
+        self._outdated = False
+        self._open()
+
+    def _open(self):
+        """Map the file for reading if it exists."""
+        try:
+            file_ = open(self._filename, "rb")
+        except FileNotFoundError:
+            return
+        try:
+            map_ = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # The file is empty.
+            file_.close()
+            return
+        magic, version, entries = _HEADER.unpack_from(map_, 0)
+        if magic == _MAGIC and version != _VERSION:
+            map_.close()
+            file_.close()
+            self._outdated = True
+            return
+        if magic != _MAGIC \
+                or len(map_) != _HEADER.size + entries * _ENTRY.size:
+            map_.close()
+            file_.close()
+            raise ValueError("%s is not a search cache." % self._filename)
+        self._file, self._map = file_, map_
+        self._entries = entries
+        self._mask = entries - 1
+
+    def close(self):
+        """Unmap the file. Results which are not merged are lost."""
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def probe(self, hash_: int):
+        """Returns the result of the hash.
+
+        Returns
+        -------
+        entry : tuple of int or None
+            (depth, bound, score, move) if found, where move is -1 if no
+            move was selected.
+        """
+        pending = self._pending.get(hash_)
+        if pending is not None:
+            return _unpack(pending)
+        if self._map is None:
+            return None
+        check, data = _ENTRY.unpack_from(
+            self._map, _HEADER.size + (hash_ & self._mask) * _ENTRY.size)
+        if not data or check ^ data != hash_:
+            return None
+        return _unpack(data)
+
+    def add(
+            self, hash_: int, depth: int, bound: int, score: int,
+            move: int = -1,
+            ):
+        """Keep a result until the next merge.
+
+        Parameters
+        ----------
+        hash_ : int
+            Zobrist hash of the position.
+        depth : int
+            Remaining depth of the search.
+        bound : int
+            EXACT, LOWER or UPPER.
+        score : int
+        move : int
+            Selected move from 0 to 63, or -1.
+        """
+        pending = self._pending.get(hash_)
+        if pending is None:
+            # The file can not keep more, if merges have been skipped.
+            if len(self._pending) >= self._entries:
+                return
+        elif (pending >> 48) & 0x7f > depth:
+            return
+        self._pending[hash_] = _pack(depth, bound, score, move)
+
+    def _create(self):
+        """Make an empty cache file.
+
+        It is written to a temporary file first, since other processes may
+        have mapped a file of another version.
+        """
+        temporary = "%s.%d" % (self._filename, os.getpid())
+        with open(temporary, "wb") as file_:
+            file_.write(_HEADER.pack(_MAGIC, _VERSION, self._entries))
+            file_.truncate(_HEADER.size + self._entries * _ENTRY.size)
+        os.replace(temporary, self._filename)
+        self._outdated = False
+
+    def _lock(self, lock: str):
+        """Returns the descriptor of the lock file, or None if another
+        process holds it."""
+        for _ in range(2):
+            try:
+                return os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                pass
+            try:
+                if time.time() - os.path.getmtime(lock) < _STALE_LOCK:
+                    return None
+                os.remove(lock)
+            except FileNotFoundError:
+                # The other process has just finished.
+                pass
+        return None
+
+    def merge(self):
+        """Write the kept results to the file.
+
+        A result replaces an entry of a shallower search or of another
+        position in the same place. If another process is merging, nothing
+        is written and the results are kept for the next merge, up to the
+        number of entries of the file.
+
+        Returns
+        -------
+        written : int
+            Number of entries written.
+        """
+        if not self._pending:
+            return 0
+        lock = self._filename + ".lock"
+        descriptor = self._lock(lock)
+        if descriptor is None:
+            return 0
+        try:
+            if self._map is None:
+                if self._outdated or not os.path.exists(self._filename):
+                    self._create()
+                self._open()
+            written = 0
+            with open(self._filename, "r+b") as file_:
+                map_ = mmap.mmap(file_.fileno(), 0)
+                for hash_, data in self._pending.items():
+                    offset = _HEADER.size + (hash_ & self._mask) * _ENTRY.size
+                    check, old = _ENTRY.unpack_from(map_, offset)
+                    if old and check ^ old == hash_ \
+                            and (old >> 48) & 0x7f > (data >> 48) & 0x7f:
+                        continue
+                    _ENTRY.pack_into(map_, offset, hash_ ^ data, data)
+                    written += 1
+                map_.flush()
+                map_.close()
+        finally:
+            os.close(descriptor)
+            os.remove(lock)
+        self._pending.clear()
+        return written
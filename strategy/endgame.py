@@ -0,0 +1,448 @@
+"""
+Exact solver of endgames.
+
+A position is searched to the end of the game, and the score is the final
+disk difference, where empty squares are given to the winner. Moves are
+ordered by the mobility of the opponent (fastest-first) while many squares
+are empty, and by parity of quadrants near the end. The last 1, 2 and 3
+empty squares are solved without move generation, and stable disks of the
+opponent give an upper bound to cut off searches which can not raise alpha.
+
+Only win, draw or loss is proved by a search with the window (-1, 1), which
+is faster than the exact score. In this mode, empty squares are split into
+connected regions, and moves in regions of odd size come first.
+
+A solve may be given a deadline, and raises SearchTimeout when it passes,
+so that a caller with a time limit can search instead.
+"""
+from logging import getLogger
+import time
+
+from bitboard import BitBoard
+from bitboard.flip_table import SQUARE_INDEX
+from bitboard.stability import stable_disks
+from bitboard.zobrist import hash_board
+
+from .timecontrol import SearchTimeout
+from .transposition import INFINITY, NO_MOVE, shared_table
+
+logger = getLogger(__name__)
+
+_FULL_BOARD = 0xffffffffffffffff
+
+# Empty squares from which moves are ordered by mobility of the opponent.
+FASTEST_FIRST_EMPTIES = 7
+# Empty squares from which results are kept in the transposition table.
+TABLE_EMPTIES = 8
+# The stability cutoff is tried if alpha is not less than the threshold
+# of the number of empty squares.
+_STABILITY_THRESHOLD = [65] * 4 + [min(2 * empties - 2, 64)
+                                   for empties in range(4, 65)]
+
+_QUADRANTS = [
+    0x000000000f0f0f0f, 0x00000000f0f0f0f0,
+    0x0f0f0f0f00000000, 0xf0f0f0f000000000,
+]
+# Bit of the quadrant of every square.
+_QUADRANT_ID = [
+    1 << number
+    for square in range(64)
+    for number, quadrant in enumerate(_QUADRANTS)
+    if quadrant >> square & 1
+]
+
+_bit_count = BitBoard._bit_count
+_reverse = BitBoard._reverse_by_table
+_reversible_area = BitBoard._reversible_area
+
+
+def final_score(player: int, opponent: int):
+    """Returns the disk difference of a finished game.
+
+    Empty squares are given to the winner.
+    """
+    player_count = _bit_count(player)
+    opponent_count = _bit_count(opponent)
+    difference = player_count - opponent_count
+    if difference > 0:
+        return difference + 64 - player_count - opponent_count
+    if difference < 0:
+        return difference - 64 + player_count + opponent_count
+    return 0
+
+
+def odd_regions(empty: int):
+    """Returns empty squares in connected regions of odd size.
+
+    Squares next to each other, including diagonally, are connected.
+    """
+    odd = 0
+    while empty:
+        region = empty & -empty
+        while True:
+            grown = BitBoard._neighbor_area(region) & empty
+            if grown == region:
+                break
+            region = grown
+        empty ^= region
+        if _bit_count(region) & 1:
+            odd |= region
+    return odd
+
+
+def _parity(empty: int):
+    """Returns bits of quadrants with an odd number of empty squares."""
+    parity = 0
+    for number, quadrant in enumerate(_QUADRANTS):
+        if _bit_count(empty & quadrant) & 1:
+            parity |= 1 << number
+    return parity
+
+
+class EndgameSolver:
+    """Find the move of perfect play.
+
+    Parameters
+    ----------
+    table : TranspositionTable (optional)
+        Table of solved positions. The table shared in the process is used
+        by default.
+
+    Attributes
+    ----------
+    nodes : int
+        Number of nodes visited by the last solve.
+    score : int
+        Score of the last put_disk, which is -1, 0 or 1 in WLD mode.
+    """
+
+    __all__ = ["solve", "solve_wld", "put_disk"]
+
+    def __init__(self, table=None):
+        if table is None:
+            table = shared_table("endgame")
+        self._table = table
+        self._region_parity = False
+        self._deadline = None
+        self._ticks = 0
+        self.nodes = 0
+        self.score = 0
+
+    def _check_deadline(self):
+        """Raise SearchTimeout if the deadline has passed.
+
+        The clock is read once in 256 calls.
+        """
+        self._ticks += 1
+        if not self._ticks & 0xff and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+
+    def _last_1(self, player: int, opponent: int, put_loc: int):
+        """Score of the last empty square."""
+        self.nodes += 1
+        score = 2 * _bit_count(player) - 63
+        reverse_bit = _reverse(player, opponent, put_loc)
+        if reverse_bit:
+            return score + 1 + 2 * _bit_count(reverse_bit)
+        reverse_bit = _reverse(opponent, player, put_loc)
+        if reverse_bit:
+            return score - 1 - 2 * _bit_count(reverse_bit)
+        return score + 1 if score > 0 else score - 1
+
+    def _last_2(
+            self, player: int, opponent: int, alpha: int, beta: int,
+            first: int, second: int, passed: bool = False,
+            ):
+        """Score of the last two empty squares."""
+        self.nodes += 1
+        best = -INFINITY
+        for put_loc, last in ((first, second), (second, first)):
+            reverse_bit = _reverse(player, opponent, put_loc)
+            if reverse_bit:
+                score = -self._last_1(
+                    opponent ^ reverse_bit, player ^ (put_loc | reverse_bit),
+                    last)
+                if score > best:
+                    best = score
+                    if best >= beta:
+                        return best
+        if best == -INFINITY:
+            if passed:
+                return final_score(player, opponent)
+            return -self._last_2(
+                opponent, player, -beta, -alpha, first, second, True)
+        return best
+
+    def _last_3(
+            self, player: int, opponent: int, alpha: int, beta: int,
+            empty: int, passed: bool = False,
+            ):
+        """Score of the last three empty squares.
+
+        A square alone in its quadrant is tried first.
+        """
+        self.nodes += 1
+        first = empty & -empty
+        second = (empty ^ first) & -(empty ^ first)
+        third = empty ^ first ^ second
+        parity = _parity(empty)
+        orders = [(first, second, third), (second, first, third),
+                  (third, first, second)]
+        orders.sort(
+            key=lambda order: not parity & _QUADRANT_ID[
+                SQUARE_INDEX[order[0]]])
+
+        best = -INFINITY
+        for put_loc, rest_1, rest_2 in orders:
+            reverse_bit = _reverse(player, opponent, put_loc)
+            if reverse_bit:
+                score = -self._last_2(
+                    opponent ^ reverse_bit, player ^ (put_loc | reverse_bit),
+                    -beta, -max(alpha, best), rest_1, rest_2)
+                if score > best:
+                    best = score
+                    if best >= beta:
+                        return best
+        if best == -INFINITY:
+            if passed:
+                return final_score(player, opponent)
+            return -self._last_3(
+                opponent, player, -beta, -alpha, empty, True)
+        return best
+
+    def _ordered_moves(
+            self, player: int, opponent: int, reversible: int,
+            empties: int, first: int,
+            ):
+        """Returns (square, put_loc, reverse_bit) of moves in order to search.
+
+        The move of the table comes first. Then moves which leave fewer
+        moves to the opponent come first if many squares are empty, and
+        moves in quadrants or, in WLD mode, regions of odd parity come
+        first otherwise.
+        """
+        moves = []
+        if empties >= FASTEST_FIRST_EMPTIES:
+            for square, put_loc in BitBoard.iter_moves(reversible):
+                reverse_bit = _reverse(player, opponent, put_loc)
+                if square == first:
+                    mobility = -1
+                else:
+                    mobility = _bit_count(_reversible_area(
+                        opponent ^ reverse_bit,
+                        player ^ (put_loc | reverse_bit)))
+                moves.append((mobility, square, put_loc, reverse_bit))
+        elif self._region_parity:
+            odd = odd_regions(~(player | opponent) & _FULL_BOARD)
+            for square, put_loc in BitBoard.iter_moves(reversible):
+                reverse_bit = _reverse(player, opponent, put_loc)
+                if square == first:
+                    order = -1
+                else:
+                    order = 0 if odd & put_loc else 1
+                moves.append((order, square, put_loc, reverse_bit))
+        else:
+            parity = _parity(~(player | opponent) & _FULL_BOARD)
+            for square, put_loc in BitBoard.iter_moves(reversible):
+                reverse_bit = _reverse(player, opponent, put_loc)
+                if square == first:
+                    order = -1
+                else:
+                    order = 0 if parity & _QUADRANT_ID[square] else 1
+                moves.append((order, square, put_loc, reverse_bit))
+        moves.sort()
+        return [(square, put_loc, reverse_bit)
+                for _, square, put_loc, reverse_bit in moves]
+
+    def _solve(
+            self, player: int, opponent: int, alpha: int, beta: int,
+            passed: bool = False,
+            ):
+        """Returns the score of the player on turn.
+
+        Bounds are fail-soft as Negamax.negamax.
+        """
+        empty = ~(player | opponent) & _FULL_BOARD
+        empties = _bit_count(empty)
+        if empties == 3:
+            return self._last_3(player, opponent, alpha, beta, empty, passed)
+        if empties == 2:
+            second = empty & (empty - 1)
+            return self._last_2(
+                player, opponent, alpha, beta, empty ^ second, second, passed)
+        if empties == 1:
+            return self._last_1(player, opponent, empty)
+        if empties == 0:
+            return final_score(player, opponent)
+
+        self.nodes += 1
+        if self._deadline is not None:
+            self._check_deadline()
+        # Stable disks of the opponent can not be taken.
+        if alpha >= _STABILITY_THRESHOLD[empties]:
+            upper = 64 - 2 * _bit_count(stable_disks(opponent, player)[0])
+            if upper <= alpha:
+                return upper
+            beta = min(beta, upper)
+
+        first = NO_MOVE
+        if empties >= TABLE_EMPTIES:
+            hash_ = hash_board(player, opponent)
+            entry = self._table.probe(hash_)
+            if entry is not None:
+                lower, upper, first, _ = entry
+                if lower >= beta or lower == upper:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha = max(alpha, lower)
+                beta = min(beta, upper)
+
+        reversible = _reversible_area(player, opponent)
+        if not reversible:
+            if passed:
+                return final_score(player, opponent)
+            return -self._solve(opponent, player, -beta, -alpha, True)
+
+        alpha_start = alpha
+        best = -INFINITY
+        for square, put_loc, reverse_bit in self._ordered_moves(
+                player, opponent, reversible, empties, first):
+            next_player = opponent ^ reverse_bit
+            next_opponent = player ^ (put_loc | reverse_bit)
+            if best == -INFINITY:
+                score = -self._solve(next_player, next_opponent, -beta, -alpha)
+            else:
+                score = -self._solve(
+                    next_player, next_opponent, -alpha-1, -alpha)
+                if alpha < score < beta:
+                    score = -self._solve(
+                        next_player, next_opponent, -beta, -score)
+            if score > best:
+                best = score
+                selected = square
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+
+        if empties >= TABLE_EMPTIES:
+            # Depth of a solved position is the number of empty squares.
+            if best <= alpha_start:
+                self._table.store(hash_, empties, -INFINITY, best, selected)
+            elif best >= beta:
+                self._table.store(hash_, empties, best, INFINITY, selected)
+            else:
+                self._table.store(hash_, empties, best, best, selected)
+        return best
+
+    def solve(
+            self, player: int, opponent: int,
+            alpha: int = -64, beta: int = 64, deadline: float = None,
+            ):
+        """Returns the score and the move of perfect play.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent. The
+            player must have a legal move.
+        alpha, beta : int
+            Search window. A narrow window is solved faster, but a score
+            out of it is only a bound.
+        deadline : float (optional)
+            Time by time.perf_counter. SearchTimeout is raised when it
+            passes. Results of finished subtrees are kept in the table.
+
+        Returns
+        -------
+        score : int
+            Final disk difference of the player on turn.
+        selected : int
+            Integer from 0 to 63.
+        """
+        self.nodes = 1
+        empties = 64 - _bit_count(player | opponent)
+        reversible = _reversible_area(player, opponent)
+        selected = None
+        best = -INFINITY
+        self._deadline = deadline
+        try:
+            for square, put_loc, reverse_bit in self._ordered_moves(
+                    player, opponent, reversible, empties, NO_MOVE):
+                next_player = opponent ^ reverse_bit
+                next_opponent = player ^ (put_loc | reverse_bit)
+                if selected is None:
+                    score = -self._solve(
+                        next_player, next_opponent, -beta, -alpha)
+                else:
+                    score = -self._solve(
+                        next_player, next_opponent, -alpha-1, -alpha)
+                    if alpha < score < beta:
+                        score = -self._solve(
+                            next_player, next_opponent, -beta, -score)
+                if score > best:
+                    best = score
+                    selected = square
+                    if best > alpha:
+                        alpha = best
+                        if alpha >= beta:
+                            break
+        finally:
+            self._deadline = None
+        return best, selected
+
+    def solve_wld(self, player: int, opponent: int, deadline: float = None):
+        """Returns win, draw or loss and the move which achieves it.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent. The
+            player must have a legal move.
+        deadline : float (optional)
+            See solve.
+
+        Returns
+        -------
+        result : int
+            1 for a win, 0 for a draw and -1 for a loss of the player on
+            turn. If it is a loss, any move loses.
+        selected : int
+            Integer from 0 to 63.
+        """
+        self._region_parity = True
+        try:
+            score, selected = self.solve(player, opponent, -1, 1, deadline)
+        finally:
+            self._region_parity = False
+        return (score > 0) - (score < 0), selected
+
+    def put_disk(self, othello, wld: bool = False, deadline: float = None):
+        """Returns the move of perfect play.
+
+        Parameters
+        ----------
+        othello : OthelloGame
+        wld : bool
+            If True, only win, draw or loss is proved.
+        deadline : float (optional)
+            Time by time.perf_counter. SearchTimeout is raised when it
+            passes, and score is not changed.
+        """
+        position = othello.return_position()
+        start = time.perf_counter()
+        if wld:
+            self.score, selected = self.solve_wld(
+                position.player, position.opponent, deadline)
+        else:
+            self.score, selected = self.solve(
+                position.player, position.opponent, deadline=deadline)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Endgame of %d empties was solved (%s %+d) in %.3f s, "
+            "%d nodes, %.0f nodes/s." % (
+                64 - _bit_count(position.player | position.opponent),
+                "WLD" if wld else "score", self.score, elapsed, self.nodes,
+                self.nodes / max(elapsed, 1e-9)))
+        return selected
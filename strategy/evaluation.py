@@ -0,0 +1,106 @@
+"""
+Evaluation by tables of weights of squares.
+
+A table gives a weight to every square, and a board is evaluated by the
+sum of the weights of the player's disks minus that of the opponent's.
+Sums are precomputed for the 256 patterns of disks of every row, so that a
+board costs 16 lookups instead of a loop over 64 squares.
+"""
+
+# Weights of squares before and after a disk touches the border.
+SQUARE_TABLES = [
+    # 1st evaluation table
+    [
+        30,  -12,   0,  -1,  -1,   0, -12,  30,
+        -12, -15,  -3,  -3,  -3,  -3, -15, -12,
+        0,    -3,   0,  -1,  -1,   0,  -3,   0,
+        -1,   -3,  -1,  -1,  -1,  -1,  -3,  -1,
+        -1,   -3,  -1,  -1,  -1,  -1,  -3,  -1,
+        0,    -3,   0,  -1,  -1,   0,  -3,   0,
+        -12, -15,  -3,  -3,  -3,  -3, -15, -12,
+        30,  -12,   0,  -1,  -1,   0, -12,  30,
+    ],
+    # 2nd evaluation table
+    [
+        120, -20,  20,   5,   5,  20, -20, 120,
+        -20, -40,  -5,  -5,  -5,  -5, -40, -20,
+        20,   -5,  15,   3,   3,  15,  -5,  20,
+        5,    -5,   3,   3,   3,   3,  -5,   5,
+        5,    -5,   3,   3,   3,   3,  -5,   5,
+        20,   -5,  15,   3,   3,  15,  -5,  20,
+        -20, -40,  -5,  -5,  -5,  -5, -40, -20,
+        120, -20,  20,   5,   5,  20, -20, 120,
+    ],
+]
+
+
+def row_tables(table: list):
+    """Returns sums of weights for every row and pattern of the row.
+
+    Parameters
+    ----------
+    table : list of int
+        Weights of squares from 0 to 63.
+
+    Returns
+    -------
+    rows : list of list of int
+        rows[row][byte] is the sum of the weights of the squares in the row
+        whose bits are set in byte, the row shifted to the lowest 8 bits.
+    """
+    return [
+        [
+            sum(table[row*8 + col] for col in range(8) if byte >> col & 1)
+            for byte in range(256)
+        ]
+        for row in range(8)
+    ]
+
+
+def sum_rows(rows: list, board: int):
+    """Returns the sum of the weights of the disks of a board.
+
+    Parameters
+    ----------
+    rows : list of list of int
+        Tables returned by row_tables.
+    board : int
+        64-bit intager of disks.
+    """
+    row0, row1, row2, row3, row4, row5, row6, row7 = rows
+    return (
+        row0[board & 0xff] + row1[board >> 8 & 0xff]
+        + row2[board >> 16 & 0xff] + row3[board >> 24 & 0xff]
+        + row4[board >> 32 & 0xff] + row5[board >> 40 & 0xff]
+        + row6[board >> 48 & 0xff] + row7[board >> 56]
+    )
+
+
+def evaluate_rows(rows: list, player_board: int, opponent_board: int):
+    """Returns the evaluation of the boards by row tables.
+
+    It is equal to the loop over squares of the table of row_tables.
+
+    Parameters
+    ----------
+    rows : list of list of int
+        Tables returned by row_tables.
+    player_board, opponent_board : int
+        64-bit intager of the player and the opponent.
+    """
+    row0, row1, row2, row3, row4, row5, row6, row7 = rows
+    return (
+        row0[player_board & 0xff] - row0[opponent_board & 0xff]
+        + row1[player_board >> 8 & 0xff] - row1[opponent_board >> 8 & 0xff]
+        + row2[player_board >> 16 & 0xff]
+        - row2[opponent_board >> 16 & 0xff]
+        + row3[player_board >> 24 & 0xff]
+        - row3[opponent_board >> 24 & 0xff]
+        + row4[player_board >> 32 & 0xff]
+        - row4[opponent_board >> 32 & 0xff]
+        + row5[player_board >> 40 & 0xff]
+        - row5[opponent_board >> 40 & 0xff]
+        + row6[player_board >> 48 & 0xff]
+        - row6[opponent_board >> 48 & 0xff]
+        + row7[player_board >> 56] - row7[opponent_board >> 56]
+    )
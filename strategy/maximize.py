@@ -12,13 +12,9 @@ class Maximize:
         max_strategy = []
         max_merit = 0
 
-        candidates = []
-        for num in range(64):
-            if (pow(2, num)) & othello.reversible:
-                candidates.append(num)
-        for candidate in candidates:
-            new_board = othello.board.simulate_play(
-                othello.turn, candidate)
+        for candidate, put_loc in othello.board.iter_moves(
+                othello.reversible):
+            new_board = othello.board.simulate_play(othello.turn, put_loc)
             counter = othello.board.count_disks(*new_board)
             if max_merit < counter[turn]:
                 max_strategy = [candidate]
@@ -1,166 +1,269 @@
 """Various strategies for othello."""
 import pickle
 
+from bitboard.symmetry import unique_moves
 
-class Minmax:
-    """Find a better move by min-max method."""
-
-    __all__ = ["put_disk"]
-
-    def __init__(self):
-        self._EVAL_TBL = [
-            # 1st evaluation table
-            [
-                30,  -12,   0,  -1,  -1,   0, -12,  30,
-                -12, -15,  -3,  -3,  -3,  -3, -15, -12,
-                0,    -3,   0,  -1,  -1,   0,  -3,   0,
-                -1,   -3,  -1,  -1,  -1,  -1,  -3,  -1,
-                -1,   -3,  -1,  -1,  -1,  -1,  -3,  -1,
-                0,    -3,   0,  -1,  -1,   0,  -3,   0,
-                -12, -15,  -3,  -3,  -3,  -3, -15, -12,
-                30,  -12,   0,  -1,  -1,   0, -12,  30,
-            ],
-            # 2nd evaluation table
-            [
-                120, -20,  20,   5,   5,  20, -20, 120,
-                -20, -40,  -5,  -5,  -5,  -5, -40, -20,
-                20,   -5,  15,   3,   3,  15,  -5,  20,
-                5,    -5,   3,   3,   3,   3,  -5,   5,
-                5,    -5,   3,   3,   3,   3,  -5,   5,
-                20,   -5,  15,   3,   3,  15,  -5,  20,
-                -20, -40,  -5,  -5,  -5,  -5, -40, -20,
-                120, -20,  20,   5,   5,  20, -20, 120,
-            ],
+from .batch import PatternBatch, TableBatch, children, leaf_values
+from .evaluation import SQUARE_TABLES, evaluate_rows, row_tables, sum_rows
+from .ordering import MoveOrdering
+from .specialize import table_function
+from .timecontrol import IterativeDeepening
+
+_FULL_BOARD = 0xffffffffffffffff
+_BORDER = 0xff818181818181ff
+
+
+class Minmax(IterativeDeepening):
+    """Find a better move by min-max method.
+
+    Parameters
+    ----------
+    ordering : MoveOrdering (optional)
+        Move ordering with its default parameters is used by default.
+    time_limit : float (optional)
+        Seconds for a move. If it is given, put_disk searches deeper until
+        the time runs out, instead of searching to a fixed depth.
+    game_time : float (optional)
+        Seconds for all moves of the game, which are shared by the moves
+        left. The time of a move is not more than time_limit if both are
+        given.
+    evaluator : PatternEvaluator (optional)
+        Evaluator of boards used instead of the square tables. It has
+        evaluate(player_board, opponent_board) from the side of the player.
+    batch : bool
+        If True, the children of a node of depth 1 are evaluated together
+        by NumPy, see strategy.batch. Results are the same.
+
+    Notes
+    -----
+    min_max carries the evaluation of the board in _score and _phase, and
+    updates it by the put disk and the reversed disks of every move, so
+    that a leaf is evaluated without looking at the board. The phase
+    switches when a disk is put on the border for the first time, and the
+    evaluation is then computed again by the new table. With an evaluator,
+    leaves are evaluated by it instead.
+    """
+
+    __all__ = [
+        "put_disk", "move_time", "start_move", "iterative_deepening",
         ]
 
+    WIN_VALUE = 10000000000
+
+    def __init__(
+            self, ordering=None, time_limit=None, game_time=None,
+            evaluator=None, batch=False,
+            ):
+        self._init_time_control(time_limit, game_time)
+        self._evaluator = evaluator
+        if ordering is None:
+            ordering = MoveOrdering()
+        self._ordering = ordering
+        self._EVAL_TBL = SQUARE_TABLES
+
         self._EXP2 = [pow(2, num) for num in range(64)]
+        self._ROW_TBL = [row_tables(table) for table in self._EVAL_TBL]
+        # Boards are evaluated by a function generated for the tables.
+        if evaluator is None:
+            self._evaluate = table_function(self._EVAL_TBL)
+        else:
+            self._evaluate = evaluator.evaluate
+        if not batch:
+            self._batch = None
+        elif evaluator is None:
+            self._batch = TableBatch(self._EVAL_TBL)
+        else:
+            self._batch = PatternBatch(evaluator)
 
-    def touch_border(self, black_board, white_board):
-        board = (black_board | white_board)
+    def touch_border(self, player_board, opponent_board):
+        board = (player_board | opponent_board)
         if board & 0xff818181818181ff:
             return 1
         return 0
 
-    def evaluate_value(self, black_board, white_board):
-        evaluation = 0
-        board = [black_board, white_board]
+    def evaluate_value(self, player_board, opponent_board):
+        """Evaluate the board from the side of the CPU.
+
+        Parameters
+        ----------
+        player_board, opponent_board : int
+            64-bit intager of the CPU and the opponent.
+        """
+        return self._evaluate(player_board, opponent_board)
 
-        # If disk does not touch the border,
-        # phase is False and TABLE[0] is called.
-        phase = self.touch_border(black_board, white_board)
-        for position in range(64):
-            if (self._EXP2[position] & board[self._player_clr]):
-                evaluation += self._EVAL_TBL[phase][position]
-            if (self._EXP2[position] & board[self._player_clr ^ 1]):
-                evaluation -= self._EVAL_TBL[phase][position]
-        return evaluation
+    def _evaluate_position(self, position):
+        """Evaluate the position from the side of the CPU."""
+        if position.turn == self._player_clr:
+            return self.evaluate_value(position.player, position.opponent)
+        return self.evaluate_value(position.opponent, position.player)
+
+    def _start_evaluation(self, position):
+        """Set the running evaluation to the evaluation of the root."""
+        self._phase = self.touch_border(position.player, position.opponent)
+        self._score = self._evaluate_position(position)
+
+    def _frontier_values(self, position, moves):
+        """Evaluate the children of a node of depth 1 from the side of the
+        CPU, in the order of moves."""
+        player, opponent = children(
+            position.player, position.opponent,
+            [put_loc for _, put_loc in moves])
+        if position.turn != self._player_clr:
+            player, opponent = opponent, player
+        return leaf_values(self._batch, player, opponent, self.WIN_VALUE)
 
     def update_file(self):
         with open(self._filename, "wb") as file_:
             pickle.dump(self._hash_log, file_)
 
-    def min_max(
-            self, black_board, white_board, turn, depth, pre_evaluation
-            ):
-        """Return wheather you can put disk or not.
+    def final_value(self, position, disk_difference):
+        """Evaluate a finished game from the side of the CPU.
+
+        Parameters
+        ----------
+        position : Position
+        disk_difference : int
+            Disks of the player on turn minus disks of the opponent.
+        """
+        if position.turn != self._player_clr:
+            disk_difference = -disk_difference
+        if disk_difference > 0:
+            return self.WIN_VALUE
+        if disk_difference < 0:
+            return -self.WIN_VALUE
+        return 0
+
+    def min_max(self, position, depth, pre_evaluation):
+        """Return the evaluation and the selected move.
 
         Parameters
         ----------
-        black_board, white_board : int (optional)
-            64-bit intager.
-        turn : int
-            If black is on turn, 1. If white, 0.
+        position : Position
+            Board seen from the player on turn. Moves are made and undone
+            in place, so it is unchanged when this returns.
+        depth : int
+            Remaining depth of search.
+        pre_evaluation : float
+            Evaluation of the parent node, used for pruning.
         """
-        # Calculate evaluation.
-        evaluation = self.evaluate_value(black_board, white_board)
+        if self._deadline is not None:
+            self._check_deadline()
+
+        # Game is over when the board is filled.
+        if not (position.player | position.opponent) ^ _FULL_BOARD:
+            player_count, opponent_count = position.count_disks()
+            return self.final_value(
+                position, player_count - opponent_count), 1
+
         if depth == 0:
-            return evaluation, 1
+            if self._evaluator is not None:
+                return self._evaluate_position(position), 1
+            return self._score, 1
 
-        if turn == self._player_clr:
+        reversible, must_pass, game_over, disk_difference = position.expand()
+        if game_over:
+            return self.final_value(position, disk_difference), 1
+        if must_pass:
+            position.pass_()
+            if position.turn != self._player_clr:
+                result = self.min_max(position, depth-1, -1 * float("inf"))
+            else:
+                result = self.min_max(position, depth-1, float("inf"))
+            position.undo()
+            return result
+
+        if position.turn == self._player_clr:
             max_evaluation = -1 * float("inf")
         else:
             min_evaluation = float("inf")
 
-        reversible = self._othello.board.reversible_area(
-            turn, black_board, white_board
-            )
-
-        candidates = []
-        for num in range(64):
-            if self._EXP2[num] & reversible:
-                candidates.append(num)
-
-        if self._othello.board.turn_playable(
-            turn, black_board, white_board
-        ):
-            for candidate in candidates:
-                new_black_board, new_white_board = \
-                    self._othello.board.simulate_play(
-                        turn, self._EXP2[candidate],
-                        black_board, white_board,
-                    )
-                count_black, count_white = self._othello.board.count_disks(
-                    new_black_board, new_white_board
-                )
-                if self._player_clr:
-                    count_player, count_opponent = count_black, count_white
-                else:
-                    count_player, count_opponent = count_white, count_black
-                if self._othello.judge_game([count_player, count_opponent]):
-                    if self._othello.result == "WIN":
-                        next_evaluation = 10000000000
-                    elif self._othello.result == "LOSE":
-                        next_evaluation = -10000000000
-                    else:
-                        next_evaluation = 0
+        if depth == self._root_depth:
+            # Symmetric moves at the root lead to symmetric boards.
+            reversible = unique_moves(
+                position.player, position.opponent, reversible)
+
+        # The running evaluation of this node, restored after every move.
+        score, phase = self._score, self._phase
+        sign = 1 if position.turn == self._player_clr else -1
+        table = self._EVAL_TBL[phase]
+        rows = self._ROW_TBL[phase]
+        ordering = self._ordering
+        ordering.searched(depth)
+        moves = ordering.order(
+            position.player, position.opponent, reversible, position.ply,
+            depth)
+        if depth == 1 and self._batch is not None:
+            # Children are evaluated at once, and bounds are applied below.
+            values = self._frontier_values(position, moves)
+        else:
+            values = None
+        for index, (candidate, put_loc) in enumerate(moves):
+            if values is not None:
+                next_evaluation = values[index]
+            else:
+                reverse_bit = position.play(put_loc)
+                if not phase and put_loc & _BORDER:
+                    # The first disk on the border switches the table.
+                    self._phase = 1
+                    self._score = sign * evaluate_rows(
+                        self._ROW_TBL[1], position.opponent, position.player)
                 else:
-                    if turn == self._player_clr:
-                        next_evaluation = self.min_max(
-                            new_black_board, new_white_board,
-                            turn ^ 1, depth-1, max_evaluation,
-                            )[0]
-                    else:
-                        next_evaluation = self.min_max(
-                            new_black_board, new_white_board,
-                            turn ^ 1, depth-1, min_evaluation,
-                            )[0]
-
-                # alpha-bata method(pruning)
-                if turn == self._player_clr:
-                    if next_evaluation > pre_evaluation:
-                        return pre_evaluation, candidate
+                    # A reversed disk is added to the player and removed
+                    # from the opponent.
+                    self._score = score + sign * (
+                        table[candidate] + 2 * sum_rows(rows, reverse_bit))
+                if position.turn != self._player_clr:
+                    next_evaluation = self.min_max(
+                        position, depth-1, max_evaluation,
+                        )[0]
                 else:
-                    if pre_evaluation > next_evaluation:
-                        return pre_evaluation, candidate
+                    next_evaluation = self.min_max(
+                        position, depth-1, min_evaluation,
+                        )[0]
+                position.undo()
+                self._score, self._phase = score, phase
 
-                if turn == self._player_clr:
-                    if max_evaluation < next_evaluation:
-                        max_evaluation = next_evaluation
-                        selected = candidate
-                else:
-                    if next_evaluation < min_evaluation:
-                        min_evaluation = next_evaluation
-                        selected = candidate
-        else:
-            if turn == self._player_clr:
-                return self.min_max(
-                    black_board, white_board, turn^1, depth-1, max_evaluation,
-                    )
+            # alpha-bata method(pruning)
+            if position.turn == self._player_clr:
+                if next_evaluation > pre_evaluation:
+                    ordering.cutoff(candidate, position.ply, depth, index)
+                    return pre_evaluation, candidate
             else:
-                return self.min_max(
-                    black_board, white_board, turn^1, depth-1, min_evaluation,
-                    )
-        if turn == self._player_clr:
+                if pre_evaluation > next_evaluation:
+                    ordering.cutoff(candidate, position.ply, depth, index)
+                    return pre_evaluation, candidate
+
+            if position.turn == self._player_clr:
+                if max_evaluation < next_evaluation:
+                    max_evaluation = next_evaluation
+                    selected = candidate
+            else:
+                if next_evaluation < min_evaluation:
+                    min_evaluation = next_evaluation
+                    selected = candidate
+        if position.turn == self._player_clr:
             return max_evaluation, selected
         else:
             return min_evaluation, selected
 
+    def _iterate(self, position, depth, previous):
+        self._root_depth = depth
+        self._start_evaluation(position)
+        return self.min_max(position, depth, float("inf"))
+
     def put_disk(self, othello, depth=4):
-        black_board, white_board = othello.board.return_board()
-        turn = othello.turn
-        self._player_clr = turn
+        self._player_clr = othello.turn
+        self._root_depth = depth
         self._count_pass = 0
         self._othello = othello
-        return self.min_max(
-            black_board, white_board, turn,
-            depth, pre_evaluation=float("inf"))[1]
+        self._ordering.new_search()
+        move_time = self.move_time(othello)
+        if move_time is None:
+            position = othello.return_position()
+            self._start_evaluation(position)
+            selected = self.min_max(
+                position, depth, pre_evaluation=float("inf"))[1]
+        else:
+            selected = self.iterative_deepening(othello, move_time)
+        self._ordering.log_statistics()
+        return selected
@@ -3,58 +3,62 @@
 
 from collections import deque
 import copy
-import numpy as np
-import pickle
 import random
 
-from bitboard import OthelloGame
+from bitboard import BitBoard, OthelloGame
+from bitboard.symmetry import unique_moves
 
+from .cache import EXACT, LOWER, UPPER, SearchCache
+from .evaluation import SQUARE_TABLES, evaluate_rows, row_tables
+from .timecontrol import IterativeDeepening
+from .transposition import INFINITY, shared_table
 
-class MinmaxNew:
+_FULL_BOARD = 0xffffffffffffffff
+# Evaluations are seen from the CPU, so keys of the cache file include the
+# color of the CPU.
+_CPU_KEY = [0, 0x9e3779b97f4a7c15]
+
+
+class MinmaxNew(IterativeDeepening):
     """Find a better move by min-max method.
+
+    Parameters
+    ----------
+    filename : str
+        Cache file of search results.
+    table_mb : int
+        Megabytes of the transposition table.
+    time_limit, game_time : float (optional)
+        Seconds for a move and for the game. If either is given, put_disk
+        searches deeper until the time runs out, see IterativeDeepening.
+    evaluator : PatternEvaluator (optional)
+        Evaluator of boards used instead of the square tables. Results in
+        the cache file depend on the evaluation, so give another filename.
     """
-    __all__ = ["put_disk"]
+    __all__ = [
+        "put_disk", "move_time", "start_move", "iterative_deepening",
+        ]
 
-    def __init__(self, filename="./strategy/minmax_hash.pkl"):
+    def __init__(
+            self, filename="./strategy/minmax_cache.bin", table_mb=16,
+            time_limit=None, game_time=None, evaluator=None,
+            ):
+        self._init_time_control(time_limit, game_time)
+        self._evaluator = evaluator
         self._filename = filename
-        try:
-            with open(filename, "rb") as file_:
-                self._hash_log = pickle.load(file_)
-        except FileNotFoundError:
-            self._hash_log = {}
-        for color in ["1", "0"]:
-            for turn in ["1", "0"]:
-                for depth in map(str, range(10)):
-                    key = "".join([color, turn, depth])
-                    if key not in self._hash_log.keys():
-                        self._hash_log[key] = {}
-
-        self._EVALUATION_FIRST = [
-            30,  -12,   0,  -1,  -1,   0, -12,  30,
-            -12, -15,  -3,  -3,  -3,  -3, -15, -12,
-            0,    -3,   0,  -1,  -1,   0,  -3,   0,
-            -1,   -3,  -1,  -1,  -1,  -1,  -3,  -1,
-            -1,   -3,  -1,  -1,  -1,  -1,  -3,  -1,
-            0,    -3,   0,  -1,  -1,   0,  -3,   0,
-            -12, -15,  -3,  -3,  -3,  -3, -15, -12,
-            30,  -12,   0,  -1,  -1,   0, -12,  30,
-        ]
-        self._EVALUATION_MIDDLE = [
-            120, -20,  20,   5,   5,  20, -20, 120,
-            -20, -40,  -5,  -5,  -5,  -5, -40, -20,
-            20,   -5,  15,   3,   3,  15,  -5,  20,
-            5,    -5,   3,   3,   3,   3,  -5,   5,
-            5,    -5,   3,   3,   3,   3,  -5,   5,
-            20,   -5,  15,   3,   3,  15,  -5,  20,
-            -20, -40,  -5,  -5,  -5,  -5, -40, -20,
-            120, -20,  20,   5,   5,  20, -20, 120,
-        ]
+        self._table_mb = table_mb
+        # The file is mapped, not read, so this does not depend on its size.
+        self._cache = SearchCache(filename)
+
+        self._EVALUATION_FIRST, self._EVALUATION_MIDDLE = SQUARE_TABLES
+        self._ROWS_FIRST = row_tables(self._EVALUATION_FIRST)
+        self._ROWS_MIDDLE = row_tables(self._EVALUATION_MIDDLE)
 
         self._EXP2 = [pow(2, num) for num in range(64)]
         return
 
-    def touch_border(self, black_board, white_board):
-        board = (white_board | black_board)
+    def touch_border(self, player_board, opponent_board):
+        board = (player_board | opponent_board)
         if board & 0xff818181818181ff:
             return 1
         return 0
@@ -100,47 +104,80 @@ class MinmaxNew:
     #     return openness_value
 
     def static_evaluation_function(
-            self, white_board: int, black_board: int, stage: int) -> int:
-        """Definition of static function."""
-        board_evaluation = 0
-        board = [black_board, white_board]
+            self, player_board: int, opponent_board: int, stage: int) -> int:
+        """Definition of static function.
 
+        Parameters
+        ----------
+        player_board, opponent_board : int
+            64-bit intager of the CPU and the opponent.
+        stage : int
+            Number of disks on the board.
+        """
+        if self._evaluator is not None:
+            return self._evaluator.evaluate(player_board, opponent_board)
         if stage < 21:
-            for position in range(64):
-                if (self._EXP2[position] & board[self._player_clr ^ 1]):
-                    board_evaluation += self._EVALUATION_FIRST[position]
-                if (self._EXP2[position] & board[self._player_clr]):
-                    board_evaluation -= self._EVALUATION_FIRST[position]
+            return evaluate_rows(
+                self._ROWS_FIRST, player_board, opponent_board)
+        return evaluate_rows(self._ROWS_MIDDLE, player_board, opponent_board)
+
+    def evaluate_position(self, position, stage: int) -> int:
+        """Static evaluation of a position from the side of the CPU."""
+        if position.turn == self._player_clr:
+            return self.static_evaluation_function(
+                position.player, position.opponent, stage)
+        return self.static_evaluation_function(
+            position.opponent, position.player, stage)
+
+    def check_hash_table(
+            self, hashed_board, depth, pre_evaluation, is_player):
+        """Look up the transposition table, then the cache file.
+
+        Results of the same or deeper search are used. A bound is used if
+        it cuts as the search would, and pre_evaluation is returned then.
+        """
+        entry = self._table.probe(hashed_board)
+        if entry is not None and entry[3] >= depth:
+            lower, upper, selected, _ = entry
         else:
-            for position in range(64):
-                if (self._EXP2[position] & board[self._player_clr ^ 1]):
-                    board_evaluation += self._EVALUATION_MIDDLE[position]
-                if (self._EXP2[position] & board[self._player_clr]):
-                    board_evaluation -= self._EVALUATION_MIDDLE[position]
-        return board_evaluation
-
-    def check_hash_table(self, hashed_board, hash_key):
-        """Save board data which is deeper than 4."""
-        if hashed_board in self._hash_log[hash_key].keys():
-            return True, self._hash_log[hash_key][hashed_board]
+            entry = self._cache.probe(hashed_board)
+            if entry is None or entry[0] < depth:
+                return False, None
+            cached_depth, bound, evaluation, selected = entry
+            lower = -INFINITY if bound == UPPER else evaluation
+            upper = INFINITY if bound == LOWER else evaluation
+            self._table.store(
+                hashed_board, cached_depth, lower, upper, selected)
+        if lower == upper:
+            return True, (lower, selected)
+        if is_player and lower > pre_evaluation:
+            return True, (pre_evaluation, selected)
+        if not is_player and upper < pre_evaluation:
+            return True, (pre_evaluation, selected)
         return False, None
 
     def save_hash_table(
-            self, hashed_board, hash_key, evaluation, selected, depth
-            ):
+            self, hashed_board, evaluation, selected, depth, bound=EXACT):
+        """Save board data which is deeper than 4.
+
+        bound is LOWER or UPPER if the search was cut, and evaluation is
+        the value of the move which cut it.
+        """
         if depth < 4:
             return
-        self._hash_log[hash_key][hashed_board] = (evaluation, selected)
+        lower = -INFINITY if bound == UPPER else evaluation
+        upper = INFINITY if bound == LOWER else evaluation
+        self._table.store(hashed_board, depth, lower, upper, selected)
+        self._cache.add(hashed_board, depth, bound, evaluation, selected)
         return
 
     def update_file(self):
-        with open(self._filename, "wb") as file_:
-            pickle.dump(self._hash_log, file_)
+        """Write saved board data to the cache file."""
+        self._cache.merge()
         return
 
     def move_ordering(
-            self, white_board: int, black_board: int, turn: int,
-            reversible: int, candidates: list, stage: int,
+            self, position, reversible: int, candidates: list, stage: int,
             ) -> list:
         """Define order of moves, so that you can find next move effectively.
         For move ordering, values below are used.
@@ -153,56 +190,34 @@ class MinmaxNew:
         candidates : list of ints
             List of integers orderd by possibility.
         """
-        # print("order")
-
         ordered_candidates = []
         if not reversible:
             return ordered_candidates
         # Killer move(corner)
-        if reversible & 0x1:
-            ordered_candidates.append([1000000, 0])
-        if reversible & 0x80:
-            ordered_candidates.append([1000000, 7])
-        if reversible & 0x100000000000000:
-            ordered_candidates.append([1000000, 56])
-        if reversible & 0x8000000000000000:
-            ordered_candidates.append([1000000, 63])
-        # print("init candidates", candidates)
-        for number, candidate in enumerate(candidates):
-            new_white_board, new_black_board = \
-                self._othello.board.put_disk(
-                    turn, self._EXP2[candidate], False,
-                    black_board, white_board,
-                )
+        for corner in (0, 7, 56, 63):
+            if reversible & self._EXP2[corner]:
+                ordered_candidates.append([1000000, corner])
+        for candidate in candidates:
+            if candidate in (0, 7, 56, 63):
+                continue
+            position.play(self._EXP2[candidate])
 
             if stage < 21:
-                usable_moves = self._othello.board.reversible_area(
-                    turn ^ 1, new_white_board, new_black_board
-                    )
-                usable_moves = self._othello.board.bit_count(usable_moves)
-                board_evaluation = self.static_evaluation_function(
-                    new_white_board, new_black_board, stage=stage)
+                usable_moves = self._othello.board._bit_count(
+                    position.reversible_area())
+                board_evaluation = self.evaluate_position(position, stage)
                 evaluation = -5*usable_moves + board_evaluation
-                # print(stage, usable_moves, board_evaluation)
             elif 21 <= stage < 48:
-                board_evaluation = self.static_evaluation_function(
-                    new_white_board, new_black_board, stage=stage)
-                evaluation = board_evaluation
-                # print(stage, board_evaluation)
+                evaluation = self.evaluate_position(position, stage)
             else:
-                usable_moves = self._othello.board.reversible_area(
-                    turn ^ 1, new_white_board, new_black_board
-                    )
-                usable_moves = self._othello.board.bit_count(usable_moves)
+                usable_moves = self._othello.board._bit_count(
+                    position.reversible_area())
                 evaluation = -1*usable_moves
-                # print(stage, usable_moves)
+            position.undo()
 
             ordered_candidates.append([evaluation, candidate])
         ordered_candidates.sort(reverse=True)
-        # ordered_candidates = np.uint64(np.array(ordered_candidates))
-        ordered_candidates = np.array(ordered_candidates)
-        # print(ordered_candidates)
-        return ordered_candidates[:, 1]
+        return [candidate for _, candidate in ordered_candidates]
 
     def search_candidates(self, reversible: int) -> list:
         """Count the number of bit awaking.
@@ -217,163 +232,157 @@ class MinmaxNew:
         candidates : list of ints
             List of integers from 0 to 63.
         """
-        candidates = []
-        for position in range(64):
-            if reversible & self._EXP2[position]:
-                candidates.append(position)
-        return candidates
-
-    def min_max(
-            self, white_board: int, black_board: int, turn: int,
-            depth: int, pre_evaluation=-1*float("inf"),
-            ):
-        # If the board is known, return value.
-        # print("called, game turn = %d, depth = %d, pre = %f" %(turn, depth, pre_evaluation))
-        hashed_board = "".join([str(white_board), str(black_board)])
-        hash_key = "".join([str(self._player_clr) + str(turn) + str(depth)])
+        return BitBoard.move_list(reversible)
+
+    def final_value(self, position) -> int:
+        """Evaluate a finished game from the side of the CPU."""
+        count_player, count_opponent = position.count_disks()
+        if position.turn != self._player_clr:
+            count_player, count_opponent = count_opponent, count_player
+        if count_player > count_opponent:
+            return count_player*1000
+        elif count_player < count_opponent:
+            return -count_opponent*1000
+        return 0
+
+    def min_max(self, position, depth: int, pre_evaluation=-1*float("inf")):
+        """Return the evaluation and the selected move.
 
-        is_exist, saved = self.check_hash_table(hashed_board, hash_key)
+        Parameters
+        ----------
+        position : Position
+            Board seen from the player on turn. Moves are made and undone
+            in place, so it is unchanged when this returns.
+        depth : int
+            Remaining depth of search.
+        pre_evaluation : float
+            Evaluation of the parent node, used for pruning.
+        """
+        if self._deadline is not None:
+            self._check_deadline()
+
+        # If the board is known, return value.
+        is_player = position.turn == self._player_clr
+        hashed_board = position.hash ^ _CPU_KEY[self._player_clr]
+        is_exist, saved = self.check_hash_table(
+            hashed_board, depth, pre_evaluation, is_player)
         if is_exist:
             evaluation, selected = saved
-            # print("exist, evaluation = %d, selected = %d, depth = %d" %(evaluation, selected, depth))
             return evaluation, selected
 
+        # Game is over when the board is filled.
+        if not (position.player | position.opponent) ^ _FULL_BOARD:
+            return self.final_value(position), 1
+
         # Calculate evaluation.
-        stage = sum(self._othello.board.count_disks(black_board, white_board))
+        stage = sum(position.count_disks())
         if depth == 0:
             if stage < 21:
-                # print("return root evaluation = %d" %(evaluation))
-                usable_moves = self._othello.board.reversible_area(
-                    turn, black_board, white_board
-                    )
-                usable_moves = self._othello.board.bit_count(usable_moves)
-                board_evaluation = self.static_evaluation_function(
-                    black_board, white_board, stage)
+                usable_moves = self._othello.board._bit_count(
+                    position.reversible_area())
+                board_evaluation = self.evaluate_position(position, stage)
                 evaluation = -5*usable_moves + board_evaluation
                 return evaluation, 1
             else:
-                evaluation = self.static_evaluation_function(
-                    black_board, white_board, stage)
+                evaluation = self.evaluate_position(position, stage)
                 return evaluation, 1
 
-        if turn == self._player_clr:
+        reversible, must_pass, game_over, _ = position.expand()
+        if game_over:
+            return self.final_value(position), 1
+        if must_pass:
+            position.pass_()
+            if is_player:
+                result = self.min_max(position, depth-1, -1*float("inf"))
+            else:
+                result = self.min_max(position, depth-1, float("inf"))
+            position.undo()
+            return result
+
+        if is_player:
             max_evaluation = -1*float("inf")
         else:
             min_evaluation = float("inf")
 
-        reversible = self._othello.board.reversible_area(
-            turn, black_board, white_board)
+        if depth == self._root_depth:
+            # Symmetric moves at the root lead to symmetric boards.
+            reversible = unique_moves(
+                position.player, position.opponent, reversible)
         if depth > 4:
             pre_candidates = self.search_candidates(reversible)
             candidates = self.move_ordering(
-                black_board, white_board, turn,
-                reversible, pre_candidates, stage,
+                position, reversible, pre_candidates, stage,
                 )
         else:
             candidates = self.search_candidates(reversible)
 
-        # print("pre candidates", candidates)
-        if self._othello.board.turn_playable(
-                turn, black_board, white_board):
-            for candidate in candidates:
-                new_black_board, new_white_board = \
-                    self._othello.board.put_disk(
-                        turn, self._EXP2[candidate], False,
-                        black_board, white_board,
-                    )
-
-                count_white, count_black = self._othello.board.count_disks(
-                    new_white_board, new_black_board
-                )
-                if self._player_clr:
-                    count_player, count_opponent = count_black, count_white
-                else:
-                    count_player, count_opponent = count_white, count_black
-                count_blank = 64 - count_player - count_opponent
-
-                if self._othello.judge_game(
-                        count_player, count_opponent, count_blank):
-                    if self._result == "WIN":
-                        next_evaluation = count_player*1000
-                    elif self._result == "LOSE":
-                        next_evaluation = -count_opponent*1000
-                    else:
-                        next_evaluation = 0
-                else:
-                    if turn == self._player_clr:
-                        # print("call function, candidate = %d, depth = %d" %(candidate, depth))
-                        next_evaluation = self.min_max(
-                            new_white_board, new_black_board, turn ^ 1,
-                            depth-1, max_evaluation,
-                            )[0]
-                    else:
-                        # print("call function, candidate = %d, depth = %d" %(candidate, depth))
-                        next_evaluation = self.min_max(
-                            new_white_board, new_black_board, turn ^ 1,
-                            depth-1, min_evaluation,
-                            )[0]
-
-                # alpha-bata method(pruning)
-                if turn == self._player_clr:
-                    # print("beta cut, pre=%f < next=%f or not" %(pre_evaluation, next_evaluation))
-                    if next_evaluation > pre_evaluation:
-                        # print("cut, candidate = %d, depth = %d" %(candidate, depth))
-                        return pre_evaluation, candidate
-                else:
-                    # print("alpha cut, pre=%f > next=%f or not" %(pre_evaluation, next_evaluation))
-                    if pre_evaluation > next_evaluation:
-                        # print("cut, candidate = %d, depth = %d" %(candidate, depth))
-                        return pre_evaluation, candidate
-
-                if turn == self._player_clr:
-                    if max_evaluation < next_evaluation:
-                        max_evaluation = next_evaluation
-                        selected = candidate
-                        # print("new max", max_evaluation)
-                else:
-                    if next_evaluation < min_evaluation:
-                        min_evaluation = next_evaluation
-                        selected = candidate
-                        # print("new min", min_evaluation)
-        else:
-            # print("pass", turn, depth)
-            if turn == self._player_clr:
-                return self.min_max(
-                    black_board, white_board, turn ^ 1,
-                    depth-1, max_evaluation
-                    )
+        for candidate in candidates:
+            position.play(self._EXP2[candidate])
+            if is_player:
+                next_evaluation = self.min_max(
+                    position, depth-1, max_evaluation,
+                    )[0]
             else:
-                return self.min_max(
-                    black_board, white_board, turn ^ 1,
-                    depth-1, min_evaluation,
-                    )
-        if turn == self._player_clr:
+                next_evaluation = self.min_max(
+                    position, depth-1, min_evaluation,
+                    )[0]
+            position.undo()
+
+            # alpha-bata method(pruning)
+            if is_player:
+                if next_evaluation > pre_evaluation:
+                    if depth > 4:
+                        self.save_hash_table(
+                            hashed_board, next_evaluation, candidate, depth,
+                            LOWER)
+                    return pre_evaluation, candidate
+            else:
+                if pre_evaluation > next_evaluation:
+                    if depth > 4:
+                        self.save_hash_table(
+                            hashed_board, next_evaluation, candidate, depth,
+                            UPPER)
+                    return pre_evaluation, candidate
+
+            if is_player:
+                if max_evaluation < next_evaluation:
+                    max_evaluation = next_evaluation
+                    selected = candidate
+            else:
+                if next_evaluation < min_evaluation:
+                    min_evaluation = next_evaluation
+                    selected = candidate
+        if is_player:
             if depth > 4:
                 self.save_hash_table(
-                    hashed_board, hash_key, max_evaluation, selected, depth)
-            # print("final value = %f, selected = %d, game turn %d, depth = %d" %(max_evaluation, selected, turn, depth))
+                    hashed_board, max_evaluation, selected, depth)
             return max_evaluation, selected
         else:
             if depth > 4:
                 self.save_hash_table(
-                    hashed_board, hash_key, min_evaluation, selected, depth)
-            # print("final value = %f, selected = %d, game turn %d, depth = %d" %(min_evaluation, selected, turn, depth))
+                    hashed_board, min_evaluation, selected, depth)
             return min_evaluation, selected
 
+    def _iterate(self, position, depth, previous):
+        self._root_depth = depth
+        return self.min_max(position, depth, pre_evaluation=float("inf"))
+
     def put_disk(self, othello, depth=5):
-        # print()
-        # print()
-        # print("initial call")
-        black_board, white_board = othello.board.return_board()
-        turn = othello.turn
-        self._player_clr = turn
+        self._player_clr = othello.turn
+        self._table = shared_table("minmax-new", self._table_mb)
+        self._table.new_search()
+        self._root_depth = depth
         self._count_pass = 0
         self._othello = othello
-        # x = self.min_max(black_board, white_board, turn, depth, pre_evaluation=float("inf"))[1]
-        # print(x)
-        # return int(x)
-        return int(
-            self.min_max(
-                black_board, white_board, turn,
-                depth, pre_evaluation=float("inf"),
-                )[1])
+        move_time = self.move_time(othello)
+        if move_time is None:
+            selected = self.min_max(
+                othello.return_position(), depth,
+                pre_evaluation=float("inf"),
+                )[1]
+        else:
+            selected = self.iterative_deepening(othello, move_time)
+        # Results of a search cut by the deadline are complete subtrees,
+        # so they are saved as well.
+        self.update_file()
+        return int(selected)
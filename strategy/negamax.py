@@ -0,0 +1,316 @@
+"""Negamax alpha-beta search with principal variation search."""
+from logging import getLogger
+import math
+
+from bitboard.symmetry import unique_moves
+
+from .batch import children, leaf_values
+from .minmax import Minmax
+from .probcut import MIN_DEPTH
+from .transposition import INFINITY, NO_MOVE, shared_table
+
+logger = getLogger(__name__)
+
+_FULL_BOARD = 0xffffffffffffffff
+
+
+class Negamax(Minmax):
+    """Find a better move by negamax alpha-beta method.
+
+    Every node is evaluated from the side of the player on turn, so one
+    branch serves both players. The first move of a node is searched with
+    the full window and the others with a null window, which are searched
+    again only if they turn out to be better. Bounds are fail-soft, and a
+    pass does not consume depth.
+
+    Parameters
+    ----------
+    table : TranspositionTable (optional)
+        Table of search results. The table shared in the process is used
+        by default, so results are kept over moves and games.
+    ordering : MoveOrdering (optional)
+        See Minmax.
+    time_limit, game_time : float (optional)
+        See Minmax. Iterations after the first two are searched with an
+        aspiration window around the last evaluation.
+    probcut : ProbCut (optional)
+        Subtrees of null window searches are cut by Multi-ProbCut if it is
+        given. The table of the process is then separated from the one of
+        the full-width search.
+    evaluator : PatternEvaluator (optional)
+        See Minmax. The table of the process is separated as well.
+    batch : bool
+        See Minmax.
+
+    Attributes
+    ----------
+    nodes : int
+        Number of nodes visited by the last put_disk.
+    probcut_cuts : int
+        Number of subtrees cut by Multi-ProbCut in the last put_disk.
+    """
+
+    __all__ = [
+        "put_disk", "search", "move_time", "start_move",
+        "iterative_deepening",
+        ]
+
+    # Half width of the aspiration window.
+    ASPIRATION_WINDOW = 16
+
+    def __init__(
+            self, table=None, ordering=None, time_limit=None, game_time=None,
+            probcut=None, evaluator=None, batch=False,
+            ):
+        super().__init__(ordering, time_limit, game_time, evaluator, batch)
+        if table is None:
+            name = "negamax"
+            if probcut is not None:
+                name += "-probcut"
+            if evaluator is not None:
+                name += "-pattern"
+            table = shared_table(name)
+        self._table = table
+        self._probcut = probcut
+        self.nodes = 0
+        self.probcut_cuts = 0
+
+    def final_value(self, disk_difference):
+        """Evaluate a finished game from the side of the player on turn."""
+        if disk_difference > 0:
+            return self.WIN_VALUE
+        if disk_difference < 0:
+            return -self.WIN_VALUE
+        return 0
+
+    def negamax(self, position, depth, alpha, beta):
+        """Return the evaluation from the side of the player on turn.
+
+        Parameters
+        ----------
+        position : Position
+            Moves are made and undone in place.
+        depth : int
+            Remaining depth of search.
+        alpha, beta : float
+            Search window. A returned value not greater than alpha is an
+            upper bound, and a value not less than beta is a lower bound.
+        """
+        self.nodes += 1
+        if self._deadline is not None:
+            self._check_deadline()
+
+        # Game is over when the board is filled.
+        if not (position.player | position.opponent) ^ _FULL_BOARD:
+            player_count, opponent_count = position.count_disks()
+            return self.final_value(player_count - opponent_count)
+
+        if depth == 0:
+            return self.evaluate_value(position.player, position.opponent)
+
+        entry = self._table.probe(position.hash)
+        if entry is None:
+            first = NO_MOVE
+        else:
+            lower, upper, first, stored_depth = entry
+            if stored_depth >= depth:
+                if lower >= beta or lower == upper:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha = max(alpha, lower)
+                beta = min(beta, upper)
+
+        reversible, must_pass, game_over, disk_difference = position.expand()
+        if game_over:
+            return self.final_value(disk_difference)
+        if must_pass:
+            position.pass_()
+            evaluation = -self.negamax(position, depth, -beta, -alpha)
+            position.undo()
+            return evaluation
+
+        if self._probcut is not None and depth >= MIN_DEPTH \
+                and beta - alpha == 1:
+            cut = self._probcut_test(position, depth, alpha, beta)
+            if cut is not None:
+                self.probcut_cuts += 1
+                return cut
+
+        ordering = self._ordering
+        if first == NO_MOVE and depth >= ordering.iid_depth:
+            # Internal iterative deepening finds the first move.
+            self.negamax(position, depth-2, alpha, beta)
+            entry = self._table.probe(position.hash)
+            if entry is not None:
+                first = entry[2]
+
+        ordering.searched(depth)
+        moves = ordering.order(
+            position.player, position.opponent, reversible, position.ply,
+            depth, first)
+        if depth == 1 and self._batch is not None:
+            # Children are evaluated at once, and bounds are applied below.
+            values = self._frontier_values(position, moves)
+        else:
+            values = None
+        alpha_start = alpha
+        best = -float("inf")
+        for index, (candidate, put_loc) in enumerate(moves):
+            if values is not None:
+                evaluation = values[index]
+            else:
+                position.play(put_loc)
+                if index == 0:
+                    evaluation = -self.negamax(
+                        position, depth-1, -beta, -alpha)
+                else:
+                    evaluation = -self.negamax(
+                        position, depth-1, -alpha-1, -alpha)
+                    if alpha < evaluation < beta:
+                        evaluation = -self.negamax(
+                            position, depth-1, -beta, -evaluation)
+                position.undo()
+
+            if evaluation > best:
+                best = evaluation
+                selected = candidate
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        ordering.cutoff(candidate, position.ply, depth, index)
+                        break
+
+        if best <= alpha_start:
+            self._table.store(position.hash, depth, -INFINITY, best, selected)
+        elif best >= beta:
+            self._table.store(position.hash, depth, best, INFINITY, selected)
+        else:
+            self._table.store(position.hash, depth, best, best, selected)
+        return best
+
+    def _probcut_test(self, position, depth, alpha, beta):
+        """Returns beta or alpha if a shallow search predicts a cutoff.
+
+        The deep value is predicted over beta if the shallow value is not
+        less than (beta + margin - intercept) / slope, and under alpha if
+        it is not greater than (alpha - margin - intercept) / slope. Both
+        are tested by null window searches.
+        """
+        check = self._probcut.check(position.player, position.opponent, depth)
+        if check is None:
+            return None
+        shallow, slope, intercept, margin = check
+        if beta < self.WIN_VALUE:
+            bound = math.ceil((beta + margin - intercept) / slope)
+            if self.negamax(position, shallow, bound-1, bound) >= bound:
+                return beta
+        if alpha > -self.WIN_VALUE:
+            bound = math.floor((alpha - margin - intercept) / slope)
+            if self.negamax(position, shallow, bound, bound+1) <= bound:
+                return alpha
+        return None
+
+    def _frontier_values(self, position, moves):
+        """Evaluate the children of a node of depth 1 from the side of the
+        player on turn, in the order of moves."""
+        mover, other = children(
+            position.player, position.opponent,
+            [put_loc for _, put_loc in moves])
+        self.nodes += len(moves)
+        return [
+            -value
+            for value in leaf_values(self._batch, other, mover, self.WIN_VALUE)
+        ]
+
+    def search(
+            self, position, depth, alpha=-float("inf"), beta=float("inf"),
+            ):
+        """Return the evaluation and the selected move of the root.
+
+        Parameters
+        ----------
+        position : Position
+            Board whose player on turn has a legal move.
+        depth : int
+            Depth of search, 1 or more.
+        alpha, beta : float
+            Search window. If the evaluation is out of it, the evaluation
+            is a bound and the move may not be the best.
+
+        Returns
+        -------
+        evaluation : int
+            Evaluation from the side of the player on turn.
+        selected : int
+            Integer from 0 to 63.
+        """
+        reversible = position.reversible_area()
+        # Symmetric moves at the root lead to symmetric boards.
+        reversible = unique_moves(
+            position.player, position.opponent, reversible)
+        entry = self._table.probe(position.hash)
+        first = NO_MOVE if entry is None else entry[2]
+
+        alpha_start = alpha
+        best = -float("inf")
+        for index, (candidate, put_loc) in enumerate(self._ordering.order(
+                position.player, position.opponent, reversible,
+                position.ply, depth, first)):
+            position.play(put_loc)
+            if index == 0:
+                evaluation = -self.negamax(position, depth-1, -beta, -alpha)
+            else:
+                evaluation = -self.negamax(
+                    position, depth-1, -alpha-1, -alpha)
+                if alpha < evaluation < beta:
+                    evaluation = -self.negamax(
+                        position, depth-1, -beta, -evaluation)
+            position.undo()
+
+            if evaluation > best:
+                best = evaluation
+                selected = candidate
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_start:
+            self._table.store(position.hash, depth, -INFINITY, best, selected)
+        elif best >= beta:
+            self._table.store(position.hash, depth, best, INFINITY, selected)
+        else:
+            self._table.store(position.hash, depth, best, best, selected)
+        return best, selected
+
+    def _iterate(self, position, depth, previous):
+        """Search with an aspiration window, and again if it fails."""
+        if depth < 3 or previous is None:
+            return self.search(position, depth)
+        alpha = previous - self.ASPIRATION_WINDOW
+        beta = previous + self.ASPIRATION_WINDOW
+        evaluation, selected = self.search(position, depth, alpha, beta)
+        if alpha < evaluation < beta:
+            return evaluation, selected
+        return self.search(position, depth)
+
+    def put_disk(self, othello, depth=4):
+        self.nodes = 0
+        self.probcut_cuts = 0
+        self._table.new_search()
+        self._ordering.new_search()
+        move_time = self.move_time(othello)
+        if move_time is None:
+            evaluation, selected = self.search(
+                othello.return_position(), depth)
+            logger.debug(
+                "Negamax searched %d nodes to depth %d (evaluation %s)."
+                % (self.nodes, depth, evaluation))
+        else:
+            selected = self.iterative_deepening(othello, move_time)
+            logger.debug("Negamax searched %d nodes." % self.nodes)
+        if self._probcut is not None:
+            logger.debug("ProbCut cut %d subtrees." % self.probcut_cuts)
+        self._ordering.log_statistics()
+        return selected
@@ -0,0 +1,149 @@
+"""
+Move ordering of alpha-beta search.
+
+Alpha-beta search cuts off more when the best move is searched first.
+Moves are ordered by the move of the transposition table, killer moves
+which cut off at the same ply, the history of cutoffs of every square, and
+the mobility of the opponent after the move. Nodes and cutoffs are counted
+for every depth, so that the effect can be measured.
+"""
+from logging import getLogger
+
+from bitboard import BitBoard
+
+from .transposition import NO_MOVE
+
+logger = getLogger(__name__)
+
+MAX_PLY = 128
+
+
+class MoveOrdering:
+    """Order moves and learn from cutoffs.
+
+    Parameters
+    ----------
+    killers : int
+        Number of killer moves kept for every ply.
+    mobility_depth : int
+        Moves are ordered by mobility of the opponent if the remaining
+        depth is not less than this. It costs a move generation for every
+        move.
+    iid_depth : int
+        Searches are expected to find the first move by internal iterative
+        deepening, a search 2 plies shallower, if the transposition table
+        has no move and the remaining depth is not less than this.
+
+    Attributes
+    ----------
+    nodes, cutoffs, first_cutoffs : list of int
+        Numbers of searched nodes, cutoffs, and cutoffs by the first move
+        for every remaining depth.
+    """
+
+    __all__ = [
+        "order", "cutoff", "searched", "new_search", "log_statistics",
+        ]
+
+    def __init__(
+            self, killers: int = 2, mobility_depth: int = 3,
+            iid_depth: int = 5,
+            ):
+        self.mobility_depth = mobility_depth
+        self.iid_depth = iid_depth
+        self._killers = [[NO_MOVE] * killers for _ in range(MAX_PLY)]
+        self._history = [0] * 64
+        self.nodes = [0] * MAX_PLY
+        self.cutoffs = [0] * MAX_PLY
+        self.first_cutoffs = [0] * MAX_PLY
+
+    def new_search(self):
+        """Forget killers and age the history before a new search."""
+        for killers in self._killers:
+            killers[:] = [NO_MOVE] * len(killers)
+        self._history = [value >> 1 for value in self._history]
+        self.nodes = [0] * MAX_PLY
+        self.cutoffs = [0] * MAX_PLY
+        self.first_cutoffs = [0] * MAX_PLY
+
+    def order(
+            self, player: int, opponent: int, reversible: int, ply: int,
+            depth: int, first: int = NO_MOVE,
+            ):
+        """Returns (square, put_loc) of moves in order to search.
+
+        Parameters
+        ----------
+        player, opponent : int
+            64-bit intager of the player on turn and the opponent.
+        reversible : int
+            Legal moves of the player on turn.
+        ply : int
+            Plies from the root.
+        depth : int
+            Remaining depth of search.
+        first : int
+            Move of the transposition table, which comes first.
+        """
+        moves = []
+        if first != NO_MOVE and reversible >> first & 1:
+            moves.append((first, 1 << first))
+            reversible ^= 1 << first
+        for killer in self._killers[ply]:
+            if killer != NO_MOVE and reversible >> killer & 1:
+                moves.append((killer, 1 << killer))
+                reversible ^= 1 << killer
+
+        history = self._history
+        if depth >= self.mobility_depth:
+            others = []
+            for square, put_loc in BitBoard.iter_moves(reversible):
+                reverse_bit = BitBoard._reverse_by_table(
+                    player, opponent, put_loc)
+                mobility = BitBoard._bit_count(BitBoard._reversible_area(
+                    opponent ^ reverse_bit, player ^ (put_loc | reverse_bit)))
+                others.append((mobility, -history[square], square, put_loc))
+        else:
+            others = [
+                (-history[square], square, put_loc)
+                for square, put_loc in BitBoard.iter_moves(reversible)
+            ]
+        others.sort()
+        moves.extend(move[-2:] for move in others)
+        return moves
+
+    def searched(self, depth: int):
+        """Count a node whose moves are searched."""
+        self.nodes[depth] += 1
+
+    def cutoff(self, square: int, ply: int, depth: int, index: int):
+        """Learn from a move which caused a cutoff.
+
+        Parameters
+        ----------
+        square : int
+            The move from 0 to 63.
+        ply, depth : int
+            Plies from the root and remaining depth.
+        index : int
+            Order of the move in the node, 0 for the first move.
+        """
+        killers = self._killers[ply]
+        if killers[0] != square:
+            killers[1:] = killers[:-1]
+            killers[0] = square
+        self._history[square] += depth * depth
+        self.cutoffs[depth] += 1
+        if index == 0:
+            self.first_cutoffs[depth] += 1
+
+    def log_statistics(self):
+        """Log nodes and cutoff rates of every depth."""
+        for depth, nodes in enumerate(self.nodes):
+            if nodes:
+                logger.debug(
+                    "depth %d: %d nodes, %.1f%% cut off, %.1f%% of them "
+                    "by the first move." % (
+                        depth, nodes, 100 * self.cutoffs[depth] / nodes,
+                        100 * self.first_cutoffs[depth]
+                        / max(self.cutoffs[depth], 1)))
@@ -0,0 +1,215 @@
+"""
+Negamax search whose root moves are split over processes.
+
+The first root move is searched in the main process, and its value is the
+alpha shared by all workers in a multiprocessing.Value. Each worker tests
+one of the other moves with a null window on the shared alpha, and
+searches it again with an open window only if it is better. When another
+worker raises the shared alpha, a worker whose test has become too weak
+restarts on the new alpha instead of finishing the weak test. The deadline
+of iterative deepening is sent to the workers by the wall clock, and the
+number of the search with every task, so that workers age their tables as
+the main process does at every move.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+import multiprocessing
+import os
+import time
+
+from bitboard import Position
+from bitboard.symmetry import unique_moves
+
+from .negamax import Negamax
+from .timecontrol import SearchTimeout
+from .transposition import INFINITY, NO_MOVE
+
+logger = getLogger(__name__)
+
+# Shared alpha, the engine of a worker process and the number of its
+# search.
+_shared_alpha = None
+_worker_engine = None
+_worker_search = None
+
+
+class _Aborted(Exception):
+    """The shared alpha was raised over the bound of a worker."""
+
+
+class _WorkerNegamax(Negamax):
+    """Negamax which aborts if the shared alpha exceeds its bound."""
+
+    def __init__(self):
+        super().__init__()
+        self.bound = -float("inf")
+
+    def negamax(self, position, depth, alpha, beta):
+        if not self.nodes & 0xff and _shared_alpha.value > self.bound:
+            raise _Aborted
+        return super().negamax(position, depth, alpha, beta)
+
+
+def _initialize_worker(shared_alpha):
+    global _shared_alpha, _worker_engine
+    _shared_alpha = shared_alpha
+    _worker_engine = _WorkerNegamax()
+
+
+def _search_move(parameter):
+    """Returns the value of a root move, and whether it is better.
+
+    A value which is not better is an upper bound not greater than the
+    shared alpha. The value is None if the time ran out.
+    """
+    global _worker_search
+    player, opponent, turn, square, depth, beta, deadline, search = parameter
+    engine = _worker_engine
+    if search != _worker_search:
+        # A new move was started, as put_disk starts a search.
+        engine._table.new_search()
+        engine._ordering.new_search()
+        _worker_search = search
+    engine.nodes = 0
+    if deadline is not None:
+        # The deadline is sent by the wall clock, which all processes
+        # share, and a task may wait in the queue before it starts.
+        engine._deadline = time.perf_counter() + deadline - time.time()
+    try:
+        while True:
+            position = Position(player, opponent, turn)
+            position.play(1 << square)
+            alpha = engine.bound = _shared_alpha.value
+            try:
+                evaluation = -engine.negamax(
+                    position, depth-1, -alpha-1, -alpha)
+                if evaluation <= alpha:
+                    return evaluation, False, engine.nodes
+                if alpha + 1 < beta:
+                    evaluation = -engine.negamax(
+                        position, depth-1, -beta, -alpha)
+            except _Aborted:
+                continue
+            with _shared_alpha.get_lock():
+                if evaluation > _shared_alpha.value:
+                    _shared_alpha.value = evaluation
+            return evaluation, True, engine.nodes
+    except SearchTimeout:
+        return None, False, engine.nodes
+    finally:
+        engine._deadline = None
+
+
+class ParallelNegamax(Negamax):
+    """Negamax whose root moves are searched by worker processes.
+
+    Parameters
+    ----------
+    workers : int (optional)
+        Number of worker processes. The number of CPUs by default.
+    depth : int
+        Depth of put_disk.
+    parallel_depth : int
+        Shallower searches are not split, because starting tasks costs
+        more than the search.
+    time_limit, game_time : float (optional)
+        See Negamax. If either is given, depth is not used.
+
+    Notes
+    -----
+    Worker processes are started by the first split search and kept, with
+    their transposition tables, until close is called.
+    """
+
+    __all__ = ["put_disk", "search", "close"]
+
+    def __init__(
+            self, workers: int = None, depth: int = 6,
+            parallel_depth: int = 4, time_limit: float = None,
+            game_time: float = None,
+            ):
+        super().__init__(time_limit=time_limit, game_time=game_time)
+        self._workers = workers or os.cpu_count() or 1
+        self._depth = depth
+        self._parallel_depth = parallel_depth
+        self._executor = None
+        self._shared_alpha = None
+        # Number of put_disk calls, sent to the workers.
+        self._search_number = 0
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def search(
+            self, position, depth, alpha=-float("inf"), beta=float("inf"),
+            ):
+        """Return the evaluation and the selected move of the root.
+
+        See Negamax.search.
+        """
+        reversible = unique_moves(
+            position.player, position.opponent, position.reversible_area())
+        entry = self._table.probe(position.hash)
+        first = NO_MOVE if entry is None else entry[2]
+        moves = self._ordering.order(
+            position.player, position.opponent, reversible,
+            position.ply, depth, first)
+        if depth < self._parallel_depth or len(moves) < 2:
+            return super().search(position, depth, alpha, beta)
+
+        # The first move gives alpha to the workers.
+        alpha_start = alpha
+        selected, put_loc = moves[0]
+        position.play(put_loc)
+        best = -self.negamax(position, depth-1, -beta, -alpha)
+        position.undo()
+        if best >= beta:
+            self._table.store(position.hash, depth, best, INFINITY, selected)
+            return best, selected
+
+        if self._executor is None:
+            self._shared_alpha = multiprocessing.Value("d")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, initializer=_initialize_worker,
+                initargs=(self._shared_alpha,))
+        self._shared_alpha.value = max(alpha, best)
+
+        deadline = None
+        if self._deadline is not None:
+            deadline = time.time() + self._deadline - time.perf_counter()
+        parameters = [
+            (position.player, position.opponent, position.turn, square,
+             depth, beta, deadline, self._search_number)
+            for square, _ in moves[1:]
+        ]
+        results = self._executor.map(_search_move, parameters)
+        timeout = False
+        # Moves which are exactly as good as alpha fail low, so the move
+        # found first keeps the place.
+        for (square, _), (evaluation, better, nodes) in zip(
+                moves[1:], results):
+            self.nodes += nodes
+            if evaluation is None:
+                timeout = True
+            elif better and evaluation > best:
+                best = evaluation
+                selected = square
+        if timeout:
+            raise SearchTimeout
+
+        if best <= alpha_start:
+            self._table.store(position.hash, depth, -INFINITY, best, selected)
+        elif best >= beta:
+            self._table.store(position.hash, depth, best, INFINITY, selected)
+        else:
+            self._table.store(position.hash, depth, best, best, selected)
+        return best, selected
+
+    def put_disk(self, othello, depth=None):
+        if depth is None:
+            depth = self._depth
+        self._search_number += 1
+        return super().put_disk(othello, depth)
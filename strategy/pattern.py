@@ -0,0 +1,316 @@
+"""
+Evaluation by patterns of squares.
+
+A pattern is a set of squares, such as an edge with its X-squares, and its
+weight table has an entry for every one of the 3^n states of the squares.
+The instances of a pattern made by reflections and rotations share the
+table. Boards are evaluated by a function which strategy.specialize
+generates from the squares of the instances, so that other patterns are
+evaluated as fast without code for them.
+
+Weights are int16 in a binary file, which is memory-mapped read-only, so
+the processes of matching.py share the pages of one file. The file is
+generated from strategy/pattern_weights.gz, the weights which
+fit_patterns.py fitted to the results of self-play games, when it is
+missing or older. Without fitted weights, weights are seeded from the
+square tables. Seeded weights do not evaluate boards as the tables do,
+since phases go by the number of disks, while the tables switch when a
+disk touches the border. Minmax and Negamax search with the evaluator
+given by their evaluator argument.
+"""
+from array import array
+import gzip
+from logging import getLogger
+import mmap
+import os
+import struct
+import sys
+
+from bitboard.symmetry import INVERSE_MAP
+
+from .evaluation import SQUARE_TABLES
+from .specialize import pattern_function
+
+logger = getLogger(__name__)
+
+WEIGHT_FILE = os.path.join(os.path.dirname(__file__), "pattern_weights.bin")
+FITTED_FILE = os.path.join(os.path.dirname(__file__), "pattern_weights.gz")
+
+_MAGIC = b"OTHPATRN"
+_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+
+# Weights are SCALE times the evaluation.
+SCALE = 16
+# Phases of the game by the number of disks.
+PHASES = 4
+
+# Squares of patterns, in the order of digits of the index. The squares of
+# the other instances are the squares after the transforms of the board.
+PATTERNS = [
+    ("edge+2x", [0, 1, 2, 3, 4, 5, 6, 7, 9, 14]),
+    ("corner3x3", [0, 1, 2, 8, 9, 10, 16, 17, 18]),
+    ("corner2x5", [0, 1, 2, 3, 4, 8, 9, 10, 11, 12]),
+    ("diagonal8", [row*9 for row in range(8)]),
+    ("diagonal7", [row*9 + 1 for row in range(7)]),
+    ("diagonal6", [row*9 + 2 for row in range(6)]),
+    ("diagonal5", [row*9 + 3 for row in range(5)]),
+    ("diagonal4", [row*9 + 4 for row in range(4)]),
+]
+
+
+def _symmetric_instances(squares: list):
+    """Returns the squares of the distinct instances of a pattern made by
+    the transforms of bitboard.symmetry."""
+    instances = []
+    for inverse in INVERSE_MAP:
+        instance = [inverse[square] for square in squares]
+        if set(instance) not in [set(other) for other in instances]:
+            instances.append(instance)
+    return instances
+
+
+def instances():
+    """Returns the squares of the instances of every pattern.
+
+    The squares of an instance are the squares of the pattern after a
+    transform, in the order of digits of the pattern.
+    """
+    return [_symmetric_instances(squares) for _, squares in PATTERNS]
+
+
+def phase(disks: int):
+    """Returns the phase of the game from 0 to PHASES - 1.
+
+    Parameters
+    ----------
+    disks : int
+        Number of disks on the board.
+    """
+    return min((disks - 4) * PHASES // 60, PHASES - 1)
+
+
+def seeded_weights():
+    """Returns weights seeded from the square tables, as an array of int16.
+
+    The weight of a state is the sum of the table weights of its disks,
+    divided by the number of instances covering each square. The first
+    phase is seeded from the table used before a disk touches the border,
+    and the others from the table used after. As the phases go by the
+    number of disks, boards of the first phase with a disk on the border
+    are evaluated differently from the tables.
+
+    Weights of a pattern which a reflection maps onto itself, such as an
+    edge, must not change under the reflection, or symmetric boards are
+    evaluated differently. Seeded weights are symmetric.
+    """
+    coverage = [0] * 64
+    for pattern in instances():
+        for instance in pattern:
+            for square in instance:
+                coverage[square] += 1
+
+    weights = array("h")
+    for number in range(PHASES):
+        table = SQUARE_TABLES[0 if number == 0 else 1]
+        for _, squares in PATTERNS:
+            # The first square is the lowest digit.
+            values = [0.0]
+            for square in squares:
+                value = table[square] / coverage[square]
+                values = [
+                    previous + term for term in (0.0, value, -value)
+                    for previous in values
+                ]
+            weights.extend(round(SCALE * value) for value in values)
+    return weights
+
+
+def fitted_weights(filename: str = FITTED_FILE):
+    """Returns the weights written by write_fitted, as an array of int16.
+
+    Parameters
+    ----------
+    filename : str
+    """
+    with gzip.open(filename, "rb") as file_:
+        data = file_.read()
+    magic, version, phases = _HEADER.unpack_from(data)
+    weights = array("h")
+    weights.frombytes(data[_HEADER.size:])
+    size = sum(3 ** len(squares) for _, squares in PATTERNS)
+    if magic != _MAGIC or version != _VERSION or phases != PHASES \
+            or len(weights) != PHASES * size:
+        raise ValueError("%s is not a weight file of patterns." % filename)
+    # Weights are little-endian as the header.
+    if sys.byteorder == "big":
+        weights.byteswap()
+    return weights
+
+
+def write_fitted(weights: array, filename: str = FITTED_FILE):
+    """Write fitted weights to a compressed file, which is kept in the
+    repository and read by fitted_weights.
+
+    Parameters
+    ----------
+    weights : array of int16
+        Weights of the tables of PATTERNS for every phase, SCALE times the
+        evaluation.
+    filename : str
+    """
+    weights = array("h", weights)
+    if sys.byteorder == "big":
+        weights.byteswap()
+    temporary = "%s.%d" % (filename, os.getpid())
+    # The time is not written, so that the same weights give the same file.
+    with open(temporary, "wb") as raw, \
+            gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as file_:
+        file_.write(_HEADER.pack(_MAGIC, _VERSION, PHASES))
+        file_.write(weights.tobytes())
+    os.replace(temporary, filename)
+
+
+def default_weights():
+    """Returns the fitted weights of FITTED_FILE, or seeded weights if it
+    does not exist."""
+    if os.path.exists(FITTED_FILE):
+        return fitted_weights()
+    return seeded_weights()
+
+
+def generate_weights(filename: str = WEIGHT_FILE):
+    """Write a weight file of the default weights, see default_weights."""
+    write_weights(default_weights(), filename)
+
+
+def write_weights(weights: array, filename: str = WEIGHT_FILE):
+    """Write a weight file.
+
+    Parameters
+    ----------
+    weights : array of int16
+        Weights of the tables of PATTERNS for every phase, SCALE times the
+        evaluation.
+    filename : str
+    """
+    # Written to a temporary file first, since other processes may read.
+    temporary = "%s.%d" % (filename, os.getpid())
+    with open(temporary, "wb") as file_:
+        file_.write(_HEADER.pack(_MAGIC, _VERSION, PHASES))
+        weights.tofile(file_)
+    os.replace(temporary, filename)
+
+
+class PatternEvaluator:
+    """Evaluate boards by patterns whose weights are in a file.
+
+    Parameters
+    ----------
+    filename : str
+        Weight file. It is generated from the default weights if it does
+        not exist or is older than FITTED_FILE. If it can not be written,
+        the default weights are kept in memory instead.
+
+    Notes
+    -----
+    Weights are in the byte order of the machine, as the file is generated
+    where it is used.
+    """
+
+    __all__ = ["evaluate", "close"]
+
+    def __init__(self, filename: str = WEIGHT_FILE):
+        size = sum(3 ** len(squares) for _, squares in PATTERNS)
+        self._map = None
+        if not self._outdated(filename):
+            self._weights = self._map_file(filename, size)
+        else:
+            weights = default_weights()
+            try:
+                write_weights(weights, filename)
+            except OSError as error:
+                logger.warning(
+                    "%s was not written (%s). Weights are kept in memory."
+                    % (filename, error))
+                self._weights = memoryview(weights)
+            else:
+                self._weights = self._map_file(filename, size)
+
+        # _offsets[phase] are the offsets of the tables of patterns, and
+        # _bases[disks] is the offset of the phase of the number of disks.
+        self._offsets = []
+        for number in range(PHASES):
+            offsets = []
+            offset = number * size
+            for _, squares in PATTERNS:
+                offsets.append(offset)
+                offset += 3 ** len(squares)
+            self._offsets.append(offsets)
+        self._bases = [phase(disks) * size for disks in range(65)]
+        self._evaluate = pattern_function(
+            instances(), self._offsets[0], self._bases, SCALE, self._weights)
+
+    @staticmethod
+    def _outdated(filename: str):
+        """Returns True if the weight file is missing or older than the
+        fitted weights."""
+        if not os.path.exists(filename):
+            return True
+        return os.path.exists(FITTED_FILE) \
+            and os.path.getmtime(filename) < os.path.getmtime(FITTED_FILE)
+
+    def _map_file(self, filename: str, size: int):
+        """Returns the weights of the file, which is memory-mapped.
+
+        Parameters
+        ----------
+        size : int
+            Number of weights of a phase.
+        """
+        with open(filename, "rb") as file_:
+            self._map = mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, phases = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION or phases != PHASES \
+                or len(self._map) != _HEADER.size + 2 * PHASES * size:
+            self._map.close()
+            raise ValueError("%s is not a weight file of patterns." % filename)
+        return memoryview(self._map)[_HEADER.size:].cast("h")
+
+    def close(self):
+        """Unmap the weight file. The evaluator is not usable after it.
+
+        If arrays such as the ones of PatternBatch still use the weights,
+        the file is unmapped when the last of them is freed.
+        """
+        if self._weights is None:
+            return
+        self._evaluate = None
+        weights, self._weights = self._weights, None
+        map_, self._map = self._map, None
+        try:
+            weights.release()
+            if map_ is not None:
+                map_.close()
+        except BufferError:
+            pass
+
+    def evaluate(self, player_board: int, opponent_board: int):
+        """Evaluate the board from the side of the player.
+
+        Parameters
+        ----------
+        player_board, opponent_board : int
+            64-bit intager of the player and the opponent.
+        """
+        return self._evaluate(player_board, opponent_board)
+
+
+_evaluators = {}
+
+
+def shared_evaluator(filename: str = WEIGHT_FILE):
+    """Returns the evaluator of the file, opened once in a process."""
+    if filename not in _evaluators:
+        _evaluators[filename] = PatternEvaluator(filename)
+    return _evaluators[filename]
@@ -10,8 +10,5 @@ class Random:
 
     def put_disk(self, othello):
         """Put disk randomly."""
-        candidates = []
-        for num in range(64):
-            if (pow(2, num)) & othello.reversible:
-                candidates.append(num)
+        candidates = othello.board.move_list(othello.reversible)
         return random.choice(candidates)
@@ -0,0 +1,280 @@
+"""
+Evaluators generated as straight-line Python.
+
+A generic evaluator loops over rows, tables and patterns, and looks up
+attributes and nested lists on every call. The factories here write the
+source of a function for given weights instead, with masks, shifts and
+offsets as literals and every lookup unrolled, and compile it. Tables of
+the function are default values of its arguments, so they are local
+variables.
+
+Sources are cached in CACHE_DIR by a hash of what they are generated from,
+and imported from there, so that Python caches their byte code as well. The
+cache only makes startup faster: if it can not be written, sources are
+compiled in memory.
+"""
+import hashlib
+import importlib.util
+from logging import getLogger
+import os
+import types
+
+logger = getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "generated")
+
+# A change of the generated code must change this, as it is in the keys
+# of the cache.
+_GENERATOR_VERSION = 1
+_BORDER = 0xff818181818181ff
+_COLLAPSE = 0x0101010101010101
+_FLIP_DIAGONAL = [
+    (0x0f0f0f0f00000000, 28), (0x3333000033330000, 14),
+    (0x5500550055005500, 7),
+]
+
+# Modules loaded in the process, by name.
+_modules = {}
+
+
+def _load(prefix: str, key, write_source):
+    """Returns the module of the key, whose source is written by
+    write_source() if the cache does not have it.
+
+    A module is loaded once in a process.
+    """
+    digest = hashlib.sha1(
+        repr((_GENERATOR_VERSION, key)).encode()).hexdigest()[:16]
+    name = "%s_%s" % (prefix, digest)
+    if name in _modules:
+        return _modules[name]
+    path = os.path.join(CACHE_DIR, name + ".py")
+    try:
+        if not os.path.exists(path):
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Written to a temporary file first, since other processes may
+            # read.
+            temporary = "%s.%d" % (path, os.getpid())
+            with open(temporary, "w") as file_:
+                file_.write(write_source())
+            os.replace(temporary, path)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except OSError as error:
+        logger.warning(
+            "%s was not cached (%s). It is compiled in memory." % (
+                path, error))
+        module = types.ModuleType(name)
+        exec(compile(write_source(), path, "exec"), module.__dict__)
+    _modules[name] = module
+    return module
+
+
+class _Source:
+    """Tables and lines of a generated module."""
+
+    def __init__(self):
+        self._tables = {}
+
+    def table(self, values):
+        """Returns the name of a table, shared by equal tables."""
+        values = tuple(values)
+        if values not in self._tables:
+            self._tables[values] = "_t%d" % len(self._tables)
+        return self._tables[values]
+
+    def arguments(self):
+        """Returns default arguments which make the tables local."""
+        return "".join(
+            ", %s=%s" % (name, name) for name in self._tables.values())
+
+    def text(self, lines: list):
+        header = ["# Generated by strategy.specialize. Do not edit."]
+        header.extend(
+            "%s = %r" % (name, values)
+            for values, name in self._tables.items())
+        return "\n".join(header + [""] + lines) + "\n"
+
+
+def _sum(terms: list, indent: str):
+    """Returns lines of the sum of terms, which are (sign, expression)."""
+    lines = []
+    for sign, expression in terms:
+        if not lines:
+            sign = "" if sign == "+" else "-"
+        else:
+            sign += " "
+        lines.append("%s%s%s" % (indent, sign, expression))
+    return lines
+
+
+def table_function(tables: list):
+    """Returns a function which evaluates boards by square tables.
+
+    Parameters
+    ----------
+    tables : list of list of int
+        Weights of squares before and after a disk touches the border, as
+        Minmax.evaluate_value uses.
+
+    Returns
+    -------
+    evaluate : function
+        evaluate(player_board, opponent_board) is the evaluation from the
+        side of the player.
+    """
+    tables = [list(table) for table in tables]
+
+    def write_source():
+        source = _Source()
+        sums = []
+        for table in tables:
+            terms = []
+            for row in range(8):
+                weights = table[row*8:row*8 + 8]
+                if not any(weights):
+                    continue
+                name = source.table(
+                    sum(weights[col] for col in range(8) if byte >> col & 1)
+                    for byte in range(256))
+                shift = " >> 56" if row == 7 else " >> %d & 0xff" % (row * 8)
+                if not row:
+                    shift = " & 0xff"
+                terms.append(("+", "%s[player_board%s]" % (name, shift)))
+                terms.append(("-", "%s[opponent_board%s]" % (name, shift)))
+            sums.append(terms or [("+", "0")])
+
+        lines = [
+            "def evaluate(player_board, opponent_board%s):"
+            % source.arguments(),
+            "    if (player_board | opponent_board) & %#x:" % _BORDER,
+            "        return (",
+        ]
+        lines.extend(_sum(sums[1], "            "))
+        lines.append("        )")
+        lines.append("    return (")
+        lines.extend(_sum(sums[0], "        "))
+        lines.append("    )")
+        return source.text(lines)
+
+    return _load("tables", tables, write_source).evaluate
+
+
+def _groups(instance: list):
+    """Returns groups of the squares of an instance, gathered into a byte.
+
+    Returns
+    -------
+    groups : list of tuple
+        (byte, digits) where byte is ("row", row) of the board, ("col",
+        col) of the board flipped about the diagonal, or ("gather", mask)
+        of squares of different columns. digits maps the bit of the byte
+        to the digit of the square.
+    """
+    rows = {square // 8 for square in instance}
+    cols = {square % 8 for square in instance}
+    if len(cols) == len(instance) and len(rows) > 1:
+        mask = sum(1 << square for square in instance)
+        return [(("gather", mask), {
+            square % 8: digit for digit, square in enumerate(instance)})]
+    groups = {}
+    for digit, square in enumerate(instance):
+        if len(rows) <= len(cols):
+            byte, bit = ("row", square // 8), square % 8
+        else:
+            byte, bit = ("col", square % 8), square // 8
+        groups.setdefault(byte, {})[bit] = digit
+    return sorted(groups.items())
+
+
+def pattern_function(instances: list, offsets: list, bases: list,
+                     scale: int, weights):
+    """Returns a function which evaluates boards by patterns.
+
+    Parameters
+    ----------
+    instances : list of list of list of int
+        Squares of the instances of every pattern, in the order of digits,
+        as strategy.pattern.instances.
+    offsets : list of int
+        Offsets of the tables of the patterns in the first phase.
+    bases : list of int
+        Offset of the phase of every number of disks from 0 to 64.
+    scale : int
+        Weights are scale times the evaluation.
+    weights : sequence of int
+        Weights which are looked up. They are not in the source.
+
+    Returns
+    -------
+    evaluate : function
+        evaluate(player_board, opponent_board) is the evaluation from the
+        side of the player.
+    """
+    key = (instances, offsets, bases, scale)
+
+    def write_source():
+        source = _Source()
+        bases_name = source.table(bases)
+        terms = []
+        used = set()
+        for pattern, offset in zip(instances, offsets):
+            for instance in pattern:
+                index = ["_base"]
+                for number, (byte, digits) in enumerate(_groups(instance)):
+                    values = [
+                        sum(3 ** digit for bit, digit in digits.items()
+                            if value >> bit & 1)
+                        for value in range(256)
+                    ]
+                    # The offset of the table is added to the first group.
+                    player = source.table(
+                        value + (0 if number else offset)
+                        for value in values)
+                    opponent = source.table(2 * value for value in values)
+                    kind, place = byte
+                    if kind == "gather":
+                        index.append("%s[(player_board & %#x) * %#x >> 56 "
+                                     "& 0xff]" % (player, place, _COLLAPSE))
+                        index.append("%s[(opponent_board & %#x) * %#x >> 56 "
+                                     "& 0xff]" % (opponent, place, _COLLAPSE))
+                    else:
+                        used.add(byte)
+                        index.append("%s[p%s%d]" % (player, kind, place))
+                        index.append("%s[o%s%d]" % (opponent, kind, place))
+                terms.append(("+", "_weights[%s]" % " + ".join(index)))
+
+        lines = [
+            "def bind(weights):",
+            "    def evaluate(player_board, opponent_board, _weights=weights"
+            "%s):" % source.arguments(),
+            "        _base = %s[bin(player_board | opponent_board)"
+            ".count(\"1\")]" % bases_name,
+        ]
+        if any(kind == "col" for kind, _ in used):
+            lines.append("        player, opponent = player_board, "
+                         "opponent_board")
+            for mask, shift in _FLIP_DIAGONAL:
+                for board in ("player", "opponent"):
+                    lines.append(
+                        "        temp = %#x & (%s ^ (%s << %d))"
+                        % (mask, board, board, shift))
+                    lines.append(
+                        "        %s ^= temp ^ (temp >> %d)"
+                        % (board, shift))
+        for kind, place in sorted(used):
+            for prefix, board in (("p", "player"), ("o", "opponent")):
+                if kind == "row":
+                    board += "_board"
+                shift = " >> %d" % (place * 8) if place else ""
+                mask = "" if place == 7 else " & 0xff"
+                lines.append("        %s%s%d = %s%s%s" % (
+                    prefix, kind, place, board, shift, mask))
+        lines.append("        return (")
+        lines.extend(_sum(terms, "            "))
+        lines.append("        ) // %d" % scale)
+        lines.append("    return evaluate")
+        return source.text(lines)
+
+    return _load("patterns", key, write_source).bind(weights)
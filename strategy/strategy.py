@@ -1,12 +1,21 @@
 """Various strategies for othello."""
+from logging import getLogger
+import time
 
-from bitboard import OthelloGame
+from bitboard import BitBoard, OthelloGame
 
+from .endgame import EndgameSolver
 from .maximize import Maximize
 from .minimize import Minimize
 from .minmax import Minmax
+from .negamax import Negamax
+from .parallel import ParallelNegamax
+from .pattern import shared_evaluator
 # from .minmax_fixing import MinmaxNew
 from .random import Random
+from .timecontrol import SearchTimeout
+
+logger = getLogger(__name__)
 
 
 class Strategy(OthelloGame):
@@ -17,15 +26,60 @@ class Strategy(OthelloGame):
     random : Put disk randomly.
     maximize : Put disk to maximize number of one's disks.
     minimize : Put disk to minimize number of one's disks.
+    min-max : Put disk found by min-max search.
+    negamax : Put disk found by negamax alpha-beta search.
+    negamax-parallel : Search deeper with negamax on every CPU.
+    negamax-pattern : Search with negamax, evaluating by fitted patterns.
     openness : Put disk based on openness theory.
     evenness : Put disk based on evenness theory.
+
+    Any strategy can solve the endgame exactly when few squares are empty,
+    and prove win, draw or loss a few plies before, see set_endgame. It is
+    enabled for searching strategies by default.
+
+    Searching strategies deepen the search until MOVE_TIME seconds pass.
+    The solvers are given ENDGAME_SHARE of MOVE_TIME, and the strategy
+    selects the move in the time left if they are not finished, so a move
+    takes MOVE_TIME whatever the board is. If MOVE_TIME is None, strategies
+    search to fixed depths and the solvers have no time limit, so that
+    moves do not depend on the speed of the machine, as in matching.py.
     """
+
+    # Empty squares from which searching strategies solve the endgame.
+    ENDGAME_EMPTIES = 12
+    WLD_EMPTIES = 16
+    MOVE_TIME = 1.0
+    ENDGAME_SHARE = 0.5
+
     def __init__(self, othello, strategy: str = "random"):
         self._othello = othello
         self._player_clr = othello.return_turn()
+        self._endgame = EndgameSolver()
         self.set_strategy(strategy)
 
+    def set_endgame(self, empties: int, wld_empties: int = 0):
+        """Solve the endgame when empty squares are not more than empties.
+
+        Parameters
+        ----------
+        empties : int
+            0 disables the exact endgame solver.
+        wld_empties : int
+            Win, draw or loss is proved when empty squares are not more
+            than this. The move is played if it wins or draws, and the
+            strategy selects the move otherwise. 0 disables it.
+        """
+        self._endgame_empties = empties
+        self._wld_empties = wld_empties
+
     def set_strategy(self, strategy: str):
+        previous = getattr(self, "_strategy", None)
+        if strategy in (
+                "min-max", "negamax", "negamax-parallel", "negamax-pattern"):
+            self.set_endgame(self.ENDGAME_EMPTIES, self.WLD_EMPTIES)
+        else:
+            self.set_endgame(0)
+
         if strategy == "random":
             self._strategy = Random()
         elif strategy == "maximize":
@@ -33,9 +87,42 @@ class Strategy(OthelloGame):
         elif strategy == "minimize":
             self._strategy = Minimize()
         elif strategy == "min-max":
-            self._strategy = Minmax()
+            self._strategy = Minmax(time_limit=self.MOVE_TIME)
+        elif strategy == "negamax":
+            self._strategy = Negamax(time_limit=self.MOVE_TIME)
+        elif strategy == "negamax-parallel":
+            self._strategy = ParallelNegamax(time_limit=self.MOVE_TIME)
+        elif strategy == "negamax-pattern":
+            self._strategy = Negamax(
+                time_limit=self.MOVE_TIME, evaluator=shared_evaluator(),
+                batch=True)
         else:
             raise KeyError
+        # Worker processes of the previous strategy are stopped.
+        close = getattr(previous, "close", None)
+        if close is not None:
+            close()
 
     def selecter(self, othello):
+        start = time.perf_counter()
+        black_board, white_board = othello.board.return_board()
+        empties = 64 - BitBoard._bit_count(black_board | white_board)
+        deadline = None
+        if self.MOVE_TIME is not None:
+            deadline = start + self.MOVE_TIME * self.ENDGAME_SHARE
+        try:
+            if empties <= self._endgame_empties:
+                return self._endgame.put_disk(othello, deadline=deadline)
+            if empties <= self._wld_empties:
+                selected = self._endgame.put_disk(
+                    othello, wld=True, deadline=deadline)
+                if self._endgame.score >= 0:
+                    return selected
+        except SearchTimeout:
+            logger.info(
+                "Endgame of %d empties was not solved in time." % empties)
+        # The time of the solvers is taken from the time of the search.
+        start_move = getattr(self._strategy, "start_move", None)
+        if start_move is not None and deadline is not None:
+            start_move(start)
         return self._strategy.put_disk(othello)
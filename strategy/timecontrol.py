@@ -0,0 +1,135 @@
+"""
+Iterative deepening under a time limit.
+
+A search to a fixed depth may take a moment in the opening and seconds in
+the middle game. Searches of 1, 2, ... plies are run instead until the
+deadline passes, and the search cut by the deadline is discarded, so the
+time of a move is bounded whatever the board is. Time spent on the move
+before the search, such as by an endgame solver, is counted by start_move.
+"""
+import abc
+from logging import getLogger
+import time
+
+from bitboard import BitBoard
+
+logger = getLogger(__name__)
+
+
+class SearchTimeout(Exception):
+    """The deadline of a search has passed."""
+
+
+class IterativeDeepening(abc.ABC):
+    """Mixin of searches which deepen until the time runs out.
+
+    A class using this calls _init_time_control, calls _check_deadline in
+    every node while _deadline is not None, and defines _iterate, which is
+    abstract.
+
+    Attributes
+    ----------
+    WIN_VALUE : float
+        Iterations stop at an evaluation whose absolute value is not less
+        than this, since the game is solved.
+    """
+
+    WIN_VALUE = float("inf")
+
+    def _init_time_control(self, time_limit, game_time):
+        """
+        Parameters
+        ----------
+        time_limit : float or None
+            Seconds for a move.
+        game_time : float or None
+            Seconds for all moves of the game, which are shared by the
+            moves left. The time of a move is not more than time_limit if
+            both are given.
+        """
+        self._time_limit = time_limit
+        self._game_time = game_time
+        self._deadline = None
+        self._move_start = None
+        self._ticks = 0
+
+    def start_move(self, start: float):
+        """Count the time of the next move from start.
+
+        Parameters
+        ----------
+        start : float
+            Time by time.perf_counter when the move started. The next
+            iterative_deepening ends by start plus the time of the move.
+        """
+        self._move_start = start
+
+    def _check_deadline(self):
+        """Raise SearchTimeout if the deadline has passed.
+
+        The clock is read once in 256 calls.
+        """
+        self._ticks += 1
+        if not self._ticks & 0xff and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+
+    def move_time(self, othello):
+        """Returns seconds for the move, or None to search a fixed depth."""
+        if self._game_time is None:
+            return self._time_limit
+        black_board, white_board = othello.board.return_board()
+        empties = 64 - BitBoard._bit_count(black_board | white_board)
+        move_time = self._game_time / max((empties + 1) // 2, 1)
+        if self._time_limit is not None:
+            move_time = min(move_time, self._time_limit)
+        return move_time
+
+    @abc.abstractmethod
+    def _iterate(self, position, depth, previous):
+        """Returns the evaluation and the move of an iteration.
+
+        Parameters
+        ----------
+        position : Position
+        depth : int
+        previous : float or None
+            Evaluation of the last iteration.
+        """
+
+    def iterative_deepening(self, othello, move_time):
+        """Search 1, 2, ... plies deep until the time runs out.
+
+        The search of depth 1 is always finished. A search which is cut by
+        the deadline is discarded, and the move of the last finished
+        search is returned.
+        """
+        start = self._move_start
+        self._move_start = None
+        if start is None:
+            start = time.perf_counter()
+        position = othello.return_position()
+        max_depth = 64 - BitBoard._bit_count(
+            position.player | position.opponent)
+        evaluation, selected = self._iterate(position, 1, None)
+        completed = 1
+        self._deadline = start + move_time
+        try:
+            for depth in range(2, max_depth + 1):
+                if abs(evaluation) >= self.WIN_VALUE:
+                    # The game was solved.
+                    break
+                # A copy is searched, since a cut search leaves moves.
+                evaluation, selected = self._iterate(
+                    position.copy(), depth, evaluation)
+                completed = depth
+        except SearchTimeout:
+            pass
+        finally:
+            self._deadline = None
+        elapsed = time.perf_counter() - start
+        if self._game_time is not None:
+            self._game_time -= elapsed
+        logger.debug(
+            "Depth %d was finished in %.3f s of %.3f s."
+            % (completed, elapsed, move_time))
+        return selected
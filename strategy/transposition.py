@@ -0,0 +1,135 @@
+"""
+Transposition table of search results.
+
+Entries are kept in parallel arrays allocated once, so the table never
+grows while searching. A bucket has two slots: the first keeps the deepest
+result of the current search, and the second is always replaced. Entries
+of older searches are replaced first, so the table can be kept over moves
+and games. Tables are shared by name within a process.
+"""
+
+from array import array
+
+# Bound of a value which is not known.
+INFINITY = 1 << 62
+NO_MOVE = -1
+
+
+class TranspositionTable:
+    """Search results keyed by Zobrist hash.
+
+    Parameters
+    ----------
+    megabytes : float
+        Memory budget of the table. The number of buckets is the largest
+        power of 2 which fits in it.
+
+    Attributes
+    ----------
+    generation : int
+        Counter of searches, from 0 to 255.
+    """
+
+    __all__ = ["probe", "store", "new_search", "clear"]
+
+    # key, lower, upper, move, depth and generation.
+    ENTRY_BYTES = 8 + 8 + 8 + 1 + 1 + 1
+
+    def __init__(self, megabytes: float = 16):
+        buckets = 1
+        while buckets * 4 * self.ENTRY_BYTES <= megabytes * 1024 * 1024:
+            buckets *= 2
+        self._mask = buckets - 1
+        self._size = buckets * 2
+        self.clear()
+
+    def __len__(self):
+        """Number of slots."""
+        return self._size
+
+    def clear(self):
+        """Remove all entries."""
+        size = self._size
+        self._keys = array("Q", bytes(8 * size))
+        self._lowers = array("q", bytes(8 * size))
+        self._uppers = array("q", bytes(8 * size))
+        self._moves = array("b", bytes(size))
+        # Depth of an empty slot is -1.
+        self._depths = array("b", [-1]) * size
+        self._generations = array("B", bytes(size))
+        self.generation = 0
+
+    def new_search(self):
+        """Start a new search, so that older entries are replaced first."""
+        self.generation = (self.generation + 1) & 0xff
+
+    def probe(self, hash_: int):
+        """Returns the entry of the hash.
+
+        Parameters
+        ----------
+        hash_ : int
+            Zobrist hash of the position.
+
+        Returns
+        -------
+        entry : tuple of int or None
+            (lower, upper, move, depth) if found. A lower bound of -INFINITY
+            or an upper bound of INFINITY is not known, and move is NO_MOVE
+            if no move was selected.
+        """
+        index = (hash_ & self._mask) << 1
+        if self._keys[index] != hash_ or self._depths[index] < 0:
+            index += 1
+            if self._keys[index] != hash_ or self._depths[index] < 0:
+                return None
+        self._generations[index] = self.generation
+        return (
+            self._lowers[index], self._uppers[index],
+            self._moves[index], self._depths[index],
+        )
+
+    def store(
+            self, hash_: int, depth: int, lower: int, upper: int,
+            move: int = NO_MOVE,
+            ):
+        """Save a search result.
+
+        Parameters
+        ----------
+        hash_ : int
+            Zobrist hash of the position.
+        depth : int
+            Remaining depth of the search, from 0 to 127.
+        lower, upper : int
+            Bounds of the value. Use -INFINITY and INFINITY if not known.
+        move : int
+            Selected move from 0 to 63, or NO_MOVE.
+        """
+        index = (hash_ & self._mask) << 1
+        if self._keys[index] != hash_ \
+                and self._generations[index] == self.generation \
+                and self._depths[index] > depth:
+            # The deeper result of this search is kept.
+            index += 1
+        self._keys[index] = hash_
+        self._lowers[index] = lower
+        self._uppers[index] = upper
+        self._moves[index] = move
+        self._depths[index] = depth
+        self._generations[index] = self.generation
+
+
+_SHARED_TABLES = {}
+
+
+def shared_table(name: str, megabytes: float = 16):
+    """Returns the table of the name, which is made once per process.
+
+    Engines made for every game use the same table, so results are kept
+    over moves and games in a process.
+    """
+    table = _SHARED_TABLES.get(name)
+    if table is None:
+        table = _SHARED_TABLES[name] = TranspositionTable(megabytes)
+    return table
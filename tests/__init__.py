@@ -0,0 +1,9 @@
+"""
+Checks of fast paths against simple references.
+
+    python -m unittest discover -s tests -t .
+
+Every check compares an optimised computation, such as table-driven flips
+or a generated evaluator, with a slow computation which is easy to read,
+on positions of seeded random games.
+"""
@@ -0,0 +1,42 @@
+"""Positions of random games for the checks."""
+import random
+
+from bitboard.bitboard import BitBoard
+
+
+def random_positions(games: int, seed: int = 0):
+    """Returns positions before every move of random games.
+
+    Returns
+    -------
+    positions : list of tuple
+        (black_board, white_board, turn) where the player on turn has a
+        legal move.
+    """
+    rng = random.Random(seed)
+    board = BitBoard()
+    positions = []
+    for _ in range(games):
+        black_board, white_board = BitBoard.INIT_BLACK, BitBoard.INIT_WHITE
+        turn = BitBoard.BLACK
+        while True:
+            reversible = board.reversible_area(turn, black_board, white_board)
+            if not reversible:
+                if not board.reversible_area(
+                        turn ^ 1, black_board, white_board):
+                    break
+                turn ^= 1
+                continue
+            positions.append((black_board, white_board, turn))
+            moves = [1 << num for num in range(64) if reversible >> num & 1]
+            black_board, white_board = board.simulate_play(
+                turn, rng.choice(moves), black_board, white_board)
+            turn ^= 1
+    return positions
+
+
+def player_boards(black_board: int, white_board: int, turn: int):
+    """Returns boards of the player on turn and the opponent."""
+    if turn == BitBoard.BLACK:
+        return black_board, white_board
+    return white_board, black_board
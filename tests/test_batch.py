@@ -0,0 +1,110 @@
+"""Evaluation of boards in a batch against one board at a time."""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from bitboard import OthelloGame
+from bitboard.bitboard import BitBoard
+from strategy.batch import PatternBatch, TableBatch, children, leaf_values
+from strategy.minmax import Minmax
+from strategy.pattern import PatternEvaluator
+
+from .games import player_boards, random_positions
+
+
+def boards(positions):
+    """Returns arrays of the boards of the players on turn."""
+    pairs = [player_boards(*position) for position in positions]
+    return (np.array([pair[0] for pair in pairs], dtype=np.uint64),
+            np.array([pair[1] for pair in pairs], dtype=np.uint64))
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._evaluator = PatternEvaluator(
+            os.path.join(self._directory, "weights.bin"))
+
+    def tearDown(self):
+        self._evaluator.close()
+        shutil.rmtree(self._directory)
+
+    def test_table(self):
+        engine = Minmax()
+        batch = TableBatch(engine._EVAL_TBL)
+        positions = random_positions(10)
+        values = batch.evaluate(*boards(positions)).tolist()
+        for position, value in zip(positions, values):
+            self.assertEqual(
+                value, engine.evaluate_value(*player_boards(*position)))
+
+    def test_pattern(self):
+        batch = PatternBatch(self._evaluator)
+        positions = random_positions(10)
+        values = batch.evaluate(*boards(positions)).tolist()
+        for position, value in zip(positions, values):
+            self.assertEqual(
+                value,
+                self._evaluator.evaluate(*player_boards(*position)))
+
+    def test_children(self):
+        board = BitBoard()
+        for black_board, white_board, turn in random_positions(3):
+            reversible = board.reversible_area(turn, black_board, white_board)
+            put_locs = [
+                1 << square for square in range(64)
+                if reversible >> square & 1]
+            movers, others = children(
+                *player_boards(black_board, white_board, turn), put_locs)
+            for put_loc, mover, other in zip(
+                    put_locs, movers.tolist(), others.tolist()):
+                self.assertEqual(
+                    player_boards(*board.simulate_play(
+                        turn, put_loc, black_board, white_board), turn),
+                    (mover, other))
+
+    def test_leaf_values(self):
+        batch = TableBatch(Minmax()._EVAL_TBL)
+        full = 0xffffffffffffffff
+        player = np.array([full ^ 0xff, 0xff, 0xffffffff, 1], dtype=np.uint64)
+        opponent = np.array([0xff, full ^ 0xff, 0xffffffff00000000, 2],
+                            dtype=np.uint64)
+        values = leaf_values(batch, player, opponent, 1000)
+        self.assertEqual(values[:3], [1000, -1000, 0])
+        self.assertEqual(values[3], batch.evaluate(player, opponent)[3])
+
+    def test_search(self):
+        # Moves and evaluations are the same with and without batches.
+        for evaluator in (None, self._evaluator):
+            moves = []
+            for batch in (False, True):
+                engine = Minmax(evaluator=evaluator, batch=batch)
+                results = []
+                for black_board, white_board, turn in \
+                        random_positions(1)[::8]:
+                    game = OthelloGame()
+                    game.board.update_board(black_board, white_board)
+                    game.turn = turn
+                    position = game.return_position()
+                    engine._player_clr = turn
+                    engine._root_depth = 3
+                    engine._start_evaluation(position)
+                    results.append(
+                        engine.min_max(position, 3, float("inf")))
+                moves.append(results)
+            self.assertEqual(moves[0], moves[1])
+
+    def test_close(self):
+        batch = PatternBatch(self._evaluator)
+        self._evaluator.close()
+        # The weights are kept until the batch is freed.
+        player, opponent = boards(random_positions(1))
+        batch.evaluate(player, opponent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Reversed disks of every flip mode against a walk over the squares."""
+import unittest
+
+from bitboard.bitboard import BitBoard
+
+from .games import player_boards, random_positions
+
+DIRECTIONS = [
+    (-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1),
+]
+
+
+def reversed_disks(player: int, opponent: int, square: int):
+    """Returns disks reversed by a disk put on the square."""
+    reverse_bit = 0
+    for row_step, col_step in DIRECTIONS:
+        row, col = divmod(square, 8)
+        line = 0
+        while True:
+            row += row_step
+            col += col_step
+            if not (0 <= row < 8 and 0 <= col < 8):
+                break
+            bit = 1 << (row * 8 + col)
+            if opponent & bit:
+                line |= bit
+                continue
+            if player & bit:
+                reverse_bit |= line
+            break
+    return reverse_bit
+
+
+class FlipTest(unittest.TestCase):
+
+    FLIP_MODES = ["loop", "shift", "table"]
+
+    def test_flip_modes(self):
+        boards = {mode: BitBoard(mode) for mode in self.FLIP_MODES}
+        for black_board, white_board, turn in random_positions(20):
+            player, opponent = player_boards(black_board, white_board, turn)
+            empty = ~(player | opponent) & 0xffffffffffffffff
+            for square in range(64):
+                put_loc = 1 << square
+                if not empty & put_loc:
+                    continue
+                reverse_bit = reversed_disks(player, opponent, square)
+                expected = [black_board, white_board]
+                expected[turn] ^= put_loc | reverse_bit
+                expected[turn ^ 1] ^= reverse_bit
+                for mode, board in boards.items():
+                    self.assertEqual(
+                        list(board.simulate_play(
+                            turn, put_loc, black_board, white_board)),
+                        expected, "%s flip mode at %d" % (mode, square))
+
+    def test_reversible_area(self):
+        board = BitBoard()
+        for black_board, white_board, turn in random_positions(20, seed=1):
+            player, opponent = player_boards(black_board, white_board, turn)
+            empty = ~(player | opponent) & 0xffffffffffffffff
+            expected = sum(
+                1 << square for square in range(64)
+                if empty >> square & 1
+                and reversed_disks(player, opponent, square))
+            self.assertEqual(
+                board.reversible_area(turn, black_board, white_board),
+                expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
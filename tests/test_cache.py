@@ -0,0 +1,139 @@
+"""Search cache entries against searches without the cache."""
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from bitboard import OthelloGame, Position
+from strategy import cache
+from strategy.cache import EXACT, LOWER, UPPER, SearchCache
+from strategy.minmax_fixing import _CPU_KEY, MinmaxNew
+from strategy.transposition import shared_table
+
+from .games import random_positions
+
+
+def minmax_value(engine, position, depth: int):
+    """Returns the value of MinmaxNew.min_max without pruning or tables."""
+    if not (position.player | position.opponent) ^ 0xffffffffffffffff:
+        return engine.final_value(position)
+    stage = sum(position.count_disks())
+    if depth == 0:
+        evaluation = engine.evaluate_position(position, stage)
+        if stage < 21:
+            evaluation -= 5 * bin(position.reversible_area()).count("1")
+        return evaluation
+    reversible, must_pass, game_over, _ = position.expand()
+    if game_over:
+        return engine.final_value(position)
+    if must_pass:
+        position.pass_()
+        value = minmax_value(engine, position, depth - 1)
+        position.undo()
+        return value
+    values = []
+    for square in range(64):
+        if reversible >> square & 1:
+            position.play(1 << square)
+            values.append(minmax_value(engine, position, depth - 1))
+            position.undo()
+    if position.turn == engine._player_clr:
+        return max(values)
+    return min(values)
+
+
+class SearchCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._filename = os.path.join(self._directory, "cache.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_pack(self):
+        for entry in [(0, EXACT, 0, -1), (127, LOWER, -(1 << 47), 63),
+                      (5, UPPER, (1 << 47) - 1, 0), (9, EXACT, -3000, 27)]:
+            self.assertEqual(cache._unpack(cache._pack(*entry)), entry)
+
+    def test_merge(self):
+        writer = SearchCache(self._filename, entries=64)
+        writer.add(1, 5, EXACT, 10, 3)
+        writer.add(1, 4, LOWER, 20, 4)
+        writer.add(2, 6, UPPER, -7)
+        self.assertEqual(writer.probe(1), (5, EXACT, 10, 3))
+        self.assertEqual(writer.merge(), 2)
+        reader = SearchCache(self._filename)
+        self.assertEqual(reader.probe(1), (5, EXACT, 10, 3))
+        self.assertEqual(reader.probe(2), (6, UPPER, -7, -1))
+        self.assertIsNone(reader.probe(3))
+        # An entry of a shallower search does not replace a deeper one.
+        writer.add(1, 4, LOWER, 20, 4)
+        self.assertEqual(writer.merge(), 0)
+        self.assertEqual(reader.probe(1), (5, EXACT, 10, 3))
+        reader.close()
+        writer.close()
+
+    def test_version(self):
+        writer = SearchCache(self._filename, entries=64)
+        writer.add(1, 5, EXACT, 10, 3)
+        writer.merge()
+        writer.close()
+        with open(self._filename, "r+b") as file_:
+            file_.write(struct.pack("<8sI", cache._MAGIC, cache._VERSION - 1))
+        # Entries of another version are not read, and the file is made
+        # again by the next merge.
+        old = SearchCache(self._filename)
+        self.assertIsNone(old.probe(1))
+        old.add(2, 6, UPPER, -7)
+        old.merge()
+        old.close()
+        reader = SearchCache(self._filename)
+        self.assertIsNone(reader.probe(1))
+        self.assertEqual(reader.probe(2), (6, UPPER, -7, -1))
+        reader.close()
+
+    def test_bounds(self):
+        # Positions of the opening, which have few moves.
+        positions = [
+            position for position in random_positions(3)
+            if bin(position[0] | position[1]).count("1") in (8, 9)]
+        for black_board, white_board, turn in positions[:2]:
+            shared_table("minmax-new").clear()
+            if os.path.exists(self._filename):
+                os.remove(self._filename)
+            engine = MinmaxNew(filename=self._filename)
+            game = OthelloGame()
+            game.board.update_board(black_board, white_board)
+            game.turn = turn
+            engine.put_disk(game, depth=6)
+            engine._cache.close()
+
+            # Entries of the children of the root are checked.
+            reader = SearchCache(self._filename)
+            root = Position.from_board(black_board, white_board, turn)
+            reversible = root.reversible_area()
+            checked = 0
+            for square in range(64):
+                if not reversible >> square & 1:
+                    continue
+                root.play(1 << square)
+                entry = reader.probe(root.hash ^ _CPU_KEY[turn])
+                if entry is not None:
+                    depth, bound, score, _ = entry
+                    value = minmax_value(engine, root, depth)
+                    if bound == EXACT:
+                        self.assertEqual(value, score)
+                    elif bound == LOWER:
+                        self.assertGreaterEqual(value, score)
+                    else:
+                        self.assertLessEqual(value, score)
+                    checked += 1
+                root.undo()
+            reader.close()
+            self.assertTrue(checked)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Endgame solver against a search of every continuation."""
+import time
+import unittest
+
+from bitboard.bitboard import BitBoard
+from strategy.endgame import EndgameSolver, SearchTimeout, final_score
+from strategy.transposition import TranspositionTable
+
+from .games import player_boards, random_positions
+
+
+def exact_score(player: int, opponent: int, passed: bool = False):
+    """Returns the final disk difference of perfect play by negamax."""
+    reversible = BitBoard._reversible_area(player, opponent)
+    if not reversible:
+        if passed:
+            return final_score(player, opponent)
+        return -exact_score(opponent, player, True)
+    best = -64
+    while reversible:
+        put_loc = reversible & -reversible
+        reversible ^= put_loc
+        reverse_bit = BitBoard._reverse_by_table(player, opponent, put_loc)
+        best = max(best, -exact_score(
+            opponent ^ reverse_bit, player | put_loc | reverse_bit))
+    return best
+
+
+def endgame_positions(empties: int, count: int):
+    """Returns (player, opponent) of random games with the empty squares."""
+    positions = []
+    for black_board, white_board, turn in random_positions(count * 2):
+        if 64 - bin(black_board | white_board).count("1") == empties:
+            positions.append(player_boards(black_board, white_board, turn))
+    return positions[:count]
+
+
+class EndgameTest(unittest.TestCase):
+
+    def test_solve(self):
+        for empties in range(1, 9):
+            for player, opponent in endgame_positions(empties, 5):
+                solver = EndgameSolver(TranspositionTable(1))
+                score, selected = solver.solve(player, opponent)
+                self.assertEqual(score, exact_score(player, opponent))
+                # The selected move achieves the score.
+                put_loc = 1 << selected
+                reverse_bit = BitBoard._reverse_by_table(
+                    player, opponent, put_loc)
+                self.assertTrue(reverse_bit)
+                self.assertEqual(score, -exact_score(
+                    opponent ^ reverse_bit, player | put_loc | reverse_bit))
+
+    def test_solve_wld(self):
+        for player, opponent in endgame_positions(8, 10):
+            solver = EndgameSolver(TranspositionTable(1))
+            result, _ = solver.solve_wld(player, opponent)
+            score = exact_score(player, opponent)
+            self.assertEqual(result, (score > 0) - (score < 0))
+
+    def test_deadline(self):
+        player, opponent = endgame_positions(14, 1)[0]
+        solver = EndgameSolver(TranspositionTable(1))
+        with self.assertRaises(SearchTimeout):
+            solver.solve(player, opponent, deadline=time.perf_counter() - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Evaluation by rows against the loop over squares."""
+import unittest
+
+from bitboard import OthelloGame
+from strategy.evaluation import evaluate_rows, row_tables
+from strategy.minmax import Minmax
+
+from .games import player_boards, random_positions
+
+_BORDER = 0xff818181818181ff
+
+
+def loop_value(table: list, player: int, opponent: int):
+    """Returns the evaluation by the loop over squares."""
+    value = 0
+    for square in range(64):
+        if player >> square & 1:
+            value += table[square]
+        elif opponent >> square & 1:
+            value -= table[square]
+    return value
+
+
+class _CheckedMinmax(Minmax):
+    """Minmax which checks the running evaluation at every leaf."""
+
+    def min_max(self, position, depth, pre_evaluation):
+        if depth == 0:
+            player, opponent = position.player, position.opponent
+            if position.turn != self._player_clr:
+                player, opponent = opponent, player
+            phase = 1 if (player | opponent) & _BORDER else 0
+            self.leaves.append((
+                self._score,
+                loop_value(self._EVAL_TBL[phase], player, opponent)))
+        return super().min_max(position, depth, pre_evaluation)
+
+
+class EvaluationTest(unittest.TestCase):
+
+    def test_rows(self):
+        tables = Minmax()._EVAL_TBL
+        rows = [row_tables(table) for table in tables]
+        for black_board, white_board, turn in random_positions(20):
+            player, opponent = player_boards(black_board, white_board, turn)
+            for table, table_rows in zip(tables, rows):
+                self.assertEqual(
+                    evaluate_rows(table_rows, player, opponent),
+                    loop_value(table, player, opponent))
+
+    def test_running(self):
+        engine = _CheckedMinmax()
+        engine.leaves = []
+        for black_board, white_board, turn in random_positions(1)[::6]:
+            game = OthelloGame()
+            game.board.update_board(black_board, white_board)
+            game.turn = turn
+            engine.put_disk(game, depth=3)
+        self.assertTrue(engine.leaves)
+        for running, value in engine.leaves:
+            self.assertEqual(running, value)
+
+
+if __name__ == "__main__":
+    unittest.main()
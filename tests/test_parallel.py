@@ -0,0 +1,48 @@
+"""Split root search against the search of one process."""
+import multiprocessing
+import unittest
+
+from bitboard import Position
+from strategy import parallel
+from strategy.negamax import Negamax
+from strategy.parallel import ParallelNegamax
+from strategy.transposition import TranspositionTable, shared_table
+
+from .games import random_positions
+
+
+class ParallelTest(unittest.TestCase):
+
+    def test_search(self):
+        engine = ParallelNegamax(workers=2, parallel_depth=2)
+        try:
+            for black_board, white_board, turn in random_positions(1)[20:24]:
+                position = Position.from_board(black_board, white_board, turn)
+                shared_table("negamax").clear()
+                evaluation, _ = engine.search(position, 4)
+                reference = Negamax(table=TranspositionTable(1))
+                self.assertEqual(
+                    evaluation, reference.search(position, 4)[0])
+        finally:
+            engine.close()
+
+    def test_new_search(self):
+        # The worker is run in this process.
+        parallel._initialize_worker(multiprocessing.Value("d"))
+        engine = parallel._worker_engine
+        black_board, white_board, turn = random_positions(1)[20]
+        position = Position.from_board(black_board, white_board, turn)
+        square = (position.reversible_area() & -position.reversible_area()) \
+            .bit_length() - 1
+        generation = engine._table.generation
+        for search, aged in [(1, 1), (1, 1), (2, 2)]:
+            parallel._shared_alpha.value = -float("inf")
+            parallel._search_move((
+                position.player, position.opponent, position.turn, square,
+                3, float("inf"), None, search))
+            self.assertEqual(
+                engine._table.generation, (generation + aged) & 0xff)
+
+
+if __name__ == "__main__":
+    unittest.main()
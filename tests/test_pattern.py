@@ -0,0 +1,74 @@
+"""Pattern evaluation against the sum over instances."""
+import os
+import shutil
+import tempfile
+import unittest
+
+from bitboard.symmetry import TRANSFORMS
+from strategy.pattern import (
+    SCALE, PatternEvaluator, fitted_weights, instances, seeded_weights,
+    write_fitted, write_weights)
+
+from .games import player_boards, random_positions
+
+
+def pattern_value(evaluator, player: int, opponent: int):
+    """Returns the evaluation by a loop over the squares of instances."""
+    base = evaluator._bases[bin(player | opponent).count("1")]
+    value = 0
+    for pattern, offset in zip(instances(), evaluator._offsets[0]):
+        for instance in pattern:
+            index = 0
+            for digit, square in enumerate(instance):
+                if player >> square & 1:
+                    index += 3 ** digit
+                elif opponent >> square & 1:
+                    index += 2 * 3 ** digit
+            value += evaluator._weights[base + offset + index]
+    return value // SCALE
+
+
+class PatternTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._evaluator = PatternEvaluator(
+            os.path.join(self._directory, "weights.bin"))
+
+    def tearDown(self):
+        self._evaluator.close()
+        shutil.rmtree(self._directory)
+
+    def test_evaluate(self):
+        evaluator = self._evaluator
+        for black_board, white_board, turn in random_positions(10):
+            player, opponent = player_boards(black_board, white_board, turn)
+            self.assertEqual(
+                evaluator.evaluate(player, opponent),
+                pattern_value(evaluator, player, opponent))
+
+    def test_symmetry(self):
+        # Default and seeded weights evaluate symmetric boards alike.
+        filename = os.path.join(self._directory, "seeded.bin")
+        write_weights(seeded_weights(), filename)
+        seeded = PatternEvaluator(filename)
+        for evaluator in (self._evaluator, seeded):
+            for black_board, white_board, turn in random_positions(3):
+                player, opponent = player_boards(
+                    black_board, white_board, turn)
+                values = {
+                    evaluator.evaluate(
+                        transform(player), transform(opponent))
+                    for transform in TRANSFORMS}
+                self.assertEqual(len(values), 1)
+        seeded.close()
+
+    def test_fitted(self):
+        weights = seeded_weights()
+        filename = os.path.join(self._directory, "fitted.gz")
+        write_fitted(weights, filename)
+        self.assertEqual(fitted_weights(filename), weights)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Generated evaluators against loops over squares."""
+import random
+import unittest
+from unittest import mock
+
+from strategy import specialize
+from strategy.evaluation import SQUARE_TABLES
+from strategy.pattern import instances
+from strategy.specialize import pattern_function, table_function
+
+from .games import player_boards, random_positions
+from .test_evaluation import loop_value
+
+_BORDER = 0xff818181818181ff
+
+
+class SpecializeTest(unittest.TestCase):
+
+    def test_table_function(self):
+        # A table with an empty row as well.
+        rng = random.Random(0)
+        tables = [
+            [rng.randrange(-50, 50) if square >= 8 else 0
+             for square in range(64)]
+            for _ in range(2)]
+        for tables in (SQUARE_TABLES, tables):
+            evaluate = table_function(tables)
+            for black_board, white_board, turn in random_positions(5):
+                player, opponent = player_boards(
+                    black_board, white_board, turn)
+                table = tables[1 if (player | opponent) & _BORDER else 0]
+                self.assertEqual(
+                    evaluate(player, opponent),
+                    loop_value(table, player, opponent))
+
+    def test_pattern_function(self):
+        # Weights which are not symmetric, and two phases by disks.
+        patterns = instances()
+        offsets = []
+        size = 0
+        for pattern in patterns:
+            offsets.append(size)
+            size += 3 ** len(pattern[0])
+        bases = [0 if disks < 30 else size for disks in range(65)]
+        rng = random.Random(0)
+        weights = [rng.randrange(-1000, 1000) for _ in range(2 * size)]
+        evaluate = pattern_function(patterns, offsets, bases, 16, weights)
+        for black_board, white_board, turn in random_positions(5):
+            player, opponent = player_boards(black_board, white_board, turn)
+            value = 0
+            base = bases[bin(player | opponent).count("1")]
+            for pattern, offset in zip(patterns, offsets):
+                for instance in pattern:
+                    index = sum(
+                        (player >> square & 1) * 3 ** digit
+                        + (opponent >> square & 1) * 2 * 3 ** digit
+                        for digit, square in enumerate(instance))
+                    value += weights[base + offset + index]
+            self.assertEqual(evaluate(player, opponent), value // 16)
+
+    def test_memory(self):
+        # Sources are compiled in memory if the cache can not be written.
+        rng = random.Random(1)
+        tables = [[rng.randrange(-9, 9) for _ in range(64)]
+                  for _ in range(2)]
+        with mock.patch.object(specialize, "CACHE_DIR", "/dev/null/cache"), \
+                self.assertLogs(specialize.logger, "WARNING"):
+            evaluate = table_function(tables)
+        for black_board, white_board, turn in random_positions(1):
+            player, opponent = player_boards(black_board, white_board, turn)
+            table = tables[1 if (player | opponent) & _BORDER else 0]
+            self.assertEqual(
+                evaluate(player, opponent),
+                loop_value(table, player, opponent))
+
+
+if __name__ == "__main__":
+    unittest.main()
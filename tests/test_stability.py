@@ -0,0 +1,62 @@
+"""Stable disks against every continuation of the game."""
+import unittest
+
+from bitboard.bitboard import BitBoard
+from bitboard.stability import stable_disks
+
+from .games import player_boards, random_positions
+
+_CORNERS = 0x8100000000000081
+
+
+def kept_disks(board, player: int, opponent: int, turn: int):
+    """Returns disks of both players which are kept in every continuation.
+
+    The boards are of black and white, and turn is the color on turn.
+    """
+    kept = [player, opponent]
+    boards = [player, opponent]
+
+    def search(boards, turn, passed):
+        kept[0] &= boards[0]
+        kept[1] &= boards[1]
+        reversible = board.reversible_area(turn, *boards)
+        if not reversible:
+            if not passed:
+                search(boards, turn ^ 1, True)
+            return
+        while reversible:
+            put_loc = reversible & -reversible
+            reversible ^= put_loc
+            search(board.simulate_play(turn, put_loc, *boards), turn ^ 1,
+                   False)
+
+    search(boards, turn, False)
+    return kept
+
+
+class StabilityTest(unittest.TestCase):
+
+    def test_stable_disks(self):
+        board = BitBoard()
+        positions = [
+            position for position in random_positions(100)
+            if 64 - BitBoard._bit_count(position[0] | position[1]) == 7]
+        self.assertTrue(positions)
+        for black_board, white_board, turn in positions[:20]:
+            black_kept, white_kept = kept_disks(
+                board, black_board, white_board, turn)
+            player, opponent = player_boards(black_board, white_board, turn)
+            player_stable, opponent_stable = stable_disks(player, opponent)
+            if turn == BitBoard.WHITE:
+                player_stable, opponent_stable = \
+                    opponent_stable, player_stable
+            # Stable disks are kept, and disks on corners are stable.
+            self.assertEqual(player_stable & ~black_kept, 0)
+            self.assertEqual(opponent_stable & ~white_kept, 0)
+            self.assertEqual(black_board & _CORNERS & ~player_stable, 0)
+            self.assertEqual(white_board & _CORNERS & ~opponent_stable, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
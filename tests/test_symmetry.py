@@ -0,0 +1,100 @@
+"""Transforms of boards against transforms of the squares one by one."""
+import random
+import unittest
+
+from bitboard.bitboard import BitBoard
+from bitboard.symmetry import (
+    INVERSE_MAP, SQUARE_MAP, TRANSFORMS, canonical, unique_moves)
+
+from .games import player_boards, random_positions
+
+# (row, col) of a square after every transform of TRANSFORMS.
+SQUARE_TRANSFORMS = [
+    lambda row, col: (row, col),
+    lambda row, col: (7 - row, col),
+    lambda row, col: (row, 7 - col),
+    lambda row, col: (7 - row, 7 - col),
+    lambda row, col: (col, row),
+    lambda row, col: (7 - col, 7 - row),
+    lambda row, col: (7 - col, row),
+    lambda row, col: (col, 7 - row),
+]
+
+
+def transform_board(board: int, number: int):
+    """Returns the board after the transform, square by square."""
+    result = 0
+    for square in range(64):
+        if board >> square & 1:
+            row, col = SQUARE_TRANSFORMS[number](*divmod(square, 8))
+            result |= 1 << (row * 8 + col)
+    return result
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_transforms(self):
+        rng = random.Random(0)
+        boards = [rng.getrandbits(64) for _ in range(100)]
+        for number, transform in enumerate(TRANSFORMS):
+            for board in boards:
+                self.assertEqual(
+                    transform(board), transform_board(board, number))
+            for square in range(64):
+                mapped = transform_board(1 << square, number)
+                self.assertEqual(1 << SQUARE_MAP[number][square], mapped)
+                self.assertEqual(
+                    INVERSE_MAP[number][SQUARE_MAP[number][square]], square)
+
+    def test_moves(self):
+        """Symmetric moves on symmetric boards give symmetric boards."""
+        board = BitBoard()
+        for black_board, white_board, turn in random_positions(5):
+            reversible = board.reversible_area(turn, black_board, white_board)
+            for number, transform in enumerate(TRANSFORMS):
+                self.assertEqual(
+                    board.reversible_area(
+                        turn, transform(black_board), transform(white_board)),
+                    transform(reversible))
+                put_loc = reversible & -reversible
+                self.assertEqual(
+                    list(board.simulate_play(
+                        turn, transform(put_loc), transform(black_board),
+                        transform(white_board))),
+                    [transform(disks) for disks in board.simulate_play(
+                        turn, put_loc, black_board, white_board)])
+
+    def test_canonical(self):
+        for black_board, white_board, _ in random_positions(5, seed=1):
+            expected = canonical(black_board, white_board)[:2]
+            for number, transform in enumerate(TRANSFORMS):
+                black, white, found = canonical(
+                    transform(black_board), transform(white_board))
+                self.assertEqual((black, white), expected)
+                # The transform made the canonical boards.
+                self.assertEqual(
+                    (TRANSFORMS[found](transform(black_board)),
+                     TRANSFORMS[found](transform(white_board))),
+                    expected)
+
+    def test_unique_moves(self):
+        board = BitBoard()
+        for black_board, white_board, turn in random_positions(20, seed=2):
+            player, opponent = player_boards(black_board, white_board, turn)
+            reversible = board.reversible_area(turn, black_board, white_board)
+            unique = unique_moves(player, opponent, reversible)
+            self.assertEqual(unique & ~reversible, 0)
+            # Every removed move leads to the boards of a kept move.
+            results = {}
+            for square in range(64):
+                if reversible >> square & 1:
+                    results[square] = canonical(*board.simulate_play(
+                        turn, 1 << square, black_board, white_board))[:2]
+            kept = {
+                result for square, result in results.items()
+                if unique >> square & 1}
+            self.assertEqual(set(results.values()), kept)
+
+
+if __name__ == "__main__":
+    unittest.main()
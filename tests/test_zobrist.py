@@ -0,0 +1,57 @@
+"""Incremental Zobrist hashes against hashes computed from the boards."""
+import random
+import unittest
+
+from bitboard.bitboard import BitBoard
+from bitboard.position import Position
+from bitboard.zobrist import hash_board
+
+from .games import random_positions
+
+
+class ZobristTest(unittest.TestCase):
+
+    def test_position(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            position = Position()
+            hashes = []
+            while True:
+                black_board, white_board = position.return_board()
+                self.assertEqual(
+                    position.hash,
+                    hash_board(black_board, white_board, position.turn))
+                hashes.append(position.hash)
+                reversible = position.reversible_area()
+                if reversible:
+                    moves = [
+                        1 << num for num in range(64)
+                        if reversible >> num & 1]
+                    position.play(rng.choice(moves))
+                else:
+                    position.pass_()
+                    if not position.reversible_area():
+                        break
+            # Undo restores the hash of every ply.
+            for expected in reversed(hashes):
+                position.undo()
+                self.assertEqual(position.hash, expected)
+
+    def test_board(self):
+        board = BitBoard()
+        positions = random_positions(20)
+        for black_board, white_board, _ in positions:
+            board.update_board(black_board, white_board)
+            self.assertEqual(
+                board.return_hash(), hash_board(black_board, white_board))
+        # Boards which are not one move apart.
+        rng = random.Random(1)
+        for _ in range(200):
+            black_board, white_board, _ = rng.choice(positions)
+            board.update_board(black_board, white_board)
+            self.assertEqual(
+                board.return_hash(), hash_board(black_board, white_board))
+
+
+if __name__ == "__main__":
+    unittest.main()